@@ -0,0 +1 @@
+from minifw.benchmark.suite import BENCHMARKS, benchmark, compare, run
@@ -0,0 +1,52 @@
+import argparse
+import glob
+import os
+import sys
+
+from loguru import logger
+
+from minifw.benchmark.suite import DEFAULT_BASELINE, DEFAULT_REPEAT, DEFAULT_TOLERANCE, compare, load, run, save
+from minifw.cv import imread
+from minifw.screencap.config import ARCHIVE_META_FILE
+from minifw.screencap.record import FrameArchive
+
+
+def load_frames(directory: str):
+    if os.path.exists(os.path.join(directory, ARCHIVE_META_FILE)):
+        # 录制存档直接映射，不需要解码
+        return list(FrameArchive(directory).frames)
+    paths = sorted(glob.glob(os.path.join(directory, "*.png")) + glob.glob(os.path.join(directory, "*.jpg")))
+    if not paths:
+        raise FileNotFoundError(f"no frames found in {directory}")
+    return [imread(path) for path in paths]
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m minifw.benchmark", description="minifw 热点路径基准测试")
+    parser.add_argument("-k", "--pattern", help="只运行名称匹配该正则的测试")
+    parser.add_argument("--frames", help="录制帧所在目录(png/jpg)或录制存档，默认使用合成帧")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="重复轮数")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, help="保存结果为基线")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="与基线比较，有回退时返回1")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="允许的变慢比例")
+    args = parser.parse_args()
+    # 避免日志输出影响计时
+    logger.disable("minifw")
+
+    frames = load_frames(args.frames) if args.frames else None
+    results = run(args.pattern, frames, args.repeat,
+                  callback=lambda name, result: print(f"{name:<40} {result['min_ns'] / 1000:>12.1f}us min "
+                                                     f"{result['median_ns'] / 1000:>12.1f}us median"))
+    if args.save:
+        save(results, args.save)
+        print(f"saved to {args.save}")
+    if args.compare:
+        regressions = compare(results, load(args.compare), args.tolerance)
+        for name, ratio in regressions:
+            print(f"REGRESSION {name}: {ratio:.2f}x baseline")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
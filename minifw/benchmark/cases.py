@@ -0,0 +1,278 @@
+import socket
+import struct
+import threading
+
+import cv2
+import numpy as np
+import requests
+
+from minifw.benchmark.suite import benchmark
+from minifw.common import RGB, Rect
+from minifw.cv.color import Color
+from minifw.cv.decode import FORMAT_JPEG, FORMAT_PNG, FORMAT_RAW, decode_image
+from minifw.cv.image import find_color, find_multi_colors, get_pixel, get_similarity, match_template, \
+    match_template_best
+from minifw.cv.similarity import ReferenceStack
+from minifw.matcher import ImageTemplate, SceneIndex
+from minifw.screencap.minicap import MiniCapStream
+from minifw.simulator import FakeDroidCastServer, FrameSource
+from minifw.touch.utils import CommandBuilder, str2byte
+
+SYNTHETIC_SIZE = (1280, 720)
+TEMPLATE_SIZE = 96
+PYRAMID_LEVELS = range(4)
+COLOR_ALGORITHMS = ("diff", "rgb", "rgb+", "hs")
+CAPTURE_SCALES = (1.0, 0.5)
+# 场景索引中的参考截图数
+SCENE_COUNT = 50
+# 相似度批量比较的参考图像数和缩小倍数
+SIMILARITY_REFERENCES = 20
+SIMILARITY_SCALE = 4
+# MiniCapStream每次解析的帧数和帧大小
+STREAM_FRAMES = 10
+STREAM_SIZE = (360, 640)
+STREAM_JPEG_QUALITY = 80
+SWIPE_STEPS = 100
+
+
+def synthetic_frame(seed: int = 0) -> cv2.Mat:
+    """生成固定的合成画面：平滑噪声背景加若干色块和文字，保证模板唯一"""
+    rng = np.random.default_rng(seed)
+    width, height = SYNTHETIC_SIZE
+    noise = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    frame = cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+    for _ in range(20):
+        x, y = int(rng.integers(0, width - 100)), int(rng.integers(0, height - 100))
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        cv2.rectangle(frame, (x, y), (x + int(rng.integers(20, 100)), y + int(rng.integers(20, 100))), color, -1)
+    cv2.putText(frame, "minifw", (width // 3, height // 3 + TEMPLATE_SIZE // 2), cv2.FONT_HERSHEY_SIMPLEX, 1.5,
+                (255, 255, 255), 3)
+    return frame
+
+
+def template_of(frame: cv2.Mat) -> cv2.Mat:
+    height, width = frame.shape[:2]
+    x, y = width // 3, height // 3
+    return frame[y:y + TEMPLATE_SIZE, x:x + TEMPLATE_SIZE].copy()
+
+
+@benchmark("cv.match_template")
+def bench_match_template(frames):
+    frame = frames[0]
+    template = template_of(frame)
+    return lambda: match_template(frame, template)
+
+
+def bench_match_template_best(level):
+    @benchmark(f"cv.match_template_best[level={level}]")
+    def setup(frames):
+        frame = frames[0]
+        template = template_of(frame)
+        return lambda: match_template_best(frame, template, level=level)
+
+    return setup
+
+
+for _level in PYRAMID_LEVELS:
+    bench_match_template_best(_level)
+
+
+@benchmark("cv.find_color")
+def bench_find_color(frames):
+    frame = frames[0]
+    height, width = frame.shape[:2]
+    color = get_pixel(frame, width - 10, height - 10)
+    return lambda: find_color(frame, color)
+
+
+@benchmark("cv.find_multi_colors")
+def bench_find_multi_colors(frames):
+    frame = frames[0]
+    height, width = frame.shape[:2]
+    x, y = width // 2, height // 2
+    first_color = get_pixel(frame, x, y)
+    colors = [(dx, dy, get_pixel(frame, x + dx, y + dy)) for dx, dy in ((5, 0), (0, 5), (5, 5))]
+    return lambda: find_multi_colors(frame, first_color, colors)
+
+
+def bench_image_template(capture_scale):
+    @benchmark(f"matcher.image_template[capture_scale={capture_scale}]")
+    def setup(frames):
+        frame = frames[0]
+        template = ImageTemplate("<synthetic>")
+        template.template = template_of(frame)
+        # 模拟设备端直接输出缩小的画面
+        height, width = frame.shape[:2]
+        frame = cv2.resize(frame, (int(width * capture_scale), int(height * capture_scale)),
+                           interpolation=cv2.INTER_AREA)
+        return lambda: template.match_scaled(frame, capture_scale)
+
+    return setup
+
+
+for _capture_scale in CAPTURE_SCALES:
+    bench_image_template(_capture_scale)
+
+
+def bench_scene_index(algorithm):
+    @benchmark(f"matcher.scene_index[{algorithm}]")
+    def setup(frames):
+        frame = frames[0]
+        height, width = frame.shape[:2]
+        index = SceneIndex([Rect(0, 0, width // 2, height // 2), Rect(width // 2, height // 2, width // 2, height // 2)],
+                           algorithm)
+        for seed in range(SCENE_COUNT):
+            index.add(f"scene{seed}", synthetic_frame(seed + 1))
+        index.add("current", frame)
+        return lambda: index.classify(frame)
+
+    return setup
+
+
+for _algorithm in ("dhash", "phash"):
+    bench_scene_index(_algorithm)
+
+
+def bench_get_similarity(algorithm):
+    @benchmark(f"cv.get_similarity[{algorithm}]")
+    def setup(frames):
+        frame = frames[0]
+        other = frames[1] if len(frames) > 1 and frames[1].shape == frame.shape else cv2.GaussianBlur(frame, (3, 3),
+                                                                                                       0)
+        return lambda: get_similarity(frame, other, algorithm)
+
+    return setup
+
+
+for _algorithm in ("SSIM", "PSNR"):
+    bench_get_similarity(_algorithm)
+
+
+@benchmark(f"cv.get_similarity[SSIM,scale={SIMILARITY_SCALE}]")
+def bench_get_similarity_scaled(frames):
+    frame = frames[0]
+    other = cv2.GaussianBlur(frame, (3, 3), 0)
+    return lambda: get_similarity(frame, other, "SSIM", scale=SIMILARITY_SCALE)
+
+
+def bench_reference_stack(gray):
+    @benchmark(f"cv.reference_stack[n={SIMILARITY_REFERENCES},scale={SIMILARITY_SCALE},gray={gray}]")
+    def setup(frames):
+        references = [synthetic_frame(seed + 1) for seed in range(SIMILARITY_REFERENCES - 1)] + [frames[0]]
+        stack = ReferenceStack(references, scale=SIMILARITY_SCALE, gray=gray)
+        return lambda: stack.best(frames[0])
+
+    return setup
+
+
+for _gray in (False, True):
+    bench_reference_stack(_gray)
+
+
+def bench_is_similar(algorithm):
+    @benchmark(f"color.is_similar[{algorithm}]")
+    def setup(frames):
+        color1, color2 = RGB(18, 37, 52), RGB(17, 34, 51)
+        return lambda: Color.is_similar(color1, color2, diff_algo=algorithm)
+
+    return setup
+
+
+for _algorithm in COLOR_ALGORITHMS:
+    bench_is_similar(_algorithm)
+
+
+def bench_decode(image_format):
+    @benchmark(f"cv.decode_image[{image_format}]")
+    def setup(frames):
+        frame = frames[0]
+        height, width = frame.shape[:2]
+        if image_format == FORMAT_RAW:
+            data = cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA).tobytes()
+        else:
+            data = cv2.imencode(".jpg" if image_format == FORMAT_JPEG else ".png", frame)[1].tobytes()
+        return lambda: decode_image(data, image_format, width, height)
+
+    return setup
+
+
+for _format in (FORMAT_RAW, FORMAT_JPEG, FORMAT_PNG):
+    bench_decode(_format)
+
+
+def minicap_payload(frames: int = STREAM_FRAMES, size: tuple[int, int] = STREAM_SIZE, jpeg: bytes = None) -> bytes:
+    """构造minicap数据流：24字节banner加若干RGBA帧，传入jpeg时为带长度前缀的JPEG帧"""
+    width, height = size
+    # 版本 长度 pid 真实宽高 虚拟宽高 方向 quirks
+    banner = struct.pack("<BBIIIIIBB", 1, 24, 0, width, height, width, height, 0, 0)
+    if jpeg is not None:
+        return banner + (struct.pack("<I", len(jpeg)) + jpeg) * frames
+    frame = np.random.default_rng(0).integers(0, 256, width * height * 4, dtype=np.uint8).tobytes()
+    return banner + frame * frames
+
+
+def parse_minicap_stream(payload: bytes, frame_length: int):
+    def parse():
+        reader, writer = socket.socketpair()
+
+        def send():
+            with writer:
+                writer.sendall(payload)
+
+        sender = threading.Thread(target=send, daemon=True)
+        sender.start()
+        stream = MiniCapStream(None, None)
+        stream.sock = reader
+        with reader:
+            stream.read_stream()
+        sender.join()
+        assert len(stream.data) == frame_length
+
+    return parse
+
+
+@benchmark("screencap.minicap_stream")
+def bench_minicap_stream(frames):
+    return parse_minicap_stream(minicap_payload(), STREAM_SIZE[0] * STREAM_SIZE[1] * 4)
+
+
+@benchmark("screencap.minicap_stream[jpeg]")
+def bench_minicap_stream_jpeg(frames):
+    frame = frames[0]
+    height, width = frame.shape[:2]
+    jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, STREAM_JPEG_QUALITY])[1].tobytes()
+    return parse_minicap_stream(minicap_payload(size=(width, height), jpeg=jpeg), len(jpeg))
+
+
+@benchmark("screencap.droidcast_raw")
+def bench_droidcast_raw(frames):
+    server = FakeDroidCastServer(FrameSource(frames, fps=0))
+    server.start()
+    session = requests.Session()
+    url = server.url
+
+    def teardown():
+        session.close()
+        server.stop()
+
+    return lambda: session.get(url, timeout=3).content, teardown
+
+
+@benchmark("touch.command_builder")
+def bench_command_builder(frames):
+    builder = CommandBuilder()
+
+    def build():
+        builder.down(0, 100, 100, 50)
+        builder.commit()
+        for i in range(SWIPE_STEPS):
+            builder.move(0, 100 + i, 100 + i, 50)
+            builder.commit()
+            builder.wait(5)
+        builder.up(0)
+        builder.commit()
+        content = str2byte(builder._content)
+        builder.reset()
+        return content
+
+    return build
@@ -0,0 +1,145 @@
+import json
+import os
+import platform
+import re
+import statistics
+import timeit
+from typing import Callable
+
+import cv2
+import numpy as np
+
+# 注册的基准测试: 名称 -> setup函数，setup接收帧列表并返回被计时的无参函数，
+# 需要释放资源时返回 (被计时的函数, 清理函数)
+BenchmarkSetup = Callable[[list[cv2.Mat]], Callable[[], object] | tuple[Callable[[], object], Callable[[], None]]]
+BENCHMARKS: dict[str, BenchmarkSetup] = {}
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_REPEAT = 9
+# 计时前预热的轮数，排除首次调用的缓存、内存分配等开销
+DEFAULT_WARMUP = 1
+# 最小值比基线最小值慢超过该比例(再加上测量波动)视为性能回退
+DEFAULT_TOLERANCE = 0.25
+
+
+def benchmark(name: str):
+    """注册基准测试，被装饰的函数负责准备数据，返回真正需要计时的函数"""
+
+    def decorator(setup):
+        if name in BENCHMARKS:
+            raise ValueError(f"benchmark {name} already registered")
+        BENCHMARKS[name] = setup
+        return setup
+
+    return decorator
+
+
+def measure(func: Callable[[], object], repeat: int = DEFAULT_REPEAT, warmup: int = DEFAULT_WARMUP) -> dict:
+    """
+    measure 测量函数单次调用耗时
+
+    先用timeit自动确定每轮调用次数(每轮至少0.2秒)，预热warmup轮后再重复repeat轮
+
+    Args:
+        func (Callable[[], object]): 被测函数
+        repeat (int, optional): 重复轮数. Defaults to 9.
+        warmup (int, optional): 预热轮数，不计入结果. Defaults to 1.
+
+    Returns:
+        dict: 单次调用耗时的最小值、中位数、平均值(纳秒)
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    if warmup:
+        timer.repeat(repeat=warmup, number=number)
+    times = [t / number * 1e9 for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "min_ns": round(min(times)),
+        "median_ns": round(statistics.median(times)),
+        "mean_ns": round(statistics.mean(times)),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def run(pattern: str = None, frames: list[cv2.Mat] = None, repeat: int = DEFAULT_REPEAT,
+        callback: Callable[[str, dict], None] = None) -> dict:
+    """
+    run 运行基准测试
+
+    Args:
+        pattern (str, optional): 只运行名称匹配该正则的测试. Defaults to None.
+        frames (list[cv2.Mat], optional): 录制的真实帧，为None时使用合成帧. Defaults to None.
+        repeat (int, optional): 重复轮数. Defaults to 9.
+        callback (Callable[[str, dict], None], optional): 每完成一项时回调. Defaults to None.
+
+    Returns:
+        dict: {"environment": 运行环境, "results": {名称: 耗时}}
+    """
+    # 导入时注册所有测试
+    from minifw.benchmark import cases
+    if frames is None:
+        frames = [cases.synthetic_frame()]
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if pattern is not None and not re.search(pattern, name):
+            continue
+        prepared = setup(frames)
+        func, teardown = prepared if isinstance(prepared, tuple) else (prepared, None)
+        try:
+            results[name] = measure(func, repeat)
+        finally:
+            if teardown is not None:
+                teardown()
+        if callback is not None:
+            callback(name, results[name])
+    return {"environment": environment(), "results": results}
+
+
+def compare(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[tuple[str, float]]:
+    """
+    compare 与基线比较
+
+    比较最小值，最小值受系统调度等干扰最小；允许的变慢比例再加上基线与本次结果中较大的波动(中位数/最小值-1)，
+    波动大的测试需要更明显的变慢才会报告
+
+    Args:
+        results (dict): run的返回值
+        baseline (dict): 基线，格式同run的返回值
+        tolerance (float, optional): 允许的变慢比例. Defaults to 0.25.
+
+    Returns:
+        list[tuple[str, float]]: 变慢超过tolerance的测试及其耗时比例(当前/基线)
+    """
+    regressions = []
+    for name, result in results["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = result["min_ns"] / base["min_ns"]
+        noise = max(base["median_ns"] / base["min_ns"], result["median_ns"] / result["min_ns"]) - 1
+        if ratio > 1 + tolerance + noise:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def load(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save(results: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+        f.write("\n")
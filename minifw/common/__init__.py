@@ -1,9 +1,14 @@
 import os
 
-from .common import is_point_in_rect, is_rect_in_rect
+from .adbshell import ADBShell
+from .common import is_point_in_rect, is_rect_in_rect, probe_socket, scale_rect, wait_until
+from .config import MUMU_API_DLL_PATH
 from .dataclass import Point, RGB, Rect, LAB, HSV, ImageSize
+from .deploy import deploy
+from .metrics import METRICS, MetricsRegistry
 from .mumuapi import MuMuApi
+from .mumuhost import MuMuHost
+from .session import DeviceSession
 
 WORK_DIR = os.path.dirname(__file__)
 TURBO_JPEG_DLL_PATH = f"{WORK_DIR}/bin/turbojpeg.dll"
-MUMU_API_DLL_PATH = "/shell/sdk/external_renderer_ipc.dll"
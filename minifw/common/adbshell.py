@@ -0,0 +1,109 @@
+import select
+import socket
+import threading
+import uuid
+
+from adbutils import AdbDevice
+from loguru import logger
+
+from minifw.common.metrics import METRICS
+
+DEFAULT_SHELL_TIMEOUT = 10
+DEFAULT_SHELL_CHARSET = "utf-8"
+
+
+class ADBShell:
+    def __init__(self, device: AdbDevice, timeout: float = DEFAULT_SHELL_TIMEOUT) -> None:
+        """
+        __init__ 常驻adb shell会话
+
+        保持一个交互式shell流，命令直接写入该流，避免每次调用都新建adb传输通道
+
+        Args:
+            device (AdbDevice): adb设备
+            timeout (float, optional): 单条命令等待结果的超时时间(秒). Defaults to 10.
+        """
+        self.__adb = device
+        self.__timeout = timeout
+        self.__lock = threading.Lock()
+        self.__stream = None
+        self.__conn = None
+        # 每个会话使用独立的结束标记，防止和命令输出冲突
+        self.__marker = f"__MINIFW_{uuid.uuid4().hex}__"
+
+    def __open(self):
+        # 保存stream对象，防止被回收导致socket关闭
+        self.__stream = self.__adb.shell(["sh"], stream=True)
+        self.__conn = self.__stream.conn
+        logger.debug(f"adb shell session opened: {self.__adb.serial}")
+
+    def execute(self, command: str, duration: float = 0) -> str:
+        """
+        execute 在常驻shell中执行命令并等待其完成
+
+        只有在打开会话或写入命令失败时才重连重试，命令写入后读取结果超时或断开不会重发，
+        避免点击、滑动等操作被重复执行
+
+        Args:
+            command (str): shell命令
+            duration (float, optional): 命令本身预计的耗时(秒)，如长按、滑动，读取超时在此基础上延长. Defaults to 0.
+
+        Returns:
+            str: 命令输出
+        """
+        with self.__lock, METRICS.timer("adb_shell", device=self.__adb.serial):
+            try:
+                self.__send(command)
+            except (OSError, ConnectionError):
+                # 命令未写入设备，重连后重试一次
+                logger.warning("adb shell session lost, reconnecting...")
+                self.__close()
+                self.__send(command)
+            try:
+                return self.__receive(self.__timeout + duration)
+            except (OSError, ConnectionError):
+                # 命令可能已经执行，关闭会话丢弃残留输出，不重发
+                self.__close()
+                raise
+
+    def __alive(self) -> bool:
+        """会话是否仍然可用，设备端已关闭的连接可读且读到EOF"""
+        readable, _, _ = select.select([self.__conn], [], [], 0)
+        return not readable or self.__conn.recv(1, socket.MSG_PEEK) != b""
+
+    def __send(self, command: str):
+        if self.__conn is not None and not self.__alive():
+            self.__close()
+        if self.__conn is None:
+            self.__open()
+        content = f"{command}; echo {self.__marker}\n"
+        self.__conn.settimeout(self.__timeout)
+        self.__conn.sendall(content.encode(DEFAULT_SHELL_CHARSET))
+
+    def __receive(self, timeout: float) -> str:
+        self.__conn.settimeout(timeout)
+        marker = f"{self.__marker}\n".encode(DEFAULT_SHELL_CHARSET)
+        output = bytearray()
+        while marker not in output:
+            chunk = self.__conn.recv(4096)
+            if not chunk:
+                raise ConnectionError("adb shell session closed")
+            output.extend(chunk)
+        return output[:output.index(marker)].decode(DEFAULT_SHELL_CHARSET, errors="ignore")
+
+    def __close(self):
+        if self.__stream is not None:
+            try:
+                self.__stream.close()
+            except OSError:
+                pass
+        self.__stream = None
+        self.__conn = None
+
+    def close(self):
+        """关闭shell会话"""
+        with self.__lock:
+            self.__close()
+
+    def __del__(self):
+        self.__close()
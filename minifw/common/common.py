@@ -1,4 +1,12 @@
-from minifw.common.dataclass import Rect,Point
+import math
+import socket
+import time
+from typing import Callable, TypeVar
+
+from minifw.common.config import READY_BACKOFF_FACTOR, READY_POLL_INTERVAL, READY_POLL_MAX_INTERVAL
+from minifw.common.dataclass import ImageSize, Rect, Point
+
+T = TypeVar("T")
 
 
 def is_point_in_rect(pt: Point, rect: Rect) -> bool:
@@ -21,7 +29,73 @@ def is_rect_in_rect(rect1: Rect, rect2: Rect) -> bool:
     :return: bool
     """
     x_min, y_min, x_max, y_max = rect1.x, rect1.y, rect1.x + rect1.w, rect1.y + rect1.h
-    return True if is_point_in_rect(Point(x_min, y_min), rect2) and is_point_in_rect(Point(x_max, y_max), rect2) else False
+    # 右下角为开区间，最后一个像素是(x_max - 1, y_max - 1)
+    return True if is_point_in_rect(Point(x_min, y_min), rect2) and is_point_in_rect(Point(x_max - 1, y_max - 1),
+                                                                                       rect2) else False
+
+
+def scale_rect(rect: Rect | None, factor: float, bounds: ImageSize = None) -> Rect | None:
+    """
+    按比例缩放矩形，用于在设备坐标和缩小后的截图坐标之间转换
+    :param rect: Rect(x,y,w,h)，为None时返回None
+    :param factor: 缩放比例
+    :param bounds: 缩放后的图像尺寸，右下角不超过该尺寸
+    :return: Rect
+    """
+    if rect is None or (factor == 1 and bounds is None):
+        return rect
+    x0, y0 = int(rect.x * factor), int(rect.y * factor)
+    # 右下角向外取整，保证缩放后仍然包含原区域
+    x1, y1 = math.ceil((rect.x + rect.w) * factor), math.ceil((rect.y + rect.h) * factor)
+    if bounds is not None:
+        # 截图尺寸按int向下取整，贴边的区域向外取整后会超出截图
+        x1, y1 = min(x1, bounds.width), min(y1, bounds.height)
+    return Rect(x0, y0, x1 - x0, y1 - y0)
+
+
+def wait_until(predicate: Callable[[], T], timeout: float, interval: float = READY_POLL_INTERVAL,
+               max_interval: float = READY_POLL_MAX_INTERVAL) -> T:
+    """
+    按指数退避轮询predicate，直到返回真值或超时
+
+    :param predicate: 无参函数，返回真值表示就绪
+    :param timeout: 超时时间(秒)
+    :param interval: 首次轮询间隔(秒)
+    :param max_interval: 最大轮询间隔(秒)
+    :return: predicate最后一次的返回值，超时时为假值
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        result = predicate()
+        remaining = deadline - time.monotonic()
+        if result or remaining <= 0:
+            return result
+        time.sleep(min(interval, remaining))
+        interval = min(interval * READY_BACKOFF_FACTOR, max_interval)
+
+
+def probe_socket(host: str, port: int, size: int, timeout: float = 1) -> bytes | None:
+    """
+    连接端口并读取size字节，用于判断adb转发的服务是否已启动
+
+    服务未启动时adb会接受连接后立即关闭，此时返回None
+    :param host: 地址
+    :param port: 端口
+    :param size: 读取的字节数
+    :param timeout: 连接和读取的超时时间(秒)
+    :return: 读取到的数据，未就绪时为None
+    """
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as sock:
+            data = b""
+            while len(data) < size:
+                chunk = sock.recv(size - len(data))
+                if not chunk:
+                    return None
+                data += chunk
+            return data
+    except OSError:
+        return None
 
 if __name__ == '__main__':
     print(is_point_in_rect(Point(1, 10), Rect(0, 0, 10, 10))) # True
@@ -1 +1,12 @@
-MUMU_INSTALL_PATH = r"C:\Program Files\Netease\MuMu Player 12"
\ No newline at end of file
+MUMU_INSTALL_PATH = r"C:\Program Files\Netease\MuMu Player 12"
+MUMU_API_DLL_PATH = "/shell/sdk/external_renderer_ipc.dll"
+# MuMuHost批量截图的线程数
+MUMU_CAPTURE_WORKERS = 16
+
+# 服务就绪探测：首次间隔、最大间隔(秒)和退避倍数
+READY_POLL_INTERVAL = 0.05
+READY_POLL_MAX_INTERVAL = 0.5
+READY_BACKOFF_FACTOR = 2
+
+# 后台检查屏幕方向和尺寸的间隔(秒)
+DISPLAY_WATCH_INTERVAL = 2
@@ -0,0 +1,76 @@
+import hashlib
+import os
+import shlex
+import threading
+
+from adbutils import AdbDevice
+from loguru import logger
+
+# 本地文件md5缓存: 路径 -> (mtime, size, md5)
+_local_md5_cache: dict[str, tuple[float, int, str]] = {}
+_local_md5_lock = threading.Lock()
+
+
+def local_md5(path: str) -> str:
+    """计算本地文件md5，文件未修改时使用缓存"""
+    stat = os.stat(path)
+    with _local_md5_lock:
+        cached = _local_md5_cache.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime, stat.st_size):
+            return cached[2]
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            md5.update(chunk)
+    digest = md5.hexdigest()
+    with _local_md5_lock:
+        _local_md5_cache[path] = (stat.st_mtime, stat.st_size, digest)
+    return digest
+
+
+def remote_md5(device: AdbDevice, paths: list[str]) -> dict[str, str]:
+    """
+    remote_md5 一次shell调用获取设备上多个文件的md5
+
+    Args:
+        device (AdbDevice): adb设备
+        paths (list[str]): 设备上的文件路径
+
+    Returns:
+        dict[str, str]: 路径 -> md5，不存在的文件或设备不支持md5sum时不包含在结果中
+    """
+    output = device.shell(f"md5sum {' '.join(map(shlex.quote, paths))} 2>/dev/null")
+    result = {}
+    for line in output.splitlines():
+        parts = line.split(maxsplit=1)
+        if len(parts) == 2 and len(parts[0]) == 32:
+            result[parts[1].strip()] = parts[0].lower()
+    return result
+
+
+def deploy(device: AdbDevice, files: list[tuple[str, str]], executable: bool = True) -> list[str]:
+    """
+    deploy 部署文件到设备，只推送设备上缺失或md5不一致的文件
+
+    Args:
+        device (AdbDevice): adb设备
+        files (list[tuple[str, str]]): (本地路径, 设备路径) 列表
+        executable (bool, optional): 是否添加可执行权限，md5一致未推送的文件也会设置(权限可能被改过)，
+            多个文件合并为一次chmod. Defaults to True.
+
+    Returns:
+        list[str]: 实际推送的设备路径
+    """
+    remote = remote_md5(device, [remote_path for _, remote_path in files])
+    pushed = []
+    for local_path, remote_path in files:
+        if remote.get(remote_path) == local_md5(local_path):
+            continue
+        logger.debug(f"push {local_path} -> {remote_path}")
+        device.sync.push(local_path, remote_path)
+        pushed.append(remote_path)
+    if executable:
+        device.shell(f"chmod 755 {' '.join(shlex.quote(remote_path) for _, remote_path in files)}")
+    if not pushed:
+        logger.debug(f"{device.serial}: {len(files)} file(s) up to date")
+    return pushed
@@ -0,0 +1,183 @@
+import bisect
+import json
+import threading
+import time
+
+# 直方图桶上界(纳秒)，0.1ms ~ 10s
+DEFAULT_BUCKETS_NS = [int(ms * 1_000_000) for ms in
+                      (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)]
+
+
+class Counter:
+    def __init__(self) -> None:
+        self.value = 0
+        self.__lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self.__lock:
+            self.value += amount
+
+
+class Histogram:
+    def __init__(self, buckets: list[int] = None) -> None:
+        self.buckets = buckets or DEFAULT_BUCKETS_NS
+        # 最后一个桶为+Inf
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0
+        self.__lock = threading.Lock()
+
+    def observe(self, value_ns: int):
+        index = bisect.bisect_left(self.buckets, value_ns)
+        with self.__lock:
+            self.bucket_counts[index] += 1
+            self.count += 1
+            self.sum += value_ns
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram) -> None:
+        self.histogram = histogram
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *args):
+        self.histogram.observe(time.perf_counter_ns() - self.start)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = False) -> None:
+        """
+        __init__ 进程内指标注册表
+
+        未启用时timer/inc直接返回，几乎没有开销。指标以 (名称, 标签) 区分，可导出为JSON或Prometheus文本格式
+
+        Args:
+            enabled (bool, optional): 是否启用. Defaults to False.
+        """
+        self.enabled = enabled
+        self.__histograms: dict[tuple[str, tuple], Histogram] = {}
+        self.__counters: dict[tuple[str, tuple], Counter] = {}
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def __key(name: str, labels: dict) -> tuple[str, tuple]:
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        key = self.__key(name, labels)
+        histogram = self.__histograms.get(key)
+        if histogram is None:
+            with self.__lock:
+                histogram = self.__histograms.setdefault(key, Histogram())
+        return histogram
+
+    def counter(self, name: str, **labels) -> Counter:
+        key = self.__key(name, labels)
+        counter = self.__counters.get(key)
+        if counter is None:
+            with self.__lock:
+                counter = self.__counters.setdefault(key, Counter())
+        return counter
+
+    def timer(self, name: str, **labels):
+        """
+        timer 统计代码块耗时
+
+            with METRICS.timer("screencap", device="emulator-5554"):
+                ...
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        return _Timer(self.histogram(name, **labels))
+
+    def observe(self, name: str, value_ns: int, **labels):
+        if self.enabled:
+            self.histogram(name, **labels).observe(value_ns)
+
+    def inc(self, name: str, amount: int = 1, **labels):
+        if self.enabled:
+            self.counter(name, **labels).inc(amount)
+
+    def reset(self):
+        with self.__lock:
+            self.__histograms.clear()
+            self.__counters.clear()
+
+    def to_dict(self) -> dict:
+        return {
+            "histograms": [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    "sum_ns": histogram.sum,
+                    "buckets_ns": dict(zip([*map(str, histogram.buckets), "+Inf"], histogram.bucket_counts)),
+                }
+                for (name, labels), histogram in list(self.__histograms.items())
+            ],
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": counter.value}
+                for (name, labels), counter in list(self.__counters.items())
+            ],
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, **kwargs)
+
+    def to_prometheus(self, prefix: str = "minifw") -> str:
+        """导出为Prometheus文本格式，耗时单位为秒"""
+
+        def format_labels(labels, extra=()):
+            items = [*labels, *extra]
+            if not items:
+                return ""
+            escaped = [(key, value.replace("\\", "\\\\").replace('"', '\\"')) for key, value in items]
+            return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+        lines = []
+        histograms: dict[str, list] = {}
+        for (name, labels), histogram in list(self.__histograms.items()):
+            histograms.setdefault(name, []).append((labels, histogram))
+        for name, entries in histograms.items():
+            metric = f"{prefix}_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, histogram in entries:
+                cumulative = 0
+                for bound, count in zip([*histogram.buckets, None], histogram.bucket_counts):
+                    cumulative += count
+                    le = "+Inf" if bound is None else repr(bound / 1e9)
+                    lines.append(f"{metric}_bucket{format_labels(labels, [('le', le)])} {cumulative}")
+                lines.append(f"{metric}_sum{format_labels(labels)} {histogram.sum / 1e9}")
+                lines.append(f"{metric}_count{format_labels(labels)} {histogram.count}")
+        counters: dict[str, list] = {}
+        for (name, labels), counter in list(self.__counters.items()):
+            counters.setdefault(name, []).append((labels, counter))
+        for name, entries in counters.items():
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for labels, counter in entries:
+                lines.append(f"{metric}{format_labels(labels)} {counter.value}")
+        return "\n".join(lines) + "\n"
+
+
+# 全局默认注册表，默认关闭，使用 METRICS.enabled = True 开启
+METRICS = MetricsRegistry()
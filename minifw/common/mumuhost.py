@@ -0,0 +1,179 @@
+import ctypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from minifw.common.config import MUMU_API_DLL_PATH, MUMU_CAPTURE_WORKERS, MUMU_INSTALL_PATH
+from minifw.common.metrics import METRICS
+from minifw.common.mumuapi import MuMuApi
+
+
+class _Display:
+    """单个实例显示器的截图缓冲区"""
+
+    def __init__(self) -> None:
+        self.width = ctypes.c_int(0)
+        self.height = ctypes.c_int(0)
+        self.pixels: np.ndarray | None = None
+        self.lock = threading.Lock()
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.width.value, self.height.value
+
+
+class MuMuHost:
+    __hosts: dict[str, "MuMuHost"] = {}
+    __hosts_lock = threading.Lock()
+
+    def __init__(self, emulator_install_path: str = MUMU_INSTALL_PATH, dll_path: str = None,
+                 max_workers: int = MUMU_CAPTURE_WORKERS) -> None:
+        """
+        __init__ MuMu模拟器宿主
+
+        同一个模拟器安装只加载一次external_renderer_ipc.dll，每个实例只连接一次，
+        截图、触摸、键盘共享同一个句柄。请使用 MuMuHost.get(emulator_install_path) 获取共享实例
+
+        Args:
+            emulator_install_path (str, optional): 模拟器安装路径. Defaults to MUMU_INSTALL_PATH.
+            dll_path (str, optional): dll文件存放路径，一般会根据模拟器路径获取. Defaults to None.
+            max_workers (int, optional): 批量截图的线程数. Defaults to 16.
+        """
+        self.emulator_install_path = emulator_install_path
+        self.dll_path = emulator_install_path + MUMU_API_DLL_PATH if dll_path is None else dll_path
+        self.nemu = MuMuApi(self.dll_path)
+        self.max_workers = max_workers
+        self.__handles: dict[int, int] = {}
+        # (实例编号, 显示器id) -> 截图缓冲区
+        self.__displays: dict[tuple[int, int], _Display] = {}
+        self.__lock = threading.Lock()
+        self.__executor: ThreadPoolExecutor | None = None
+
+    @classmethod
+    def get(cls, emulator_install_path: str = MUMU_INSTALL_PATH, dll_path: str = None) -> "MuMuHost":
+        """获取模拟器安装对应的共享宿主"""
+        key = emulator_install_path if dll_path is None else dll_path
+        with cls.__hosts_lock:
+            host = cls.__hosts.get(key)
+            if host is None:
+                host = cls.__hosts[key] = cls(emulator_install_path, dll_path)
+            return host
+
+    def handle(self, instance_index: int) -> int:
+        """获取实例的连接句柄，首次调用时连接"""
+        with self.__lock:
+            handle = self.__handles.get(instance_index)
+            if handle is None:
+                handle = self.nemu.connect(self.emulator_install_path, instance_index)
+                if handle == 0:
+                    raise ConnectionError(f"无法连接MuMu模拟器实例 {instance_index}")
+                self.__handles[instance_index] = handle
+                logger.info(f"MuMu instance {instance_index} connected: {handle}")
+            return handle
+
+    @property
+    def instances(self) -> list[int]:
+        """已连接的实例编号"""
+        with self.__lock:
+            return sorted(self.__handles)
+
+    def __display(self, instance_index: int, display_id: int) -> _Display:
+        with self.__lock:
+            display = self.__displays.get((instance_index, display_id))
+            if display is None:
+                display = self.__displays[(instance_index, display_id)] = _Display()
+            return display
+
+    def __update_display_size(self, handle: int, display_id: int, display: _Display):
+        result = self.nemu.capture_display(handle, display_id, 0, ctypes.byref(display.width),
+                                           ctypes.byref(display.height), None)
+        if result != 0:
+            raise BufferError("获取模拟器分辨率失败")
+        width, height = display.size
+        display.pixels = np.empty((height, width, 4), dtype=np.uint8)
+
+    def display_size(self, instance_index: int, display_id: int = 0) -> tuple[int, int]:
+        """
+        display_size 获取显示器分辨率
+
+        Returns:
+            tuple[int, int]: (宽, 高)
+        """
+        display = self.__display(instance_index, display_id)
+        with display.lock:
+            if display.pixels is None:
+                self.__update_display_size(self.handle(instance_index), display_id, display)
+            return display.size
+
+    def capture(self, instance_index: int, display_id: int = 0) -> cv2.Mat:
+        """
+        capture 截图，像素写入预先分配的缓冲区，返回翻转并转换为BGR的新图像
+
+        Args:
+            instance_index (int): 模拟器实例的编号
+            display_id (int, optional): 显示窗口id. Defaults to 0.
+        """
+        handle = self.handle(instance_index)
+        display = self.__display(instance_index, display_id)
+        with display.lock:
+            if display.pixels is None:
+                self.__update_display_size(handle, display_id, display)
+            for attempt in range(2):
+                pixels = display.pixels
+                result = self.nemu.capture_display(handle, display_id, pixels.nbytes, display.width,
+                                                   display.height,
+                                                   pixels.ctypes.data_as(ctypes.POINTER(ctypes.c_ubyte)))
+                if result <= 1:
+                    break
+                if attempt:
+                    raise BufferError("截图错误")
+                # 分辨率变化后缓冲区大小不符，重新获取分辨率
+                self.__update_display_size(handle, display_id, display)
+            with METRICS.timer("decode", backend="MuMuScreenCap"):
+                # 模拟器输出的RGBA图像上下颠倒
+                return cv2.flip(cv2.cvtColor(pixels, cv2.COLOR_RGBA2BGR), 0)
+
+    def capture_all(self, instance_indexes: list[int] = None, display_id: int = 0) -> dict[int, cv2.Mat]:
+        """
+        capture_all 多线程并行截取多个实例，dll调用期间释放GIL
+
+        Args:
+            instance_indexes (list[int], optional): 实例编号列表，为None时为所有已连接的实例. Defaults to None.
+            display_id (int, optional): 显示窗口id. Defaults to 0.
+
+        Returns:
+            dict[int, cv2.Mat]: 实例编号 -> 图像，截图失败的实例不包含在结果中
+        """
+        instance_indexes = self.instances if instance_indexes is None else instance_indexes
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="mumu")
+            executor = self.__executor
+        futures = {index: executor.submit(self.capture, index, display_id) for index in instance_indexes}
+        images = {}
+        for index, future in futures.items():
+            try:
+                images[index] = future.result()
+            except Exception as e:
+                logger.warning(f"MuMu instance {index} capture failed: {e}")
+        return images
+
+    def disconnect(self, instance_index: int):
+        with self.__lock:
+            handle = self.__handles.pop(instance_index, None)
+            for key in [key for key in self.__displays if key[0] == instance_index]:
+                del self.__displays[key]
+        if handle is not None:
+            self.nemu.disconnect(handle)
+
+    def close(self):
+        """断开所有实例"""
+        for instance_index in self.instances:
+            self.disconnect(instance_index)
+        with self.__lock:
+            executor, self.__executor = self.__executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
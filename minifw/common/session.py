@@ -0,0 +1,183 @@
+import re
+import threading
+import weakref
+from typing import Callable
+
+from adbutils import AdbDevice, WindowSize, adb
+from loguru import logger
+
+from minifw.common.adbshell import ADBShell
+from minifw.common.config import DISPLAY_WATCH_INTERVAL
+from minifw.common.exception import ADBDeviceUnFound
+
+
+class DeviceSession:
+    __sessions: dict[str, "DeviceSession"] = {}
+    __sessions_lock = threading.Lock()
+
+    def __init__(self, serial: str) -> None:
+        """
+        __init__ 设备会话
+
+        缓存设备属性、屏幕尺寸和方向，同一设备的所有后端共享，避免重复的adb调用。
+        请使用 DeviceSession.get(serial) 获取共享实例
+
+        Args:
+            serial (str): 设备id
+        """
+        self.serial = serial
+        self.device: AdbDevice = adb.device(serial)
+        self.__props: dict[str, str] | None = None
+        self.__window_size: WindowSize | None = None
+        self.__rotation: int | None = None
+        self.__wm_size: str | None = None
+        self.__shell: ADBShell | None = None
+        self.__listeners: list[weakref.WeakMethod | Callable] = []
+        self.__lock = threading.RLock()
+        self.__watch_stop = threading.Event()
+        self.__watch_thread: threading.Thread | None = None
+
+    @classmethod
+    def get(cls, serial: str) -> "DeviceSession":
+        """获取设备的共享会话，首次获取时检查设备是否存在"""
+        with cls.__sessions_lock:
+            session = cls.__sessions.get(serial)
+            if session is None:
+                if serial not in [device.serial for device in adb.device_list()]:
+                    raise ADBDeviceUnFound("设备不存在，请检查是否链接设备成功")
+                session = cls.__sessions[serial] = cls(serial)
+            return session
+
+    @classmethod
+    def forget(cls, serial: str):
+        """移除设备的共享会话，设备重连或更换后调用"""
+        with cls.__sessions_lock:
+            session = cls.__sessions.pop(serial, None)
+        if session is not None:
+            session.close()
+
+    def getprop(self, name: str) -> str:
+        """读取系统属性，首次调用时一次性读取全部属性"""
+        with self.__lock:
+            if self.__props is None:
+                self.__props = dict(re.findall(r"^\[(.+?)\]: \[(.*?)\]$", self.device.shell("getprop"), re.M))
+            if name not in self.__props:
+                self.__props[name] = self.device.getprop(name)
+            return self.__props[name]
+
+    @property
+    def abi(self) -> str:
+        return self.getprop("ro.product.cpu.abi")
+
+    @property
+    def sdk(self) -> str:
+        return self.getprop("ro.build.version.sdk")
+
+    @property
+    def window_size(self) -> WindowSize:
+        with self.__lock:
+            if self.__window_size is None:
+                self.__window_size = self.device.window_size()
+            return self.__window_size
+
+    @property
+    def width(self) -> int:
+        return self.window_size.width
+
+    @property
+    def height(self) -> int:
+        return self.window_size.height
+
+    @property
+    def rotation(self) -> int:
+        with self.__lock:
+            if self.__rotation is None:
+                self.__rotation = self.device.rotation()
+            return self.__rotation
+
+    @property
+    def wm_size(self) -> str:
+        """`wm size` 输出的分辨率，如 1080x1920"""
+        with self.__lock:
+            if self.__wm_size is None:
+                self.__wm_size = self.device.shell("wm size").split(" ")[-1]
+            return self.__wm_size
+
+    @property
+    def shell(self) -> ADBShell:
+        """共享的常驻shell会话"""
+        with self.__lock:
+            if self.__shell is None:
+                self.__shell = ADBShell(self.device)
+            return self.__shell
+
+    def add_listener(self, callback: Callable[["DeviceSession"], None]):
+        """
+        add_listener 注册屏幕方向或尺寸变化回调
+
+        绑定方法以弱引用保存，不会阻止后端对象被回收
+        """
+        with self.__lock:
+            self.__listeners.append(weakref.WeakMethod(callback) if hasattr(callback, "__self__") else callback)
+
+    def refresh(self) -> bool:
+        """
+        refresh 重新获取屏幕方向和尺寸，与之前读取的值相比发生变化时通知监听者
+
+        Returns:
+            bool: 是否发生变化
+        """
+        rotation = self.device.rotation()
+        window_size = self.device.window_size()
+        with self.__lock:
+            # 尚未读取过的值没有可比较的旧值，只记录不算变化，首次调用不会误通知监听者
+            changed = (self.__rotation is not None and rotation != self.__rotation) or \
+                      (self.__window_size is not None and window_size != self.__window_size)
+            self.__rotation, self.__window_size = rotation, window_size
+            if not changed:
+                return False
+            self.__wm_size = None
+            callbacks = []
+            for listener in self.__listeners:
+                callback = listener() if isinstance(listener, weakref.WeakMethod) else listener
+                if callback is not None:
+                    callbacks.append(callback)
+            # 清理已回收的监听者
+            self.__listeners = [listener for listener in self.__listeners
+                                if not isinstance(listener, weakref.WeakMethod) or listener() is not None]
+        logger.info(f"{self.serial} display changed: rotation {rotation}, size {window_size}")
+        for callback in callbacks:
+            callback(self)
+        return True
+
+    def start_watch(self, interval: float = DISPLAY_WATCH_INTERVAL):
+        """
+        start_watch 后台定时检查屏幕方向和尺寸，变化时通知监听者
+
+        默认不启动，需要自动适配屏幕旋转时调用
+        """
+        if self.__watch_thread is not None and self.__watch_thread.is_alive():
+            return
+        self.__watch_stop.clear()
+        self.__watch_thread = threading.Thread(target=self.__watch, args=(interval,), daemon=True)
+        self.__watch_thread.start()
+
+    def stop_watch(self):
+        self.__watch_stop.set()
+        if self.__watch_thread is not None and self.__watch_thread is not threading.current_thread():
+            self.__watch_thread.join()
+        self.__watch_thread = None
+
+    def __watch(self, interval: float):
+        while not self.__watch_stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"{self.serial} display check failed: {e}")
+
+    def close(self):
+        self.stop_watch()
+        with self.__lock:
+            if self.__shell is not None:
+                self.__shell.close()
+                self.__shell = None
@@ -1,3 +1,5 @@
+from .change import ChangeDetector
+from .decode import FORMAT_JPEG, FORMAT_PNG, FORMAT_RAW, JpegDecoder, decode_image, get_turbojpeg
 from .image import (
     # 读写
     imread,
@@ -24,10 +26,13 @@ from .image import (
     get_pixel,
     get_width,
     get_similarity,
+    region_hash,
     # 附加
     find_all_points_color,
     find_color,
     find_multi_colors,
     match_template,
     match_template_best,
-)
\ No newline at end of file
+)
+from .perceptual import dhash, hamming_distance, phash
+from .similarity import ReferenceStack, best_similarity
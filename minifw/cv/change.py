@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+
+from minifw.common import Rect
+
+
+class ChangeDetector:
+    def __init__(self, tile_size: int = 64, threshold: int = 2) -> None:
+        """
+        __init__ 画面变化检测
+
+        将每一帧与上一帧逐像素、逐通道比较，按tile_size划分网格取最大差值，记录每个网格最后一次发生变化的帧号。
+        单个像素的变化以及亮度相同的颜色变化都会被检测到。判断某个区域自某一帧以来是否变化只需查表，不需要重新匹配
+
+        Args:
+            tile_size (int, optional): 网格大小(像素). Defaults to 64.
+            threshold (int, optional): 任一通道的像素差超过该值才认为变化，用于忽略编码噪声. Defaults to 2.
+        """
+        self.tile_size = tile_size
+        self.threshold = threshold
+        # 当前帧号，每次update加一
+        self.frame_index = 0
+        self.__previous: np.ndarray | None = None
+        # 每个网格最后一次变化时的帧号
+        self.__versions: np.ndarray | None = None
+
+    def __tile_max(self, diff: np.ndarray) -> np.ndarray:
+        """每个网格内所有像素、所有通道的最大差值"""
+        height, width = diff.shape[:2]
+        tile = self.tile_size
+        # 通道合并到行内，按tile*通道数分组即可同时取通道和网格内的最大值
+        step = tile * (diff.size // (height * width))
+        diff = diff.reshape(height, -1)
+        # 先沿行方向分组取最大值，数组按行连续，比一次在多个轴上求最大值快得多
+        full = height // tile * tile
+        row_max = diff[:full].reshape(-1, tile, diff.shape[1]).max(axis=1)
+        if full < height:
+            row_max = np.vstack([row_max, diff[full:].max(axis=0, keepdims=True)])
+        cols = -(-width // tile)
+        padded = np.zeros((row_max.shape[0], cols * step), dtype=diff.dtype)
+        padded[:, :diff.shape[1]] = row_max
+        return padded.reshape(-1, cols, step).max(axis=2)
+
+    def update(self, img: cv2.Mat) -> np.ndarray:
+        """
+        update 输入新的一帧
+
+        Args:
+            img (cv2.Mat): 图像
+
+        Returns:
+            np.ndarray: 每个网格相对上一帧是否变化的布尔数组
+        """
+        self.frame_index += 1
+        height, width = img.shape[:2]
+        rows, cols = -(-height // self.tile_size), -(-width // self.tile_size)
+        if self.__previous is None or self.__previous.shape != img.shape:
+            # 首帧或分辨率变化时认为全部变化
+            changed = np.ones((rows, cols), dtype=bool)
+            self.__versions = np.zeros((rows, cols), dtype=np.int64)
+        else:
+            changed = self.__tile_max(cv2.absdiff(img, self.__previous)) > self.threshold
+        self.__versions[changed] = self.frame_index
+        # 截图后端可能复用缓冲区，保存副本
+        self.__previous = img.copy()
+        return changed
+
+    def changed_since(self, frame_index: int, region: Rect = None) -> bool:
+        """
+        changed_since 区域自frame_index帧之后是否发生过变化
+
+        Args:
+            frame_index (int): 帧号
+            region (Rect, optional): 区域，为None时为整个画面. Defaults to None.
+        """
+        if self.__versions is None:
+            return True
+        versions = self.__versions
+        if region is not None:
+            x0, y0 = max(region.x, 0) // self.tile_size, max(region.y, 0) // self.tile_size
+            x1 = -(-(region.x + region.w) // self.tile_size)
+            y1 = -(-(region.y + region.h) // self.tile_size)
+            versions = versions[y0:y1, x0:x1]
+        return versions.size == 0 or bool(versions.max() > frame_index)
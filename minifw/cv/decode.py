@@ -0,0 +1,133 @@
+import platform
+import threading
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from minifw.common import TURBO_JPEG_DLL_PATH
+
+FORMAT_RAW = "raw"
+FORMAT_JPEG = "jpeg"
+FORMAT_PNG = "png"
+# 支持的缩小倍数，与TurboJPEG/OpenCV的缩放解码一致
+SCALE_FLAGS = {
+    1: (cv2.IMREAD_COLOR, cv2.IMREAD_GRAYSCALE),
+    2: (cv2.IMREAD_REDUCED_COLOR_2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+    4: (cv2.IMREAD_REDUCED_COLOR_4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    8: (cv2.IMREAD_REDUCED_COLOR_8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+}
+
+_turbojpeg = None
+_turbojpeg_loaded = False
+_turbojpeg_lock = threading.Lock()
+
+
+def get_turbojpeg():
+    """加载TurboJPEG，Windows使用自带的dll，不可用时返回None并回退到OpenCV"""
+    global _turbojpeg, _turbojpeg_loaded
+    if _turbojpeg_loaded:
+        return _turbojpeg
+    with _turbojpeg_lock:
+        if not _turbojpeg_loaded:
+            try:
+                from turbojpeg import TurboJPEG
+                _turbojpeg = TurboJPEG(TURBO_JPEG_DLL_PATH) if platform.system() == "Windows" else TurboJPEG()
+            except (ImportError, OSError, RuntimeError) as e:
+                logger.warning(f"TurboJPEG不可用，使用OpenCV解码: {e}")
+            _turbojpeg_loaded = True
+    return _turbojpeg
+
+
+def check_scale(scale: int):
+    if scale not in SCALE_FLAGS:
+        raise ValueError(f"scale must be one of {list(SCALE_FLAGS)}")
+
+
+def decode_raw(data: bytes, width: int, height: int, scale: int = 1, gray: bool = False) -> cv2.Mat:
+    """解码RGBA原始数据"""
+    arr = np.frombuffer(data[:width * height * 4], np.uint8).reshape((height, width, 4))
+    if scale != 1:
+        arr = cv2.resize(arr, (width // scale, height // scale), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(arr, cv2.COLOR_RGBA2GRAY if gray else cv2.COLOR_RGBA2BGR)
+
+
+def decode_jpeg(data: bytes, scale: int = 1, gray: bool = False) -> cv2.Mat:
+    """解码JPEG，优先使用TurboJPEG，缩放和灰度在解码阶段完成"""
+    turbojpeg = get_turbojpeg()
+    if turbojpeg is not None:
+        from turbojpeg import TJPF_BGR, TJPF_GRAY
+        image = turbojpeg.decode(data, pixel_format=TJPF_GRAY if gray else TJPF_BGR, scaling_factor=(1, scale))
+        # TurboJPEG的灰度图为(h, w, 1)，与OpenCV保持一致
+        return image[:, :, 0] if gray else image
+    return cv2.imdecode(np.frombuffer(data, np.uint8), SCALE_FLAGS[scale][gray])
+
+
+class JpegDecoder:
+    def __init__(self, scale: int = 1, gray: bool = False, buffers: int = 0) -> None:
+        """
+        __init__ 连续帧JPEG解码器
+
+        TurboJPEG可用且buffers大于0时解码到循环使用的输出缓冲区，避免每帧分配内存。
+        返回的图像在之后buffers-1次解码内有效，需要长期持有时请自行复制
+
+        Args:
+            scale (int, optional): 缩小倍数1/2/4/8. Defaults to 1.
+            gray (bool, optional): 是否直接解码为灰度图. Defaults to False.
+            buffers (int, optional): 输出缓冲区个数，为0时每帧分配新内存. Defaults to 0.
+        """
+        check_scale(scale)
+        self.scale = scale
+        self.gray = gray
+        self.__buffers: list[np.ndarray | None] = [None] * buffers
+        self.__index = 0
+
+    def decode(self, data: bytes) -> cv2.Mat:
+        turbojpeg = get_turbojpeg()
+        if turbojpeg is None or not self.__buffers:
+            return decode_jpeg(data, self.scale, self.gray)
+        from turbojpeg import TJPF_BGR, TJPF_GRAY
+        pixel_format = TJPF_GRAY if self.gray else TJPF_BGR
+        index = self.__index
+        self.__index = (index + 1) % len(self.__buffers)
+        image = None
+        if self.__buffers[index] is not None:
+            try:
+                image = turbojpeg.decode(data, pixel_format=pixel_format, scaling_factor=(1, self.scale),
+                                         dst=self.__buffers[index])
+            except ValueError:
+                # 分辨率变化(如屏幕旋转)后缓冲区尺寸不符，重新分配
+                pass
+        if image is None:
+            image = self.__buffers[index] = turbojpeg.decode(data, pixel_format=pixel_format,
+                                                             scaling_factor=(1, self.scale))
+        return image[:, :, 0] if self.gray else image
+
+
+def decode_png(data: bytes, scale: int = 1, gray: bool = False) -> cv2.Mat:
+    return cv2.imdecode(np.frombuffer(data, np.uint8), SCALE_FLAGS[scale][gray])
+
+
+def decode_image(data: bytes, image_format: str, width: int = None, height: int = None, scale: int = 1,
+                 gray: bool = False) -> cv2.Mat:
+    """
+    decode_image 按格式解码截图数据
+
+    Args:
+        data (bytes): 截图数据
+        image_format (str): raw/jpeg/png
+        width (int, optional): raw格式的宽度. Defaults to None.
+        height (int, optional): raw格式的高度. Defaults to None.
+        scale (int, optional): 缩小倍数1/2/4/8. Defaults to 1.
+        gray (bool, optional): 是否直接解码为灰度图. Defaults to False.
+
+    Returns:
+        cv2.Mat: BGR或灰度图像
+    """
+    if image_format == FORMAT_RAW:
+        return decode_raw(data, width, height, scale, gray)
+    elif image_format == FORMAT_JPEG:
+        return decode_jpeg(data, scale, gray)
+    elif image_format == FORMAT_PNG:
+        return decode_png(data, scale, gray)
+    raise ValueError(f"Unsupported image format: {image_format}")
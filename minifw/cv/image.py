@@ -1,12 +1,14 @@
 import math
+import zlib
 from typing import Sequence
 
 import cv2
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
-from minifw.common import Point, RGB, Rect, ImageSize, is_rect_in_rect, is_point_in_rect
+from minifw.common import Point, RGB, Rect, ImageSize, is_rect_in_rect, is_point_in_rect, METRICS
 from minifw.cv.color import Color
+from minifw.cv.similarity import SIMILARITY_ALGORITHMS, prepare, psnr, ssim
 
 RED = RGB(b=0, g=0, r=255)
 DEFAULT_LINE_TYPE = cv2.LINE_AA  # 默认线的类型为抗锯齿
@@ -204,7 +206,9 @@ def find_color_inner(img: cv2.Mat, color: int | str | RGB, region: Rect = None,
     x, y, w, h = (region.x, region.y, region.w, region.h) if region else [0, 0, img.shape[1], img.shape[0]]
     img = clip(img, x, y, w, h)
     mask = cv2.inRange(img, lowerBound, upperBound)
-    return cv2.findNonZero(mask)
+    result = cv2.findNonZero(mask)
+    # 不同版本的opencv返回 (N,1,2) 或 (N,2)，统一为 (N,2)
+    return None if result is None else result.reshape(-1, 2)
 
 
 def find_color(img: cv2.Mat, color: int | str | RGB, region: Rect = None, color_threshold: int = 4) -> Point | None:
@@ -212,8 +216,7 @@ def find_color(img: cv2.Mat, color: int | str | RGB, region: Rect = None, color_
     result = find_color_inner(img, color, region, color_threshold)
     if result is None:
         return None
-    point = [e for e in result[0][0]]
-    return Point(point[0] + x, point[1] + y)
+    return Point(int(result[0][0]) + x, int(result[0][1]) + y)
 
 
 def find_all_points_color(img: cv2.Mat, color: int | str | RGB, region: Rect = None, color_threshold: int = 4) -> list[
@@ -222,8 +225,7 @@ def find_all_points_color(img: cv2.Mat, color: int | str | RGB, region: Rect = N
     result = find_color_inner(img, color, region, color_threshold)
     if result is None:
         return None
-    points = [(p[0][0], p[0][1]) for p in result]
-    return [Point(point[0] + x, point[1] + y) for point in points]
+    return [Point(int(px) + x, int(py) + y) for px, py in result]
 
 
 def find_multi_colors(img: cv2.Mat, firstColor: int | str | RGB, colors: list[tuple[int, int, int | str | RGB]],
@@ -253,63 +255,56 @@ def bytes2mat(image_data: bytes) -> cv2.Mat:
     return cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_UNCHANGED)
 
 
-def get_similarity(img1, img2, algorithm_type="SSIM"):
+def get_similarity(img1, img2, algorithm_type="SSIM", region: Rect = None, scale: int = 1):
+    """
+    计算两张图像的相似度
+
+    使用float32计算，可以只比较部分区域或先缩小以加快速度；与多张图像比较时使用ReferenceStack
+
+    :param img1: 图像1
+    :param img2: 图像2
+    :param algorithm_type: SSIM(平均结构相似性)或PSNR(峰值信噪比)
+    :param region: 只比较该区域，为None时为整张图像
+    :param scale: 比较前缩小的倍数
+    :return: 相似度，PSNR在两张图像完全相同时为inf
+    """
     # 检查图片是否是相同大小和形状
     if img1.shape != img2.shape:
         raise ValueError("Images must be of the same size and shape")
-
-    if algorithm_type == 'SSIM':
-        # 计算 SSIM (平均结构相似性)
-        def compute_ssim(img1, img2):
-            C1 = 6.5025
-            C2 = 58.5225
-
-            img1 = img1.astype(np.float64)
-            img2 = img2.astype(np.float64)
-
-            mu1 = cv2.GaussianBlur(img1, (11, 11), 1.5)
-            mu2 = cv2.GaussianBlur(img2, (11, 11), 1.5)
-
-            mu1_sq = mu1 * mu1
-            mu2_sq = mu2 * mu2
-            mu1_mu2 = mu1 * mu2
-
-            sigma1_sq = cv2.GaussianBlur(img1 * img1, (11, 11), 1.5) - mu1_sq
-            sigma2_sq = cv2.GaussianBlur(img2 * img2, (11, 11), 1.5) - mu2_sq
-            sigma12 = cv2.GaussianBlur(img1 * img2, (11, 11), 1.5) - mu1_mu2
-
-            ssim_map = ((2 * mu1_mu2 + C1) * (2 * sigma12 + C2)) / (
-                    (mu1_sq + mu2_sq + C1) * (sigma1_sq + sigma2_sq + C2))
-            return ssim_map.mean()
-
-        if len(img1.shape) == 3:  # 如果图像是彩色的，则分别计算每个通道的SSIM
-            channels = cv2.split(img1)
-            ssim_vals = [compute_ssim(c1, c2) for c1, c2 in zip(cv2.split(img1), cv2.split(img2))]
-            similarity = np.mean(ssim_vals)
-        else:  # 如果图像是灰度的，直接计算
-            similarity = compute_ssim(img1, img2)
-        return similarity
-
-    elif algorithm_type == 'PSNR':
-        # 计算 PSNR (峰值信噪比)
-        mse = np.mean((img1 - img2) ** 2)
-        if mse == 0:  # 如果MSE为0，说明两张图完全一样
-            return float('inf')  # 无穷大，表示完全相同
-        max_pixel = 255.0
-        psnr = 20 * np.log10(max_pixel / np.sqrt(mse))
-        return psnr
-
-    else:
+    if algorithm_type not in SIMILARITY_ALGORITHMS:
         raise ValueError(f"Unsupported comparison type: {algorithm_type}")
+    if algorithm_type == 'SSIM':
+        return ssim(prepare(img1, region, scale), prepare(img2, region, scale))
+    # PSNR只需要平方误差和，cv2.norm直接处理uint8，不需要转换为float32
+    return psnr(prepare(img1, region, scale, dtype=None), prepare(img2, region, scale, dtype=None))
 
 
 def grayscale(img: cv2.Mat) -> cv2.Mat:
-    if img.shape[2] == 4:
-        return cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
-    elif img.shape[2] == 3:
-        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    else:
-        raise ValueError("Invalid image format. Image must be in BGR or BGRA format.")
+    if img.ndim == 2:
+        return img
+    with METRICS.timer("grayscale"):
+        if img.shape[2] == 4:
+            return cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
+        elif img.shape[2] == 3:
+            return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        else:
+            raise ValueError("Invalid image format. Image must be in BGR or BGRA format.")
+
+
+def region_hash(img: cv2.Mat, region: Rect = None, step: int = 1) -> int:
+    """
+    计算区域的快速哈希，用于判断画面是否变化
+
+    对区域像素计算crc32，比完整匹配快得多。step大于1时按间隔采样，速度更快但可能漏掉细微变化
+
+    :param img: 图像
+    :param region: 区域，为None时为整张图像
+    :param step: 采样间隔
+    :return: 哈希值
+    """
+    if region is not None:
+        img = img[max(region.y, 0):region.y + region.h, max(region.x, 0):region.x + region.w]
+    return zlib.crc32(np.ascontiguousarray(img[::step, ::step]))
 
 
 # TODO: 添加特征点匹配
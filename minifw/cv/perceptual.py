@@ -0,0 +1,72 @@
+import cv2
+import numpy as np
+
+from minifw.common import Rect
+
+# pHash先缩小到 hash_size*PHASH_DCT_FACTOR 边长再做DCT，取左上角hash_size*hash_size的低频系数
+PHASH_DCT_FACTOR = 4
+# 缩小前采样后每个输出像素至少保留 SAMPLE_FACTOR*SAMPLE_FACTOR 个点
+SAMPLE_FACTOR = 8
+
+
+def _gray(img: cv2.Mat) -> cv2.Mat:
+    if img.ndim == 3:
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY if img.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    return img
+
+
+def _bits2int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def _shrink(img: cv2.Mat, region: Rect, size: tuple[int, int]) -> cv2.Mat:
+    """裁剪区域并缩小为灰度图"""
+    if region is not None:
+        img = img[max(region.y, 0):region.y + region.h, max(region.x, 0):region.x + region.w]
+    height, width = img.shape[:2]
+    # INTER_AREA非整数倍缩小很慢，大图先等间隔采样，保证每个输出像素仍由足够多的点平均
+    step = min(height // (size[1] * SAMPLE_FACTOR), width // (size[0] * SAMPLE_FACTOR))
+    if step > 1:
+        img = img[::step, ::step]
+    # 先缩小再灰度化，避免对整幅图做颜色转换
+    return _gray(cv2.resize(img, size, interpolation=cv2.INTER_AREA))
+
+
+def dhash(img: cv2.Mat, region: Rect = None, hash_size: int = 8) -> int:
+    """
+    dhash 差值哈希，比较缩小图中相邻像素的明暗
+
+    Args:
+        img (cv2.Mat): 图像
+        region (Rect, optional): 区域，为None时为整个画面. Defaults to None.
+        hash_size (int, optional): 哈希边长，结果为hash_size*hash_size位. Defaults to 8.
+
+    Returns:
+        int: 哈希值
+    """
+    small = _shrink(img, region, (hash_size + 1, hash_size))
+    return _bits2int(small[:, 1:] > small[:, :-1])
+
+
+def phash(img: cv2.Mat, region: Rect = None, hash_size: int = 8) -> int:
+    """
+    phash 感知哈希，比较缩小图DCT低频系数与中位数的大小，对亮度和压缩噪声更稳定
+
+    Args:
+        img (cv2.Mat): 图像
+        region (Rect, optional): 区域，为None时为整个画面. Defaults to None.
+        hash_size (int, optional): 哈希边长，结果为hash_size*hash_size位. Defaults to 8.
+
+    Returns:
+        int: 哈希值
+    """
+    size = hash_size * PHASH_DCT_FACTOR
+    small = _shrink(img, region, (size, size))
+    low = cv2.dct(np.float32(small))[:hash_size, :hash_size]
+    # 直流分量只反映平均亮度，不参与中位数
+    return _bits2int(low > np.median(low.ravel()[1:]))
+
+
+def hamming_distance(hash1: int, hash2: int) -> int:
+    """两个哈希值不同的位数"""
+    return (hash1 ^ hash2).bit_count()
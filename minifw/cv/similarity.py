@@ -0,0 +1,195 @@
+import cv2
+import numpy as np
+
+from minifw.common import Rect
+
+# SSIM常数 (0.01*255)^2 和 (0.03*255)^2
+SSIM_C1 = 6.5025
+SSIM_C2 = 58.5225
+SSIM_KERNEL = (11, 11)
+SSIM_SIGMA = 1.5
+# OpenCV滤波支持的最大通道数(OpenCV 5为128)，参考图像沿通道拼接时按此分块
+MAX_FILTER_CHANNELS = 128
+SIMILARITY_ALGORITHMS = ("SSIM", "PSNR")
+
+
+def prepare(img: cv2.Mat, region: Rect = None, scale: int = 1, gray: bool = False,
+            dtype: type | None = np.float32) -> np.ndarray:
+    """
+    prepare 裁剪区域、缩小并转换为float32
+
+    :param img: 图像
+    :param region: 区域，为None时为整张图像
+    :param scale: 缩小倍数
+    :param gray: 是否转换为灰度
+    :param dtype: 转换的类型，为None时保持原类型
+    :return: (h, w, c) 的数组
+    """
+    if region is not None:
+        img = img[max(region.y, 0):region.y + region.h, max(region.x, 0):region.x + region.w]
+    if scale != 1:
+        height, width = img.shape[:2]
+        img = cv2.resize(img, (max(width // scale, 1), max(height // scale, 1)), interpolation=cv2.INTER_AREA)
+    if gray and img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY if img.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    if dtype is not None:
+        img = img.astype(dtype)
+    return img if img.ndim == 3 else img[:, :, None]
+
+
+def _blur(img: np.ndarray) -> np.ndarray:
+    # 单通道时OpenCV返回二维数组，保持(h, w, c)
+    return cv2.GaussianBlur(img, SSIM_KERNEL, SSIM_SIGMA).reshape(img.shape)
+
+
+def _ssim_map(mu1: np.ndarray, sigma1_sq: np.ndarray, mu2: np.ndarray, sigma2_sq: np.ndarray,
+              mean12: np.ndarray) -> np.ndarray:
+    """mean12为img1*img2的局部均值"""
+    mu1_mu2 = mu1 * mu2
+    return ((2 * mu1_mu2 + SSIM_C1) * (2 * (mean12 - mu1_mu2) + SSIM_C2)) / (
+            (mu1 * mu1 + mu2 * mu2 + SSIM_C1) * (sigma1_sq + sigma2_sq + SSIM_C2))
+
+
+def _moments(img: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """局部均值和方差"""
+    mu = _blur(img)
+    return mu, _blur(img * img) - mu * mu
+
+
+def ssim(img1: np.ndarray, img2: np.ndarray) -> float:
+    """两张prepare后图像的平均结构相似性，彩色图为各通道的平均值"""
+    mu1, sigma1_sq = _moments(img1)
+    mu2, sigma2_sq = _moments(img2)
+    return float(_ssim_map(mu1, sigma1_sq, mu2, sigma2_sq, _blur(img1 * img2)).mean())
+
+
+def psnr(img1: np.ndarray, img2: np.ndarray) -> float:
+    """两张prepare后图像的峰值信噪比，完全相同时为inf"""
+    # cv2.norm单次遍历求平方误差和，uint8图像也在内部按double累加，不会溢出，不产生差值临时数组
+    mse = cv2.norm(img1, img2, cv2.NORM_L2SQR) / img1.size
+    if mse == 0:
+        return float('inf')
+    return float(20 * np.log10(255.0 / np.sqrt(mse)))
+
+
+class ReferenceStack:
+    def __init__(self, references: list[cv2.Mat], region: Rect = None, scale: int = 1, gray: bool = False) -> None:
+        """
+        __init__ 参考图像组
+
+        预先裁剪、缩小参考图像并计算SSIM需要的局部均值和方差。参考图像沿通道方向拼接，
+        比较时一帧与全部参考图像在一次向量化计算中完成，每帧只需一次大的高斯滤波
+
+        Args:
+            references (list[cv2.Mat]): 参考图像，尺寸必须一致
+            region (Rect, optional): 只比较该区域，为None时为整张图像. Defaults to None.
+            scale (int, optional): 比较前缩小的倍数. Defaults to 1.
+            gray (bool, optional): 转换为灰度后比较，计算量约为彩色的1/3. Defaults to False.
+        """
+        if len(references) == 0:
+            raise ValueError("references must not be empty")
+        self.region = region
+        self.scale = scale
+        self.gray = gray
+        prepared = [prepare(reference, region, scale, gray) for reference in references]
+        if any(image.shape != prepared[0].shape for image in prepared):
+            raise ValueError("References must be of the same size and shape")
+        self.shape = prepared[0].shape
+        self.count = len(prepared)
+        # 每块 (参考图像数, 拼接后的图像, 局部均值, 均值平方+C1, 局部方差+C2)，与帧无关的部分预先计算
+        self.__chunks: list[tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+        per_chunk = max(MAX_FILTER_CHANNELS // self.shape[2], 1)
+        for start in range(0, self.count, per_chunk):
+            images = prepared[start:start + per_chunk]
+            # 按(h, w, c, n)排列，帧沿最内层广播时效率更高；高斯滤波与通道顺序无关
+            stack = np.ascontiguousarray(np.stack(images, axis=3)).reshape(*self.shape[:2], -1)
+            mu, sigma_sq = _moments(stack)
+            self.__chunks.append((len(images), stack, mu, mu * mu + SSIM_C1, sigma_sq + SSIM_C2))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __ssim(self, image: np.ndarray) -> list[np.ndarray]:
+        height, width, channels = self.shape
+        mu1, sigma1_sq = _moments(image)
+        mu1_sq = mu1 * mu1
+        sums = []
+        for count, stack, mu2, mu2_sq_c1, sigma2_sq_c2 in self.__chunks:
+            shape = (height, width, channels, count)
+            # 帧通过广播与每张参考图像对应，不复制count份
+            mean12 = _blur((image[:, :, :, None] * stack.reshape(shape)).reshape(stack.shape)).reshape(shape)
+            mu1_mu2 = mu1[:, :, :, None] * mu2.reshape(shape)
+            # ((2*mu1_mu2 + C1) * (2*sigma12 + C2)) / ((mu1^2 + mu2^2 + C1) * (sigma1^2 + sigma2^2 + C2))，原地计算减少临时数组
+            mean12 -= mu1_mu2
+            mean12 *= 2
+            mean12 += SSIM_C2
+            mu1_mu2 *= 2
+            mu1_mu2 += SSIM_C1
+            mu1_mu2 *= mean12
+            denominator = mu2_sq_c1.reshape(shape) + mu1_sq[:, :, :, None]
+            denominator *= sigma2_sq_c2.reshape(shape) + sigma1_sq[:, :, :, None]
+            mu1_mu2 /= denominator
+            sums.append(mu1_mu2.reshape(height * width, channels, count).sum(axis=0))
+        return sums
+
+    def __squared_error(self, image: np.ndarray) -> list[np.ndarray]:
+        height, width, channels = self.shape
+        sums = []
+        for count, stack, *_ in self.__chunks:
+            diff = stack.reshape(height, width, channels, count) - image[:, :, :, None]
+            diff *= diff
+            sums.append(diff.reshape(height * width, channels, count).sum(axis=0))
+        return sums
+
+    def similarity(self, img: cv2.Mat, algorithm_type: str = "SSIM") -> np.ndarray:
+        """
+        similarity 计算图像与每张参考图像的相似度
+
+        Args:
+            img (cv2.Mat): 图像，尺寸与参考图像一致
+            algorithm_type (str, optional): SSIM或PSNR. Defaults to "SSIM".
+
+        Returns:
+            np.ndarray: 长度为参考图像数的相似度数组
+        """
+        if algorithm_type not in SIMILARITY_ALGORITHMS:
+            raise ValueError(f"Unsupported comparison type: {algorithm_type}")
+        image = prepare(img, self.region, self.scale, self.gray)
+        if image.shape != self.shape:
+            raise ValueError("Image must be of the same size and shape as references")
+        sums = self.__ssim(image) if algorithm_type == "SSIM" else self.__squared_error(image)
+        # 先按列求和再平均，比直接在多个轴上求平均快得多
+        scores = np.concatenate(sums, axis=1).mean(axis=0) / (self.shape[0] * self.shape[1])
+        if algorithm_type == "PSNR":
+            with np.errstate(divide="ignore"):
+                scores = 20 * np.log10(255.0 / np.sqrt(scores))
+        return scores
+
+    def best(self, img: cv2.Mat, algorithm_type: str = "SSIM") -> tuple[int, float]:
+        """
+        best 找出最相似的参考图像
+
+        Returns:
+            tuple[int, float]: (参考图像序号, 相似度)
+        """
+        scores = self.similarity(img, algorithm_type)
+        index = int(np.argmax(scores))
+        return index, float(scores[index])
+
+
+def best_similarity(img: cv2.Mat, references: list[cv2.Mat], algorithm_type: str = "SSIM", region: Rect = None,
+                    scale: int = 1, gray: bool = False) -> tuple[int, float]:
+    """
+    best_similarity 一次比较图像与多张参考图像，返回最相似的一张
+
+    参考图像固定时应创建ReferenceStack复用预处理结果
+
+    :param img: 图像
+    :param references: 参考图像
+    :param algorithm_type: SSIM或PSNR
+    :param region: 只比较该区域
+    :param scale: 比较前缩小的倍数
+    :param gray: 是否转换为灰度后比较
+    :return: (参考图像序号, 相似度)
+    """
+    return ReferenceStack(references, region, scale, gray).best(img, algorithm_type)
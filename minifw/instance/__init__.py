@@ -1,2 +1,3 @@
+from minifw.instance.asyncinstance import AsyncScriptInstance
+from minifw.instance.fleet import Fleet
 from minifw.instance.instance import ScriptInstance
-
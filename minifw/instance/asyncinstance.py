@@ -0,0 +1,105 @@
+import asyncio
+from concurrent.futures import Executor
+
+import cv2
+from loguru import logger
+
+from minifw.keyboard import Keyboard
+from minifw.matcher import MatchResult, Template
+from minifw.screencap import ScreenCap
+from minifw.screencap.asynccap import AsyncScreenCap
+from minifw.touch import Touch
+from minifw.touch.asynctouch import AsyncTouch
+
+
+class AsyncScriptInstance:
+    def __init__(self, screencap_method: AsyncScreenCap | ScreenCap = None,
+                 touch_method: AsyncTouch | Touch = None, keyboard_method: Keyboard = None,
+                 executor: Executor = None, debug: bool = False):
+        """
+        __init__ 异步脚本实例
+
+        异步后端直接在事件循环中执行，同步后端和模板匹配等CV计算放到executor中执行，
+        一个事件循环即可驱动多个设备
+
+        Args:
+            screencap_method (AsyncScreenCap | ScreenCap, optional): 截图方式. Defaults to None.
+            touch_method (AsyncTouch | Touch, optional): 触摸方式. Defaults to None.
+            keyboard_method (Keyboard, optional): 键盘输入方式. Defaults to None.
+            executor (Executor, optional): 执行同步调用的线程池，为None时使用事件循环默认线程池. Defaults to None.
+            debug (bool, optional): 是否输出调试日志. Defaults to False.
+        """
+        self.debug = debug
+        self.executor = executor
+        self.keyboard_method = keyboard_method
+        self.touch_method = touch_method
+        self.screencap_method = screencap_method
+
+    async def run_in_executor(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def screencap_raw(self) -> bytes:
+        if isinstance(self.screencap_method, AsyncScreenCap):
+            return await self.screencap_method.screencap_raw()
+        return await self.run_in_executor(self.screencap_method.screencap_raw)
+
+    async def screencap(self) -> cv2.Mat:
+        if isinstance(self.screencap_method, AsyncScreenCap):
+            return await self.screencap_method.screencap()
+        return await self.run_in_executor(self.screencap_method.screencap)
+
+    async def click(self, x: int, y: int, duration: int = 150):
+        if self.touch_method is None:
+            raise Exception("未指定触摸方式")
+        self.debug_log(f"Click at point({x},{y}) in {duration}ms")
+        if isinstance(self.touch_method, AsyncTouch):
+            return await self.touch_method.click(x, y, duration)
+        return await self.run_in_executor(self.touch_method.click, x, y, duration)
+
+    async def swipe(self, points: list, duration: int = 500):
+        if self.touch_method is None:
+            raise Exception("未指定触摸方式")
+        self.debug_log(f"Swipe from {points[0]} to {points[-1]} in {duration}ms")
+        if isinstance(self.touch_method, AsyncTouch):
+            return await self.touch_method.swipe(points, duration)
+        return await self.run_in_executor(self.touch_method.swipe, points, duration)
+
+    async def find(self, template: Template) -> MatchResult:
+        """
+        find 截图并查找模板
+
+        返回的结果未绑定控制器，点击请使用 `await instance.click_result(result)`
+        """
+        screen = await self.screencap()
+        result = await self.run_in_executor(template.match, screen)
+        if self.debug:
+            logger.debug(f"Find {template} in {result.get()}")
+        return result
+
+    async def click_result(self, result: MatchResult, duration: int = 150, **kwargs) -> bool:
+        """点击匹配结果，kwargs会传给MatchResult.get_click_point"""
+        point = result.get_click_point(**kwargs)
+        if point is None:
+            return False
+        await self.click(point.x, point.y, duration)
+        return True
+
+    async def key_down(self, key: str) -> None:
+        if self.keyboard_method is None:
+            raise Exception("未指定键盘输入方式")
+        self.debug_log(f"Key down {key}")
+        await self.run_in_executor(self.keyboard_method.key_down, key)
+
+    async def key_up(self, key: str) -> None:
+        if self.keyboard_method is None:
+            raise Exception("未指定键盘输入方式")
+        self.debug_log(f"Key up {key}")
+        await self.run_in_executor(self.keyboard_method.key_up, key)
+
+    def debug_log(self, msg: str):
+        if self.debug:
+            logger.debug(msg)
+
+    @staticmethod
+    async def sleep(duration: int):
+        await asyncio.sleep(duration / 1000)
@@ -0,0 +1,127 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
+
+from loguru import logger
+
+from minifw.common import DeviceSession
+from minifw.instance.instance import ScriptInstance
+from minifw.keyboard import ADBKeyboard, Keyboard
+from minifw.screencap import MiniCap, ScreenCap
+from minifw.touch import MiniTouch, Touch
+
+# 同时初始化的设备数
+FLEET_MAX_WORKERS = 8
+# 每个阶段失败后的重试次数和重试间隔(秒)
+FLEET_STAGE_RETRIES = 2
+FLEET_RETRY_DELAY = 1
+
+
+def _warm_session(serial: str) -> DeviceSession:
+    """预先读取后端都会用到的设备信息"""
+    session = DeviceSession.get(serial)
+    _ = session.abi, session.sdk, session.window_size, session.rotation
+    return session
+
+
+class Fleet:
+    def __init__(self, serials: list[str], screencap_factory: Callable[[str], ScreenCap] = MiniCap,
+                 touch_factory: Callable[[str], Touch] = MiniTouch,
+                 keyboard_factory: Callable[[str], Keyboard] = ADBKeyboard,
+                 max_workers: int = FLEET_MAX_WORKERS, retries: int = FLEET_STAGE_RETRIES,
+                 retry_delay: float = FLEET_RETRY_DELAY, **instance_kwargs) -> None:
+        """
+        __init__ 多设备并行初始化
+
+        每台设备依次执行 session、screencap、touch、keyboard 四个阶段，多台设备在线程池中并行执行，
+        总耗时取决于最慢的设备而不是所有设备之和
+
+        Args:
+            serials (list[str]): 设备id列表
+            screencap_factory (Callable[[str], ScreenCap], optional): 根据设备id创建截图方式，为None时不创建. Defaults to MiniCap.
+            touch_factory (Callable[[str], Touch], optional): 根据设备id创建触摸方式，为None时不创建. Defaults to MiniTouch.
+            keyboard_factory (Callable[[str], Keyboard], optional): 根据设备id创建键盘输入方式，为None时不创建. Defaults to ADBKeyboard.
+            max_workers (int, optional): 同时初始化的设备数. Defaults to 8.
+            retries (int, optional): 每个阶段失败后的重试次数. Defaults to 2.
+            retry_delay (float, optional): 重试间隔(秒). Defaults to 1.
+            **instance_kwargs: 传给ScriptInstance的其他参数
+        """
+        self.serials = list(serials)
+        self.factories: dict[str, Callable | None] = {
+            "session": _warm_session,
+            "screencap": screencap_factory,
+            "touch": touch_factory,
+            "keyboard": keyboard_factory,
+        }
+        self.max_workers = max_workers
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.instance_kwargs = instance_kwargs
+        self.instances: dict[str, ScriptInstance] = {}
+        # 设备id -> 阶段 -> 耗时(秒)，包含重试时间
+        self.timings: dict[str, dict[str, float]] = {serial: {} for serial in self.serials}
+        # 设备id -> 导致初始化失败的异常
+        self.errors: dict[str, Exception] = {}
+        self.__lock = threading.Lock()
+
+    def __run_stage(self, serial: str, stage: str):
+        factory = self.factories[stage]
+        if factory is None:
+            return None
+        start_time = time.perf_counter()
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    return factory(serial)
+                except Exception as e:
+                    if attempt == self.retries:
+                        raise
+                    logger.warning(f"{serial} {stage} failed ({attempt + 1}/{self.retries + 1}): {e}")
+                    time.sleep(self.retry_delay)
+        finally:
+            with self.__lock:
+                self.timings[serial][stage] = time.perf_counter() - start_time
+
+    def __bootstrap(self, serial: str) -> ScriptInstance:
+        self.__run_stage(serial, "session")
+        return ScriptInstance(
+            screencap_method=self.__run_stage(serial, "screencap"),
+            touch_method=self.__run_stage(serial, "touch"),
+            keyboard_method=self.__run_stage(serial, "keyboard"),
+            name=serial,
+            **self.instance_kwargs,
+        )
+
+    def start(self) -> dict[str, ScriptInstance]:
+        """
+        start 并行初始化所有设备
+
+        Returns:
+            dict[str, ScriptInstance]: 设备id -> 初始化成功的脚本实例，失败的设备记录在errors中
+        """
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fleet") as executor:
+            futures = {executor.submit(self.__bootstrap, serial): serial
+                       for serial in self.serials if serial not in self.instances}
+            for future in as_completed(futures):
+                serial = futures[future]
+                try:
+                    self.instances[serial] = future.result()
+                    self.errors.pop(serial, None)
+                except Exception as e:
+                    self.errors[serial] = e
+                    logger.error(f"{serial} 初始化失败: {e}")
+        logger.info(f"fleet ready: {len(self.instances)}/{len(self.serials)} "
+                    f"in {time.perf_counter() - start_time:.2f}s")
+        return self.instances
+
+    def report(self) -> str:
+        """各设备各阶段耗时"""
+        stages = list(self.factories)
+        lines = [f"{'serial':<24}" + "".join(f"{stage:>12}" for stage in stages) + f"{'status':>10}"]
+        for serial in self.serials:
+            timing = self.timings[serial]
+            cells = "".join(f"{timing[stage]:>11.2f}s" if stage in timing else f"{'-':>12}" for stage in stages)
+            lines.append(f"{serial:<24}{cells}{'failed' if serial in self.errors else 'ready':>10}")
+        return "\n".join(lines)
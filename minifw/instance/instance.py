@@ -1,86 +1,233 @@
 import functools
 import time
+import weakref
 
 import cv2
 from loguru import logger
 
-from minifw.cv import bytes2mat
+from minifw.common import ImageSize, METRICS, Rect, scale_rect
+from minifw.cv import ChangeDetector, bytes2mat, region_hash
 from minifw.keyboard import Keyboard
-from minifw.matcher import MatchResult, Template
-from minifw.screencap import ScreenCap
+from minifw.matcher import MatchResult, NoneMatchResult, Template
+from minifw.screencap import ScreenCap, PrefetchScreenCap
 from minifw.touch import Touch
 
+# 画面无变化时等待间隔的增长倍数
+WAIT_BACKOFF_FACTOR = 1.5
 
-def performance_test(func):
-    """装饰器：测量函数执行时间"""
 
-    @functools.wraps(func)
-    def wrapper(self, *args, **kwargs):
-        if self.debug:
-            start_time = time.time()
+def instrument(operation: str):
+    """装饰器：统计函数耗时，写入METRICS，debug模式下同时输出日志"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not (METRICS.enabled or self.debug):
+                return func(self, *args, **kwargs)
+            start_time = time.perf_counter_ns()
             result = func(self, *args, **kwargs)
-            end_time = time.time()
-            elapsed_time = end_time - start_time
-            logger.debug(f"Function {func.__name__} executed in {elapsed_time * 1000:.6f}ms")
+            elapsed_time = time.perf_counter_ns() - start_time
+            METRICS.observe(operation, elapsed_time, device=self.name)
+            if self.debug:
+                logger.debug(f"Function {func.__name__} executed in {elapsed_time / 1_000_000:.6f}ms")
             return result
-        else:
-            return func(self, *args, **kwargs)
 
-    return wrapper
+        return wrapper
+
+    return decorator
 
 
 class ScriptInstance(ScreenCap, Touch, Keyboard):
-    def __init__(self, screencap_method: ScreenCap = None,touch_method: Touch = None, keyboard_method: Keyboard = None,debug: bool = False):
+    def __init__(self, screencap_method: ScreenCap = None,touch_method: Touch = None, keyboard_method: Keyboard = None,debug: bool = False,
+                 prefetch: bool = False, prefetch_interval: int = 0, detect_change: bool = False,
+                 name: str = "default"):
+        """
+        __init__ 脚本实例
+
+        Args:
+            screencap_method (ScreenCap, optional): 截图方式. Defaults to None.
+            touch_method (Touch, optional): 触摸方式. Defaults to None.
+            keyboard_method (Keyboard, optional): 键盘输入方式. Defaults to None.
+            debug (bool, optional): 是否输出调试日志. Defaults to False.
+            prefetch (bool, optional): 是否在后台线程连续截图，screencap直接取最新帧. Defaults to False.
+            prefetch_interval (int, optional): 后台截图间隔(毫秒). Defaults to 0.
+            detect_change (bool, optional): find时检测画面变化，模板区域未变化时直接返回上次的结果. Defaults to False.
+            name (str, optional): 实例名称，作为性能指标的device标签. Defaults to "default".
+        """
+        self.name = name
         self.debug = debug
         self.keyboard_method = keyboard_method
         self.touch_method = touch_method
+        if prefetch and screencap_method is not None:
+            screencap_method = PrefetchScreenCap(screencap_method, prefetch_interval)
         self.screencap_method = screencap_method
+        self.change_detector = ChangeDetector() if detect_change else None
+        # 模板 -> (匹配时的帧号, 结果)
+        self.__match_cache: weakref.WeakKeyDictionary[Template, tuple[int, MatchResult]] = weakref.WeakKeyDictionary()
 
-    @performance_test
+    @instrument("capture_raw")
     def screencap_raw(self) -> bytes:
         return self.screencap_method.screencap_raw()
 
-    @performance_test
+    @instrument("capture")
     def screencap(self) -> cv2.Mat:
         return self.screencap_method.screencap()
 
-    @performance_test
+    @property
+    def frame_scale(self) -> float:
+        """截图像素与设备坐标的比例，匹配结果会自动换算回设备坐标"""
+        return 1.0 if self.screencap_method is None else self.screencap_method.frame_scale
+
+    @instrument("click")
     def click(self, x: int, y: int, duration: int = 150):
         if self.touch_method is None:
             raise Exception("未指定触摸方式")
         self.debug_log(f"Click at point({x},{y}) in {duration}ms")
         return self.touch_method.click(x, y, duration)
 
-    @performance_test
+    @instrument("swipe")
     def swipe(self, points: list, duration: int = 500):
         if self.touch_method is None:
             raise Exception("未指定触摸方式")
         self.debug_log(f"Swipe from {points[0]} to {points[-1]} in {duration}ms")
         return self.touch_method.swipe(points, duration)
 
-    @performance_test
+    @instrument("find")
     def find(self, template: Template) -> MatchResult:
         screen = self.screencap()
-        result = template.match(screen)
+        result = self.__match(template, screen)
         result.set_controller(self)
         if self.debug:
             logger.debug(f"Find {template} in {result.get()}")
         return result
 
-    @performance_test
+    @instrument("key")
     def key_down(self, key: str) -> None:
         if self.keyboard_method is None:
             raise Exception("未指定键盘输入方式")
         self.debug_log(f"Key down {key}")
         self.keyboard_method.key_down(key)
 
-    @performance_test
+    @instrument("key")
     def key_up(self, key: str) -> None:
         if self.keyboard_method is None:
             raise Exception("未指定键盘输入方式")
         self.debug_log(f"Key up {key}")
         self.keyboard_method.key_up(key)
 
+    def __match(self, template: Template, screen: cv2.Mat) -> MatchResult:
+        scale = self.frame_scale
+        if self.change_detector is None:
+            with METRICS.timer("match", device=self.name, template=template):
+                return template.match_scaled(screen, scale)
+        with METRICS.timer("change_detect", device=self.name):
+            self.change_detector.update(screen)
+        cached = self.__match_cache.get(template)
+        height, width = screen.shape[:2]
+        region = scale_rect(getattr(template, "region", None), scale, ImageSize(width, height))
+        if cached is not None and not self.change_detector.changed_since(cached[0], region):
+            METRICS.inc("match_cache_hits", device=self.name)
+            self.debug_log(f"{template} region unchanged, reuse result")
+            return cached[1]
+        METRICS.inc("match_cache_misses", device=self.name)
+        with METRICS.timer("match", device=self.name, template=template):
+            result = template.match_scaled(screen, scale)
+        self.__match_cache[template] = (self.change_detector.frame_index, result)
+        return result
+
+    def __next_frame(self, seq: int) -> tuple[int, cv2.Mat]:
+        """获取下一帧，后台截图时直接复用最新帧"""
+        if isinstance(self.screencap_method, PrefetchScreenCap):
+            return self.screencap_method.get_frame()
+        return seq + 1, self.screencap()
+
+    def __wait(self, templates: list[Template], gone: bool, timeout: int, interval: int,
+               max_interval: int) -> tuple[Template | None, MatchResult] | None:
+        deadline = time.monotonic() + timeout / 1000
+        delay = interval / 1000
+        scale = self.frame_scale
+        # 区域按帧尺寸截断，帧尺寸变化时重新计算
+        size: ImageSize | None = None
+        regions: list[Rect | None] = []
+        seq = 0
+        # 模板序号 -> (区域哈希, 匹配结果)，区域未变化时复用上次结果
+        cache: dict[int, tuple[int, MatchResult]] = {}
+        while True:
+            frame_seq, screen = self.__next_frame(seq)
+            changed = frame_seq != seq
+            seq = frame_seq
+            if changed:
+                changed = False
+                height, width = screen.shape[:2]
+                if size != ImageSize(width, height):
+                    size = ImageSize(width, height)
+                    regions = [scale_rect(getattr(template, "region", None), scale, size) for template in templates]
+                for index, template in enumerate(templates):
+                    hash_value = region_hash(screen, regions[index])
+                    if index not in cache or cache[index][0] != hash_value:
+                        METRICS.inc("match_cache_misses", device=self.name)
+                        with METRICS.timer("match", device=self.name, template=template):
+                            cache[index] = (hash_value, template.match_scaled(screen, scale))
+                        changed = True
+                    else:
+                        METRICS.inc("match_cache_hits", device=self.name)
+            results = [cache[index][1] for index in range(len(templates))]
+            if gone:
+                if all(result.is_emtpy() for result in results):
+                    return None, NoneMatchResult()
+            else:
+                for template, result in zip(templates, results):
+                    if not result.is_emtpy():
+                        result.set_controller(self)
+                        self.debug_log(f"Wait {template} in {result.get()}")
+                        return template, result
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            # 画面变化时恢复初始间隔，否则逐步退避
+            delay = interval / 1000 if changed else min(delay * WAIT_BACKOFF_FACTOR, max_interval / 1000)
+            time.sleep(min(delay, remaining))
+
+    def wait_for_any(self, templates: list[Template], timeout: int = 10000, interval: int = 100,
+                     max_interval: int = 1000) -> tuple[Template | None, MatchResult]:
+        """
+        wait_for_any 等待多个模板中任意一个出现
+
+        模板所在区域的画面没有变化时不重复匹配，画面持续不变时轮询间隔逐步增大到max_interval
+
+        Args:
+            templates (list[Template]): 模板列表，同时出现时按列表顺序优先
+            timeout (int, optional): 超时时间(毫秒). Defaults to 10000.
+            interval (int, optional): 初始轮询间隔(毫秒). Defaults to 100.
+            max_interval (int, optional): 最大轮询间隔(毫秒). Defaults to 1000.
+
+        Returns:
+            tuple[Template | None, MatchResult]: 最先出现的模板及其结果，超时返回(None, NoneMatchResult)
+        """
+        found = self.__wait(templates, False, timeout, interval, max_interval)
+        return (None, NoneMatchResult()) if found is None else found
+
+    def wait_for(self, template: Template, timeout: int = 10000, interval: int = 100,
+                 max_interval: int = 1000) -> MatchResult:
+        """
+        wait_for 等待模板出现
+
+        Returns:
+            MatchResult: 匹配结果，超时返回NoneMatchResult
+        """
+        return self.wait_for_any([template], timeout, interval, max_interval)[1]
+
+    def wait_gone(self, templates: Template | list[Template], timeout: int = 10000, interval: int = 100,
+                  max_interval: int = 1000) -> bool:
+        """
+        wait_gone 等待模板全部消失
+
+        Returns:
+            bool: 超时前是否已消失
+        """
+        templates = templates if isinstance(templates, list) else [templates]
+        return self.__wait(templates, True, timeout, interval, max_interval) is not None
+
     def debug_log(self, msg: str):
         if self.debug:
             logger.debug(msg)
@@ -1,14 +1,16 @@
-from adbutils import adb
-
+from minifw.common import DeviceSession
 from minifw.keyboard.keyboard import Keyboard
 
 
 class ADBKeyboard(Keyboard):
     def __init__(self, serial) -> None:
-        self.adb = adb.device(serial)
+        session = DeviceSession.get(serial)
+        self.adb = session.device
+        # 按键命令写入设备共享的常驻shell会话
+        self.shell = session.shell
 
     def key_down(self, key: str) -> None:
-        self.adb.keyevent(key)
+        self.shell.execute(f"input keyevent {key}")
 
     def key_up(self, key: str) -> None:
         pass
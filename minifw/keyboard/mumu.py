@@ -1,4 +1,4 @@
-from minifw.common import MUMU_API_DLL_PATH, MuMuApi
+from minifw.common import MuMuHost
 from minifw.keyboard.keyboard import Keyboard
 
 
@@ -13,7 +13,7 @@ class MuMuKeyboard(Keyboard):
         """
         __init__ MumuApi 操作
 
-        基于/shell/sdk/external_renderer_ipc.dll实现操作mumu模拟器
+        基于/shell/sdk/external_renderer_ipc.dll实现操作mumu模拟器，同一模拟器的dll和实例连接通过MuMuHost共享
 
         Args:
             instance_index (int): 模拟器实例的编号
@@ -24,10 +24,11 @@ class MuMuKeyboard(Keyboard):
         self.display_id = display_id
         self.instance_index = instance_index
         self.emulator_install_path = emulator_install_path
-        self.dll_path = emulator_install_path + MUMU_API_DLL_PATH if dll_path is None else dll_path
-        self.nemu = MuMuApi(self.dll_path)
+        self.host = MuMuHost.get(emulator_install_path, dll_path)
+        self.dll_path = self.host.dll_path
+        self.nemu = self.host.nemu
         # 连接模拟器
-        self.handle = self.nemu.connect(emulator_install_path, instance_index)
+        self.handle = self.host.handle(instance_index)
 
     def key_down(self, key: str) -> None:
         self.nemu.input_event_key_down(self.handle, self.display_id, key)
@@ -1,4 +1,5 @@
 from minifw.matcher.color import MultiColorTemplate
 from minifw.matcher.image import ImageTemplate
 from minifw.matcher.result import MatchResult, NoneMatchResult, RectMatchResult, PointMatchResult
+from minifw.matcher.scene import SceneIndex
 from minifw.matcher.template import Template
@@ -1,7 +1,9 @@
+import math
 import os
+
 import cv2
 
-from minifw.common import Rect
+from minifw.common import ImageSize, Rect, METRICS, scale_rect
 from minifw.cv import match_template_best, imread, get_height, get_width
 from minifw.matcher.result import NoneMatchResult, RectMatchResult
 from minifw.matcher.template import Template
@@ -21,23 +23,50 @@ class ImageTemplate(Template):
         self.threshold = threshold
         self.level = level
         self.template = None
+        # 缩放比例 -> 缩小后的模板
+        self.scaled_cache: dict[float, cv2.Mat] = {}
 
-    def match(self, image: cv2.Mat) -> RectMatchResult | NoneMatchResult:
+    def __load(self) -> cv2.Mat:
         if self.template is None:
-            if ImageTemplate.cache_pool.get(self.template_path):
+            if ImageTemplate.cache_pool.get(self.template_path) is not None:
+                METRICS.inc("template_cache_hits")
                 self.template = ImageTemplate.cache_pool[self.template_path]
             else:
+                METRICS.inc("template_cache_misses")
                 self.template = imread(self.template_path, cv2.IMREAD_UNCHANGED)
                 ImageTemplate.cache_pool[self.template_path] = self.template
+        return self.template
 
-        result = match_template_best(image, self.template, self.region, self.threshold, self.level)
+    def match(self, image: cv2.Mat) -> RectMatchResult | NoneMatchResult:
+        template = self.__load()
+        result = match_template_best(image, template, self.region, self.threshold, self.level)
 
         if result is None:
             return NoneMatchResult()
 
-        h, w = get_height(self.template), get_width(self.template)
+        h, w = get_height(template), get_width(template)
         return RectMatchResult(result.x, result.y, w, h)
 
+    def match_scaled(self, image: cv2.Mat, scale: float) -> RectMatchResult | NoneMatchResult:
+        """模板和区域按相同比例缩小后在缩小的截图上匹配，结果换算回设备坐标"""
+        if scale == 1:
+            return self.match(image)
+        template = self.__load()
+        scaled_template = self.scaled_cache.get(scale)
+        if scaled_template is None:
+            size = (max(round(get_width(template) * scale), 1), max(round(get_height(template) * scale), 1))
+            scaled_template = self.scaled_cache[scale] = cv2.resize(template, size, interpolation=cv2.INTER_AREA)
+        # 截图每缩小一半相当于少一层金字塔
+        level = None if self.level is None else max(self.level - round(math.log2(1 / scale)), 0)
+        result = match_template_best(image, scaled_template, scale_rect(self.region, scale, ImageSize(get_width(image), get_height(image))),
+                                     self.threshold, level)
+
+        if result is None:
+            return NoneMatchResult()
+
+        h, w = get_height(template), get_width(template)
+        return RectMatchResult(round(result.x / scale), round(result.y / scale), w, h)
+
     @staticmethod
     def from_dict(data: dict):
         template_path = data.get('template_path')
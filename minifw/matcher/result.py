@@ -18,6 +18,15 @@ class MatchResult(ABC):
     def click(self, controller=None, duration=100, algorithm=None) -> bool:
         pass
 
+    def get_click_point(self, algorithm=None) -> Point | None:
+        """按点生成算法得到点击坐标，结果为空时返回None。默认根据get()的结果：点直接返回，矩形返回中心点"""
+        value = self.get()
+        if isinstance(value, Point):
+            return value
+        if isinstance(value, Rect):
+            return Point(value.x + value.w // 2, value.y + value.h // 2)
+        return None
+
     def set_controller(self, controller: Touch):
         self.controller = controller
 
@@ -42,6 +51,9 @@ class NoneMatchResult(MatchResult):
     def click(self, *args, **kwargs) -> bool:
         return False
 
+    def get_click_point(self, *args, **kwargs) -> None:
+        return None
+
 
 class RectMatchResult(MatchResult):
     def __str__(self) -> str:
@@ -57,9 +69,12 @@ class RectMatchResult(MatchResult):
     def get(self) -> Rect:
         return Rect(self.x, self.y, self.w, self.h)
 
+    def get_click_point(self, algorithm: RegionPointGenerator = NormalDistributionPointGenerator) -> Point:
+        return algorithm.generate(self.x, self.y, self.w, self.h)
+
     def click(self, controller: Touch = None, duration: int = 150,
               algorithm: RegionPointGenerator = NormalDistributionPointGenerator) -> bool:
-        point = algorithm.generate(self.x, self.y, self.w, self.h)
+        point = self.get_click_point(algorithm)
         controller = self.controller if controller is None else controller
         controller.click(point.x, point.y, duration)
         return True
@@ -77,9 +92,12 @@ class PointMatchResult(MatchResult):
     def get(self) -> Point:
         return Point(self.x, self.y)
 
+    def get_click_point(self, algorithm: OffsetPointGenerator = NoneOffsetPointGenerator) -> Point:
+        return algorithm.generate(self.x, self.y)
+
     def click(self, controller: Touch = None, duration: int = 150,
               algorithm: OffsetPointGenerator = NoneOffsetPointGenerator) -> bool:
-        x, y = algorithm.generate(self.x, self.y)
+        point = self.get_click_point(algorithm)
         controller = self.controller if controller is None else controller
-        controller.click(x, y, duration)
+        controller.click(point.x, point.y, duration)
         return True
@@ -0,0 +1,223 @@
+import json
+import os
+import threading
+
+import cv2
+
+from minifw.common import Rect, scale_rect
+from minifw.cv import dhash, hamming_distance, phash
+from minifw.matcher.result import MatchResult
+from minifw.matcher.template import Template
+
+SCENE_INDEX_VERSION = 1
+HASH_ALGORITHMS = {"dhash": dhash, "phash": phash}
+
+
+class _BKNode:
+    __slots__ = ("key", "names", "children")
+
+    def __init__(self, key: int, name: str) -> None:
+        self.key = key
+        self.names = [name]
+        # 与本节点的距离 -> 子节点
+        self.children: dict[int, _BKNode] = {}
+
+
+class _BKTree:
+    """按汉明距离组织的BK树，查询时利用三角不等式剪枝"""
+
+    def __init__(self) -> None:
+        self.root: _BKNode | None = None
+
+    def add(self, key: int, name: str):
+        if self.root is None:
+            self.root = _BKNode(key, name)
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(key, node.key)
+            if distance == 0:
+                if name not in node.names:
+                    node.names.append(name)
+                return
+            child = node.children.get(distance)
+            if child is None:
+                node.children[distance] = _BKNode(key, name)
+                return
+            node = child
+
+    def search(self, key: int, max_distance: int) -> list[tuple[int, str]]:
+        results = []
+        stack = [] if self.root is None else [self.root]
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(key, node.key)
+            if distance <= max_distance:
+                results.extend((distance, name) for name in node.names)
+            for child_distance, child in node.children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return sorted(results)
+
+
+class SceneIndex:
+    def __init__(self, regions: list[Rect] = None, algorithm: str = "dhash", hash_size: int = 8,
+                 max_distance: int = 10) -> None:
+        """
+        __init__ 场景索引
+
+        保存参考截图指定区域的感知哈希，识别时计算当前画面的哈希并在BK树中按汉明距离查找最相近的场景，
+        不需要逐个进行模板匹配。多个区域的哈希拼接为一个哈希，距离为各区域距离之和
+
+        Args:
+            regions (list[Rect], optional): 参与哈希的区域(设备坐标)，应选择能区分场景且内容固定的区域，为None时为整个画面. Defaults to None.
+            algorithm (str, optional): dhash或phash. Defaults to "dhash".
+            hash_size (int, optional): 每个区域的哈希边长，每个区域hash_size*hash_size位. Defaults to 8.
+            max_distance (int, optional): 默认的最大汉明距离. Defaults to 10.
+        """
+        if algorithm not in HASH_ALGORITHMS:
+            raise ValueError(f"algorithm must be one of {list(HASH_ALGORITHMS)}")
+        self.regions = list(regions) if regions else [None]
+        self.algorithm = algorithm
+        self.hash_size = hash_size
+        self.max_distance = max_distance
+        # (场景名称, 哈希值)，按添加顺序保存，用于持久化
+        self.scenes: list[tuple[str, int]] = []
+        self.__tree = _BKTree()
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.scenes)
+
+    @property
+    def names(self) -> list[str]:
+        return list(dict.fromkeys(name for name, _ in self.scenes))
+
+    def hash(self, image: cv2.Mat, scale: float = 1) -> int:
+        """
+        hash 计算画面的场景哈希
+
+        Args:
+            image (cv2.Mat): 截图
+            scale (float, optional): 截图像素与设备坐标的比例，区域按该比例缩放. Defaults to 1.
+        """
+        bits = self.hash_size * self.hash_size
+        hash_func = HASH_ALGORITHMS[self.algorithm]
+        value = 0
+        for region in self.regions:
+            value = (value << bits) | hash_func(image, scale_rect(region, scale), self.hash_size)
+        return value
+
+    def add(self, name: str, image: cv2.Mat, scale: float = 1) -> int:
+        """
+        add 添加参考截图，同一场景可以添加多张
+
+        Args:
+            name (str): 场景名称
+            image (cv2.Mat): 参考截图
+            scale (float, optional): 截图像素与设备坐标的比例. Defaults to 1.
+
+        Returns:
+            int: 参考截图的哈希值
+        """
+        value = self.hash(image, scale)
+        self.add_hash(name, value)
+        return value
+
+    def add_hash(self, name: str, value: int):
+        with self.__lock:
+            self.scenes.append((name, value))
+            self.__tree.add(value, name)
+
+    def candidates(self, image: cv2.Mat, max_distance: int = None, scale: float = 1) -> list[tuple[int, str]]:
+        """
+        candidates 按距离从近到远返回候选场景
+
+        Args:
+            image (cv2.Mat): 截图
+            max_distance (int, optional): 最大汉明距离，为None时使用self.max_distance. Defaults to None.
+            scale (float, optional): 截图像素与设备坐标的比例. Defaults to 1.
+
+        Returns:
+            list[tuple[int, str]]: (距离, 场景名称)列表，同一场景只保留最近的一项
+        """
+        max_distance = self.max_distance if max_distance is None else max_distance
+        value = self.hash(image, scale)
+        with self.__lock:
+            results = self.__tree.search(value, max_distance)
+        seen = set()
+        candidates = []
+        for distance, name in results:
+            if name not in seen:
+                seen.add(name)
+                candidates.append((distance, name))
+        return candidates
+
+    def classify(self, image: cv2.Mat, max_distance: int = None, scale: float = 1) -> str | None:
+        """
+        classify 识别当前场景
+
+        Returns:
+            str | None: 最相近的场景名称，没有距离在max_distance以内的场景时返回None
+        """
+        candidates = self.candidates(image, max_distance, scale)
+        return candidates[0][1] if candidates else None
+
+    def recognize(self, image: cv2.Mat, templates: dict[str, Template], max_distance: int = None,
+                  scale: float = 1) -> tuple[str | None, MatchResult | None]:
+        """
+        recognize 识别场景后用模板确认
+
+        按距离从近到远对候选场景执行模板匹配，返回第一个匹配成功的场景，只对少数候选进行完整的模板匹配
+
+        Args:
+            image (cv2.Mat): 截图
+            templates (dict[str, Template]): 场景名称 -> 确认用的模板，没有模板的场景直接视为确认
+            max_distance (int, optional): 最大汉明距离. Defaults to None.
+            scale (float, optional): 截图像素与设备坐标的比例. Defaults to 1.
+
+        Returns:
+            tuple[str | None, MatchResult | None]: (场景名称, 模板匹配结果)，未识别时为(None, None)
+        """
+        for _, name in self.candidates(image, max_distance, scale):
+            template = templates.get(name)
+            if template is None:
+                return name, None
+            result = template.match_scaled(image, scale)
+            if not result.is_emtpy():
+                return name, result
+        return None, None
+
+    def to_dict(self) -> dict:
+        return {
+            "version": SCENE_INDEX_VERSION,
+            "algorithm": self.algorithm,
+            "hash_size": self.hash_size,
+            "max_distance": self.max_distance,
+            "regions": [None if region is None else [region.x, region.y, region.w, region.h]
+                        for region in self.regions],
+            "scenes": [{"name": name, "hash": f"{value:x}"} for name, value in self.scenes],
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "SceneIndex":
+        if data.get("version") != SCENE_INDEX_VERSION:
+            raise ValueError(f"unsupported scene index version: {data.get('version')}")
+        regions = [None if region is None else Rect(*region) for region in data["regions"]]
+        index = SceneIndex(None if regions == [None] else regions, data["algorithm"], data["hash_size"],
+                           data["max_distance"])
+        for scene in data["scenes"]:
+            index.add_hash(scene["name"], int(scene["hash"], 16))
+        return index
+
+    def save(self, path: str):
+        """保存到json文件，先写临时文件再替换，避免写入中断损坏索引"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def load(path: str) -> "SceneIndex":
+        with open(path, encoding="utf-8") as f:
+            return SceneIndex.from_dict(json.load(f))
@@ -11,6 +11,21 @@ class Template(ABC):
     def match(self, image: cv2.Mat) -> MatchResult:
         pass
 
+    def match_scaled(self, image: cv2.Mat, scale: float) -> MatchResult:
+        """
+        match_scaled 在缩小的截图上匹配，返回设备坐标的结果
+
+        默认把截图放大回设备尺寸后再匹配，能直接在缩小截图上匹配的模板应重写此方法
+
+        Args:
+            image (cv2.Mat): 截图
+            scale (float): 截图像素与设备坐标的比例
+        """
+        if scale == 1:
+            return self.match(image)
+        height, width = image.shape[:2]
+        return self.match(cv2.resize(image, (round(width / scale), round(height / scale))))
+
     @abstractmethod
     def __str__(self) -> str:
         return "Template Desc"
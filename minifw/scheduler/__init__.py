@@ -1 +1,3 @@
+from minifw.scheduler.pool import DeviceTask, DeviceTaskScheduler
 from minifw.scheduler.task import Task,TaskScheduler
+from minifw.scheduler.trigger import Trigger, IntervalTrigger, DailyTrigger, CronTrigger
@@ -0,0 +1,246 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from threading import Condition, RLock, Thread, current_thread
+from typing import TYPE_CHECKING, Callable
+from uuid import UUID
+
+from loguru import logger
+
+from minifw.scheduler.task import Task, TaskQueue, TaskQueueItem, TaskSchedulerStatus, TaskStatus
+from minifw.scheduler.trigger import Trigger
+
+if TYPE_CHECKING:
+    # 只用于类型注解，避免导入调度器时加载截图、触摸等后端
+    from minifw.instance import ScriptInstance
+
+
+class DeviceTask(Task):
+    """
+    在设备上执行的任务，执行前调度器会把对应设备的ScriptInstance绑定到self.instance
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.instance: "ScriptInstance | None" = None
+
+
+# 子进程中的设备实例，由进程池初始化函数创建
+_process_instance: "ScriptInstance | None" = None
+
+
+def _init_process_worker(factory: Callable[[], "ScriptInstance"]):
+    global _process_instance
+    _process_instance = factory()
+
+
+def _run_in_process(task: Task) -> TaskStatus:
+    task.instance = _process_instance
+    task.run()
+    return task.get_status()
+
+
+class DeviceTaskScheduler:
+    def __init__(
+            self,
+            instances: dict[str, "ScriptInstance"] = None,
+            factories: dict[str, Callable[[], "ScriptInstance"]] = None,
+            use_process: bool = False,
+            sleep_time: int = 0,
+            keep_alive: bool = False,
+    ) -> None:
+        """
+        __init__ 多设备任务调度器
+
+        每个设备一个工作线程和一个专属队列，未指定设备的任务放入共享队列，由空闲的设备按优先级抢占执行
+
+        Args:
+            instances (dict[str, ScriptInstance], optional): 设备名 -> 实例，线程模式使用. Defaults to None.
+            factories (dict[str, Callable], optional): 设备名 -> 创建实例的函数，进程模式下在子进程中调用，
+                必须可以被pickle. 线程模式下在start时调用. Defaults to None.
+            use_process (bool, optional): 每个设备的任务在独立进程中执行，避免多个设备的CV计算争抢GIL.
+                任务对象需要可以被pickle. Defaults to False.
+            sleep_time (int, optional): 同一设备两个任务之间的间隔(毫秒). Defaults to 0.
+            keep_alive (bool, optional): 没有待执行任务时是否继续等待新任务. Defaults to False.
+        """
+        if use_process and not factories:
+            raise ValueError("进程模式必须提供factories")
+        self.instances = dict(instances or {})
+        self.factories = dict(factories or {})
+        self.use_process = use_process
+        self.sleep_time = sleep_time / 1000
+        self.keep_alive = keep_alive
+        self.status = TaskSchedulerStatus.STOP
+        # 所有队列共用一个条件变量，任一队列变化都会唤醒工作线程
+        self.__condition = Condition(RLock())
+        self.shared_queue = TaskQueue(self.__condition)
+        self.queues = {device: TaskQueue(self.__condition) for device in self.devices()}
+        self.threads: dict[str, Thread] = {}
+        # 正在运行的工作线程对应的设备，只在持有条件变量时修改
+        self.__running: set[str] = set()
+        self.__executors: dict[str, ProcessPoolExecutor] = {}
+
+    def devices(self) -> list[str]:
+        return list(dict.fromkeys([*self.instances, *self.factories]))
+
+    def put(self, task: Task, priority: int = 0, run_time: datetime = None, device: str = None,
+            trigger: Trigger = None, deadline: timedelta = None) -> UUID:
+        """
+        put 添加任务
+
+        Args:
+            task (Task): 任务
+            priority (int, optional): 优先级，数值越小越先执行. Defaults to 0.
+            run_time (datetime, optional): 执行时间. Defaults to 立即执行.
+            device (str, optional): 指定执行设备，为None时任意空闲设备均可执行. Defaults to None.
+            trigger (Trigger, optional): 周期触发器. Defaults to None.
+            deadline (timedelta, optional): 允许的最大延迟，超过后跳过本次执行. Defaults to None.
+        """
+        if device is not None and device not in self.queues:
+            raise KeyError(f"设备{device}不存在")
+        with self.__condition:
+            if device is None:
+                uuid = self.shared_queue.put(task, priority, run_time, trigger, deadline)
+            else:
+                uuid = self.queues[device].put(task, priority, run_time, trigger, deadline)
+            # 队列取空后退出的工作线程在有新任务时重新启动
+            for name in (self.devices() if device is None else [device]):
+                self.__revive(name)
+        return uuid
+
+    def remove(self, uuid: UUID) -> bool:
+        return any(queue.remove(uuid) for queue in [self.shared_queue, *self.queues.values()])
+
+    def start(self):
+        if self.status != TaskSchedulerStatus.STOP:
+            logger.warning("任务调度器已启动")
+            return
+        # 上一次运行残留的工作线程和进程池
+        self.__cleanup()
+        for device in self.devices():
+            if self.use_process:
+                self.__executors[device] = ProcessPoolExecutor(
+                    max_workers=1, initializer=_init_process_worker, initargs=(self.factories[device],))
+            elif device not in self.instances:
+                self.instances[device] = self.factories[device]()
+        with self.__condition:
+            self.status = TaskSchedulerStatus.RUNNING
+            for device in self.devices():
+                self.__spawn(device)
+
+    def __spawn(self, device: str):
+        self.__running.add(device)
+        self.threads[device] = Thread(target=self.__work, args=(device,), name=f"worker-{device}")
+        self.threads[device].start()
+
+    def __revive(self, device: str):
+        """调度器运行中且设备的工作线程已退出时重新启动，调用时需持有条件变量"""
+        if self.status != TaskSchedulerStatus.STOP and device not in self.__running:
+            logger.info(f"设备{device}有新任务，重新启动工作线程")
+            self.__spawn(device)
+
+    def __next_item(self, device: str) -> tuple[TaskQueue, TaskQueueItem] | None:
+        """取出设备下一个要执行的任务，专属队列和共享队列中优先级高者优先，调度器停止时返回None"""
+        queues = [self.queues[device], self.shared_queue]
+        with self.__condition:
+            while self.status != TaskSchedulerStatus.STOP:
+                if self.status == TaskSchedulerStatus.WAITING:
+                    self.__condition.wait()
+                    continue
+                candidates = [(item.priority, index) for index, item in
+                              enumerate(queue.get_next_item() for queue in queues) if item is not None]
+                if candidates:
+                    _, index = min(candidates)
+                    # 查看和取出之间任务可能已超过deadline，取不到时重新选择
+                    item = queues[index].pop_next_item()
+                    if item is not None:
+                        return queues[index], item
+                    continue
+                run_times = [t for t in (queue.get_next_run_time() for queue in queues) if t is not None]
+                if not run_times and not self.keep_alive:
+                    # 与put在同一把锁内判断，之后put的任务会重新启动工作线程
+                    self.__running.discard(device)
+                    return None
+                timeout = (min(run_times) - datetime.now()).total_seconds() if run_times else None
+                self.__condition.wait(timeout)
+        return None
+
+    def __execute(self, device: str, task: Task):
+        if self.use_process:
+            task.status = self.__executors[device].submit(_run_in_process, task).result()
+        else:
+            task.instance = self.instances[device]
+            task.run()
+
+    def __work(self, device: str):
+        while True:
+            next_item = self.__next_item(device)
+            if next_item is None:
+                logger.info(f"设备{device}任务队列为空")
+                break
+            queue, item = next_item
+            try:
+                self.__execute(device, item.task)
+            except Exception as e:
+                logger.exception(f"设备{device}执行任务{item.task}失败: {e}")
+            queue.reschedule(item)
+            if self.sleep_time:
+                with self.__condition:
+                    self.__condition.wait_for(lambda: self.status == TaskSchedulerStatus.STOP, self.sleep_time)
+        with self.__condition:
+            self.__running.discard(device)
+            if self.__running:
+                return
+            # 最后一个工作线程退出，取出进程池后再标记停止，之后的start不会与这里的清理冲突
+            executors, self.__executors = self.__executors, {}
+            self.threads = {}
+            self.status = TaskSchedulerStatus.STOP
+        # 关闭子进程，释放其中的设备连接
+        for executor in executors.values():
+            executor.shutdown()
+
+    def __cleanup(self):
+        for thread in list(self.threads.values()):
+            if thread is not current_thread():
+                thread.join()
+        with self.__condition:
+            executors, self.__executors = self.__executors, {}
+            self.threads = {}
+        for executor in executors.values():
+            executor.shutdown()
+
+    def __set_status(self, status: TaskSchedulerStatus):
+        with self.__condition:
+            self.status = status
+            self.__condition.notify_all()
+
+    def stop(self):
+        if not self.threads:
+            logger.warning("任务调度器未启动")
+            return
+        self.__set_status(TaskSchedulerStatus.STOP)
+        self.__cleanup()
+        logger.info("任务调度器已停止")
+
+    def join(self):
+        """等待所有工作线程结束，包括期间重新启动的工作线程"""
+        while True:
+            threads = [thread for thread in list(self.threads.values())
+                       if thread.is_alive() and thread is not current_thread()]
+            if not threads:
+                return
+            for thread in threads:
+                thread.join()
+
+    def pause(self):
+        if self.status == TaskSchedulerStatus.RUNNING:
+            logger.info("任务调度器暂停")
+            self.__set_status(TaskSchedulerStatus.WAITING)
+        else:
+            logger.warning("任务调度器未启动")
+
+    def resume(self):
+        if self.status == TaskSchedulerStatus.WAITING:
+            logger.info("任务调度器已恢复")
+            self.__set_status(TaskSchedulerStatus.RUNNING)
+        else:
+            logger.warning("任务调度器未暂停")
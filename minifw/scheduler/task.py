@@ -1,13 +1,20 @@
+import heapq
 import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from datetime import datetime
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from enum import Enum
-from threading import Thread
+from itertools import count
+from threading import Condition, RLock, Thread
 from uuid import uuid4, UUID
 
 from loguru import logger
 
+from minifw.scheduler.trigger import Trigger
+
+# 设置守护线程时，调度器空闲等待期间检查守护线程的间隔(秒)
+DAEMON_CHECK_INTERVAL = 1
+
 
 class TaskStatus(Enum):
     NEW = 0
@@ -61,58 +68,181 @@ class Task(ABC):
 class TaskQueueItem:
     task: Task
     priority: int
-    uuid: UUID = uuid4()
-    run_time: datetime = datetime.now()
+    uuid: UUID = field(default_factory=uuid4)
+    run_time: datetime = field(default_factory=datetime.now)
+    seq: int = 0
+    # 周期触发器，为None时为一次性任务
+    trigger: Trigger | None = None
+    # 允许的最大延迟，超过后跳过本次执行
+    deadline: timedelta | None = None
 
 
 class TaskQueue:
-    def __init__(self) -> None:
-        self.queue: list[TaskQueueItem] = []
+    def __init__(self, condition: Condition = None) -> None:
+        """
+        __init__ 任务队列
+
+        Args:
+            condition (Condition, optional): 多个队列共用同一个条件变量时传入，任一队列变化都会唤醒等待者. Defaults to None.
+        """
+        # 队列内容变化时通知等待的调度器
+        self.changed = Condition(RLock()) if condition is None else condition
+        self.__lock = self.changed
+        self.__counter = count()
+        # uuid -> item 索引，用于O(1)查找与惰性删除
+        self.__items: dict[UUID, TaskQueueItem] = {}
+        # 未到执行时间的任务 (run_time, priority, seq, uuid)
+        self.__waiting: list[tuple[datetime, int, int, UUID]] = []
+        # 已到执行时间的任务 (priority, seq, uuid)
+        self.__ready: list[tuple[int, int, UUID]] = []
 
     def get(self, uuid: UUID):
-        for item in self.queue:
-            if item.uuid == uuid:
-                return item.task
-
-    def put(self, task: Task, priority: int = 0, run_time: datetime = datetime.now()) -> UUID:
-        item = TaskQueueItem(task=task, priority=priority, run_time=run_time)
-        self.queue.append(item)
-        self.sort()
-        return self.queue[-1].uuid
+        item = self.__items.get(uuid)
+        return item.task if item is not None else None
+
+    def put(self, task: Task, priority: int = 0, run_time: datetime = None, trigger: Trigger = None,
+            deadline: timedelta = None) -> UUID:
+        """
+        put 添加任务
+
+        Args:
+            task (Task): 任务
+            priority (int, optional): 优先级，数值越小越先执行. Defaults to 0.
+            run_time (datetime, optional): 首次执行时间. Defaults to 立即执行，设置了trigger时由trigger计算.
+            trigger (Trigger, optional): 周期触发器，执行完成后按触发器自动重新入队. Defaults to None.
+            deadline (timedelta, optional): 允许的最大延迟，超过run_time+deadline仍未执行则跳过本次. Defaults to None.
+        """
+        if run_time is None:
+            run_time = datetime.now() if trigger is None else trigger.get_next_run_time(datetime.now())
+        if run_time is None:
+            raise ValueError(f"{trigger} will never fire")
+        item = TaskQueueItem(task=task, priority=priority, run_time=run_time, seq=next(self.__counter),
+                             trigger=trigger, deadline=deadline)
+        with self.__lock:
+            self.__items[item.uuid] = item
+            heapq.heappush(self.__waiting, (item.run_time, item.priority, item.seq, item.uuid))
+            self.changed.notify_all()
+        return item.uuid
 
     def clear(self):
-        self.queue.clear()
+        with self.__lock:
+            self.__items.clear()
+            self.__waiting.clear()
+            self.__ready.clear()
 
     def size(self):
-        return len(self.queue)
+        return len(self.__items)
 
     def remove(self, uuid: UUID):
-        for item in self.queue:
-            if item.uuid == uuid:
-                self.queue.remove(item)
-                return True
-        return False
+        # 堆中的条目在出堆时发现索引中已不存在再丢弃
+        with self.__lock:
+            removed = self.__items.pop(uuid, None) is not None
+            if removed:
+                # 等待者可能正在等待该任务的执行时间
+                self.changed.notify_all()
+            return removed
+
+    def __is_alive(self, uuid: UUID, seq: int) -> bool:
+        item = self.__items.get(uuid)
+        return item is not None and item.seq == seq
+
+    def get_next_item(self) -> TaskQueueItem | None:
+        """已到期且未完成的任务中优先级最高的一项，不出队"""
+        now = datetime.now()
+        with self.__lock:
+            # 将到期任务按优先级移入就绪堆
+            while self.__waiting and self.__waiting[0][0] <= now:
+                _, priority, seq, uuid = heapq.heappop(self.__waiting)
+                if self.__is_alive(uuid, seq):
+                    heapq.heappush(self.__ready, (priority, seq, uuid))
+            while self.__ready:
+                _, seq, uuid = self.__ready[0]
+                if not self.__is_alive(uuid, seq):
+                    heapq.heappop(self.__ready)
+                    continue
+                item = self.__items[uuid]
+                if item.task.get_status() == TaskStatus.COMPLETED:
+                    # 已在队列外完成的任务视为执行了一次：一次性任务移出队列，周期任务按触发器重新入队，
+                    # 一次性任务需要再次执行时reset后重新put
+                    heapq.heappop(self.__ready)
+                    self.__finish(item)
+                    continue
+                if item.deadline is not None and now - item.run_time > item.deadline:
+                    logger.warning(f"Task {item.task} missed its deadline, skipped")
+                    heapq.heappop(self.__ready)
+                    self.__finish(item)
+                    continue
+                return item
+
+    def pop_next_item(self) -> TaskQueueItem | None:
+        """
+        取出已到期且未完成的任务中优先级最高的一项，多个消费者共享队列时使用
+
+        一次性任务出队后即从队列删除，周期任务在执行后需调用reschedule重新入队
+        """
+        with self.__lock:
+            item = self.get_next_item()
+            if item is not None:
+                heapq.heappop(self.__ready)
+                if item.trigger is None:
+                    del self.__items[item.uuid]
+            return item
+
+    def reschedule(self, item: TaskQueueItem) -> bool:
+        """
+        reschedule 周期任务执行完成后按触发器计算下一次执行时间并重新入队
+
+        Returns:
+            bool: 是否重新入队，一次性任务、已被移除或触发器不再触发时返回False
+        """
+        with self.__lock:
+            if item.trigger is None or self.__items.get(item.uuid) is not item:
+                return False
+            return self.__finish(item)
+
+    def __finish(self, item: TaskQueueItem) -> bool:
+        next_run_time = item.trigger.get_next_run_time(datetime.now(), item.run_time) if item.trigger else None
+        if next_run_time is None:
+            self.__items.pop(item.uuid, None)
+            return False
+        item.task.reset()
+        item.run_time = next_run_time
+        item.seq = next(self.__counter)
+        heapq.heappush(self.__waiting, (item.run_time, item.priority, item.seq, item.uuid))
+        self.changed.notify_all()
+        return True
 
     def get_next_task(self):
-        for item in self.queue:
-            if item.run_time <= datetime.now() and item.task.get_status() != TaskStatus.COMPLETED:
-                return item.task
-
-    def sort(self, reverse: bool = False):
-        def get_priority(item: TaskQueueItem):
-            return item.priority
+        item = self.get_next_item()
+        return item.task if item is not None else None
 
-        self.queue.sort(key=get_priority, reverse=reverse)
+    def get_next_run_time(self) -> datetime | None:
+        """尚未到期的任务中最早的执行时间，没有则返回None"""
+        with self.__lock:
+            while self.__waiting:
+                run_time, _, seq, uuid = self.__waiting[0]
+                if self.__is_alive(uuid, seq):
+                    return run_time
+                heapq.heappop(self.__waiting)
+            return None
 
 
 class TaskScheduler:
-    def __init__(self, sleep_time: int = 0) -> None:
+    def __init__(self, sleep_time: int = 0, keep_alive: bool = False) -> None:
+        """
+        __init__ 任务调度器
+
+        Args:
+            sleep_time (int, optional): 两个任务之间的间隔(毫秒). Defaults to 0.
+            keep_alive (bool, optional): 队列中没有待执行任务时是否继续等待新任务，否则调度器自动停止. Defaults to False.
+        """
         self.status = TaskSchedulerStatus.STOP
         self.queue = TaskQueue()
         self.thread: Thread | None = None
         self.daemon_thread: Thread | None = None
         self.daemon_target = None
         self.sleep_time = sleep_time / 1000
+        self.keep_alive = keep_alive
 
     def start(self):
         if self.status == TaskSchedulerStatus.STOP:
@@ -120,27 +250,58 @@ class TaskScheduler:
             self.thread = Thread(target=self.run)
             self.thread.start()
 
+    def __check_daemon(self):
+        if self.daemon_target is not None:
+            if self.daemon_thread is None or not self.daemon_thread.is_alive():
+                logger.warning("守护线程已停止，重新启动...")
+                self.daemon_thread = Thread(target=self.daemon_target, daemon=True)
+                self.daemon_thread.start()
+
+    def __wait_timeout(self, timeout: float | None) -> float | None:
+        # 设置了守护线程时需要定期醒来检查其状态
+        if self.daemon_target is None:
+            return timeout
+        return DAEMON_CHECK_INTERVAL if timeout is None else min(timeout, DAEMON_CHECK_INTERVAL)
+
+    def __next_item(self) -> TaskQueueItem | None:
+        """取出下一个到期任务，没有到期任务时阻塞等待，调度器停止时返回None"""
+        with self.queue.changed:
+            while self.status != TaskSchedulerStatus.STOP:
+                self.__check_daemon()
+                if self.status == TaskSchedulerStatus.WAITING:
+                    self.queue.changed.wait(self.__wait_timeout(None))
+                    continue
+                item = self.queue.pop_next_item()
+                if item is not None:
+                    return item
+                next_run_time = self.queue.get_next_run_time()
+                if next_run_time is None and not self.keep_alive:
+                    logger.info("任务队列为空")
+                    self.status = TaskSchedulerStatus.STOP
+                    return None
+                timeout = None if next_run_time is None else (next_run_time - datetime.now()).total_seconds()
+                self.queue.changed.wait(self.__wait_timeout(timeout))
+        return None
+
     def run(self):
         while self.status != TaskSchedulerStatus.STOP:
-            if self.daemon_target is not None:
-                if self.daemon_thread is None or not self.daemon_thread.is_alive():
-                    logger.warning("守护线程已停止，重新启动...")
-                    self.daemon_thread = Thread(target=self.daemon_target, daemon=True)
-                    self.daemon_thread.start()
-            if self.status == TaskSchedulerStatus.WAITING:
-                time.sleep(0.1)  # Reduce CPU consumption
-                continue
-            task = self.queue.get_next_task()
-            if task is None:
-                logger.info("任务队列为空")
-                self.status = TaskSchedulerStatus.STOP
+            item = self.__next_item()
+            if item is None:
                 return
-            task.run()
-            time.sleep(self.sleep_time)
+            item.task.run()
+            self.queue.reschedule(item)
+            if self.sleep_time:
+                with self.queue.changed:
+                    self.queue.changed.wait_for(lambda: self.status == TaskSchedulerStatus.STOP, self.sleep_time)
+
+    def __set_status(self, status: TaskSchedulerStatus):
+        with self.queue.changed:
+            self.status = status
+            self.queue.changed.notify_all()
 
     def stop(self):
         if self.status != TaskSchedulerStatus.STOP:
-            self.status = TaskSchedulerStatus.STOP
+            self.__set_status(TaskSchedulerStatus.STOP)
             self.thread.join()
             logger.info("任务调度器已停止")
         else:
@@ -149,14 +310,14 @@ class TaskScheduler:
     def pause(self):
         if self.status == TaskSchedulerStatus.RUNNING:
             logger.info("任务调度器暂停")
-            self.status = TaskSchedulerStatus.WAITING
+            self.__set_status(TaskSchedulerStatus.WAITING)
         else:
             logger.warning("任务调度器未启动")
 
     def resume(self):
         if self.status == TaskSchedulerStatus.WAITING:
             logger.info("任务调度器已恢复")
-            self.status = TaskSchedulerStatus.RUNNING
+            self.__set_status(TaskSchedulerStatus.RUNNING)
         else:
             logger.warning("任务调度器未暂停")
 
@@ -0,0 +1,153 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+
+class Trigger(ABC):
+    """
+    周期任务触发器，任务执行后根据触发器计算下一次执行时间并自动重新入队
+    """
+
+    @abstractmethod
+    def get_next_run_time(self, now: datetime, last_run_time: datetime = None) -> datetime | None:
+        """
+        计算下一次执行时间
+
+        Args:
+            now (datetime): 当前时间
+            last_run_time (datetime, optional): 上一次计划执行的时间，首次入队时为None. Defaults to None.
+
+        Returns:
+            datetime | None: 下一次执行时间，返回None表示不再执行
+        """
+
+    @abstractmethod
+    def __str__(self) -> str:
+        return "Trigger Desc"
+
+
+class IntervalTrigger(Trigger):
+    def __init__(self, interval: timedelta | float) -> None:
+        """
+        __init__ 固定间隔触发
+
+        Args:
+            interval (timedelta | float): 间隔，数字表示秒
+        """
+        self.interval = interval if isinstance(interval, timedelta) else timedelta(seconds=interval)
+        if self.interval <= timedelta(0):
+            raise ValueError("interval must be greater than 0")
+
+    def get_next_run_time(self, now: datetime, last_run_time: datetime = None) -> datetime | None:
+        if last_run_time is None:
+            return now
+        next_run_time = last_run_time + self.interval
+        if next_run_time <= now:
+            # 错过的周期不补跑，对齐到当前时间之后的下一个周期
+            missed = (now - next_run_time) // self.interval + 1
+            next_run_time += self.interval * missed
+        return next_run_time
+
+    def __str__(self) -> str:
+        return f"IntervalTrigger({self.interval})"
+
+
+class DailyTrigger(Trigger):
+    def __init__(self, at: str) -> None:
+        """
+        __init__ 每天固定时间触发
+
+        Args:
+            at (str): 时间，格式为HH:MM或HH:MM:SS
+        """
+        parts = [int(part) for part in at.split(":")]
+        if len(parts) not in (2, 3):
+            raise ValueError("at must be HH:MM or HH:MM:SS")
+        self.at = at
+        self.hour, self.minute, self.second = (parts + [0])[:3]
+        if not (0 <= self.hour < 24 and 0 <= self.minute < 60 and 0 <= self.second < 60):
+            raise ValueError("at must be HH:MM or HH:MM:SS")
+
+    def get_next_run_time(self, now: datetime, last_run_time: datetime = None) -> datetime | None:
+        next_run_time = now.replace(hour=self.hour, minute=self.minute, second=self.second, microsecond=0)
+        if next_run_time <= now:
+            next_run_time += timedelta(days=1)
+        return next_run_time
+
+    def __str__(self) -> str:
+        return f"DailyTrigger({self.at})"
+
+
+class CronTrigger(Trigger):
+    # (最小值, 最大值)，依次为 分 时 日 月 周
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+    def __init__(self, expression: str) -> None:
+        """
+        __init__ cron表达式触发
+
+        支持标准5段式表达式 `分 时 日 月 周`，每段支持 `*`、`a-b`、`*/n`、`a-b/n` 和逗号分隔的列表，周日为0或7
+
+        Args:
+            expression (str): cron表达式，例如 "*/5 8-22 * * 1-5"
+        """
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError("cron expression must have 5 fields")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            self.__parse_field(field, low, high) for field, (low, high) in zip(fields, self.FIELD_RANGES)
+        ]
+        # 与标准cron一致：日和周同时受限时，满足其一即可
+        self.__day_restricted = fields[2] != "*"
+        self.__weekday_restricted = fields[4] != "*"
+
+    @staticmethod
+    def __parse_field(field: str, low: int, high: int) -> set[int]:
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step = part.split("/")
+                step = int(step)
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start, end = map(int, part.split("-"))
+            else:
+                start = end = int(part)
+            if step <= 0 or start > end:
+                raise ValueError(f"invalid cron field: {field}")
+            values.update(range(start, end + 1, step))
+        if high == 6:
+            # 周日可以写作7
+            values = {0 if value == 7 else value for value in values}
+        if not values or min(values) < low or max(values) > high:
+            raise ValueError(f"invalid cron field: {field}")
+        return values
+
+    def __match_day(self, time: datetime) -> bool:
+        day_match = time.day in self.days
+        weekday_match = (time.weekday() + 1) % 7 in self.weekdays
+        if self.__day_restricted and self.__weekday_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def get_next_run_time(self, now: datetime, last_run_time: datetime = None) -> datetime | None:
+        time = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # 逐级跳过不匹配的月、日、时、分，最多向后查找约5年
+        limit = now + timedelta(days=366 * 5)
+        while time <= limit:
+            if time.month not in self.months:
+                time = (time.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self.__match_day(time):
+                time = time.replace(hour=0, minute=0) + timedelta(days=1)
+            elif time.hour not in self.hours:
+                time = time.replace(minute=0) + timedelta(hours=1)
+            elif time.minute not in self.minutes:
+                time += timedelta(minutes=1)
+            else:
+                return time
+        return None
+
+    def __str__(self) -> str:
+        return f"CronTrigger({self.expression})"
@@ -1,5 +1,9 @@
 from minifw.screencap.adbcap import ADBCap
+from minifw.screencap.asynccap import AsyncScreenCap, AsyncMiniCap
 from minifw.screencap.droidcast import DroidCast
 from minifw.screencap.minicap import MiniCap
 from minifw.screencap.mumu import MuMuScreenCap
+from minifw.screencap.prefetch import PrefetchScreenCap
+from minifw.screencap.record import FrameArchive, RecordScreenCap, ReplayScreenCap
 from minifw.screencap.screencap import ScreenCap
+from minifw.screencap.sharedmem import SharedMemoryPublisher, SharedMemorySubscriber
@@ -2,9 +2,8 @@ import subprocess
 
 import cv2
 import numpy as np
-from adbutils import adb
 
-from minifw.common.exception import ADBDeviceUnFound
+from minifw.common import METRICS, DeviceSession
 from minifw.screencap.config import ADB_EXECUTOR
 from minifw.screencap.screencap import ScreenCap
 
@@ -17,12 +16,17 @@ class ADBCap(ScreenCap):
         Args:
             serial (str): 设备id
         """
-        if serial not in [device.serial for device in adb.device_list()]:
-            raise ADBDeviceUnFound("设备不存在，请检查是否链接设备成功")
-        self.__adb = adb.device(serial)
+        self.__session = DeviceSession.get(serial)
+        self.__adb = self.__session.device
         self.__display_id = display_id
-        self.width = self.__adb.window_size().width
-        self.height = self.__adb.window_size().height
+
+    @property
+    def width(self) -> int:
+        return self.__session.width
+
+    @property
+    def height(self) -> int:
+        return self.__session.height
 
     def screencap_raw(self) -> bytes:
         """
@@ -50,8 +54,9 @@ class ADBCap(ScreenCap):
 
     def screencap(self) -> cv2.Mat:
         raw = self.screencap_raw()
-        arr = np.frombuffer(raw[:self.width*self.height*4], np.uint8).reshape((self.height, self.width, 4))
-        return cv2.cvtColor(arr, cv2.COLOR_RGBA2BGR)
+        with METRICS.timer("decode", backend="ADBCap"):
+            arr = np.frombuffer(raw[:self.width * self.height * 4], np.uint8).reshape((self.height, self.width, 4))
+            return cv2.cvtColor(arr, cv2.COLOR_RGBA2BGR)
 
 if __name__ == '__main__':
     import time
@@ -0,0 +1,129 @@
+import asyncio
+import struct
+from abc import ABC, abstractmethod
+
+import cv2
+from loguru import logger
+
+from minifw.cv.decode import FORMAT_JPEG
+from minifw.screencap.config import DEFAULT_HOST, MINICAP_FORMAT_AUTO, MINICAP_FORMAT_PROBE_SIZE
+from minifw.screencap.minicap import MiniCap, detect_frame_format
+
+
+class AsyncScreenCap(ABC):
+
+    @abstractmethod
+    async def screencap_raw(self) -> bytes:
+        """截图未进行编码的源数据"""
+
+    @abstractmethod
+    async def screencap(self) -> cv2.Mat:
+        """截图opencv格式(未进行编码的图像)"""
+
+
+class AsyncMiniCap(AsyncScreenCap):
+    def __init__(self, serial, rate=None, quality=100, skip_frame=True, host=DEFAULT_HOST,
+                 image_format=MINICAP_FORMAT_AUTO) -> None:
+        """
+        __init__ minicap异步截图方式
+
+        安装和启动minicap复用MiniCap，帧数据通过asyncio stream读取，需要在事件循环中调用start
+
+        Args:
+            serial (str): 设备id
+            rate (int, optional): 截图帧率. Defaults to 自动获取.
+            quality (int, optional): 截图品质1~100之间. Defaults to 100.
+            skip_frame(bool,optional): 当无法快速获得截图时，跳过这个帧
+            host (str, "127.0.0.1"): 链接minicap地址
+            image_format (str, optional): 帧格式raw/jpeg，auto根据minicap输出的第一帧判断. Defaults to "auto".
+        """
+        self.minicap = MiniCap(serial, rate=rate, quality=quality, skip_frame=skip_frame, use_stream=False, host=host,
+                               image_format=image_format)
+        self.width = self.minicap.width
+        self.height = self.minicap.height
+        self.image_format = image_format
+        # 实际的帧格式，auto时在读取第一帧后确定
+        self.frame_format = None if image_format == MINICAP_FORMAT_AUTO else image_format
+        self.__host = host
+        self.__data: bytes | None = None
+        # 读取任务结束后不再返回旧帧
+        self.__closed = False
+        self.__data_available: asyncio.Condition | None = None
+        self.__reader_task: asyncio.Task | None = None
+        self.__writer: asyncio.StreamWriter | None = None
+        self.__start_lock = asyncio.Lock()
+
+    async def start(self):
+        """连接MiniCap已启动的minicap服务并开始读取帧"""
+        async with self.__start_lock:
+            if self.__reader_task is not None:
+                return
+            # 服务已在运行时直接返回转发端口，不会重复启动
+            port = await asyncio.get_running_loop().run_in_executor(None, self.minicap.start_server)
+            reader, self.__writer = await asyncio.open_connection(self.__host, port)
+            self.__data = None
+            self.__closed = False
+            self.__data_available = asyncio.Condition()
+            self.__reader_task = asyncio.create_task(self.__read_stream(reader))
+
+    async def __read_first_frame(self, reader: asyncio.StreamReader, raw_length: int) -> bytes:
+        if self.image_format != MINICAP_FORMAT_AUTO:
+            return await self.__read_frame(reader, raw_length)
+        head = await reader.readexactly(MINICAP_FORMAT_PROBE_SIZE)
+        self.frame_format = detect_frame_format(head, raw_length)
+        if self.frame_format == FORMAT_JPEG:
+            size, = struct.unpack_from("<I", head)
+            return head[4:] + await reader.readexactly(size - 2)
+        return head + await reader.readexactly(raw_length - len(head))
+
+    async def __read_frame(self, reader: asyncio.StreamReader, raw_length: int) -> bytes:
+        if self.frame_format == FORMAT_JPEG:
+            # 长度(4) JPEG数据
+            size, = struct.unpack("<I", await reader.readexactly(4))
+            return await reader.readexactly(size)
+        return await reader.readexactly(raw_length)
+
+    async def __publish(self, frame: bytes):
+        async with self.__data_available:
+            self.__data = frame
+            self.__data_available.notify_all()
+
+    async def __read_stream(self, reader: asyncio.StreamReader):
+        try:
+            # 版本(1) 长度(1) pid(4) 真实宽高(4*2) 虚拟宽高(4*2) 方向(1) quirks(1)
+            version, banner_length = await reader.readexactly(2)
+            banner = await reader.readexactly(banner_length - 2)
+            virtual_width = int.from_bytes(banner[12:16], "little")
+            virtual_height = int.from_bytes(banner[16:20], "little")
+            logger.info(f"banner version: {version}; virtual size: {virtual_width}x{virtual_height}")
+            raw_length = virtual_width * virtual_height * 4
+            await self.__publish(await self.__read_first_frame(reader, raw_length))
+            while True:
+                await self.__publish(await self.__read_frame(reader, raw_length))
+        except (asyncio.IncompleteReadError, OSError) as e:
+            logger.warning(f"minicap stream closed: {e}")
+        finally:
+            async with self.__data_available:
+                self.__closed = True
+                self.__data_available.notify_all()
+
+    async def stop(self):
+        if self.__reader_task is not None:
+            self.__reader_task.cancel()
+            self.__reader_task = None
+        if self.__writer is not None:
+            self.__writer.close()
+            self.__writer = None
+        self.minicap.stop_server()
+
+    async def screencap_raw(self) -> bytes:
+        await self.start()
+        async with self.__data_available:
+            await self.__data_available.wait_for(lambda: self.__data is not None or self.__closed)
+            if self.__closed:
+                raise ConnectionError("minicap stream closed, call stop() and start() to reconnect")
+            return self.__data
+
+    async def screencap(self) -> cv2.Mat:
+        raw = await self.screencap_raw()
+        return await asyncio.get_running_loop().run_in_executor(None, self.minicap.decode, raw, self.frame_format)
@@ -19,7 +19,27 @@ MNC_HOME = "/data/local/tmp/minicap"
 MNC_SO_HOME = "/data/local/tmp/minicap.so"
 MINICAP_COMMAND = ["LD_LIBRARY_PATH=/data/local/tmp",
                    "/data/local/tmp/minicap"]
-MINICAP_START_TIMEOUT = 3
+# 等待minicap输出banner的超时时间(秒)
+MINICAP_START_TIMEOUT = 10
+# 等待首帧的超时时间(秒)
+MINICAP_FRAME_TIMEOUT = 10
+# 超过 MINICAP_STALL_FACTOR 个帧间隔(且不少于 MINICAP_STALL_MIN_TIMEOUT 秒)没有新帧时重连
+MINICAP_STALL_FACTOR = 30
+MINICAP_STALL_MIN_TIMEOUT = 5
+# 重连间隔(秒)，按指数退避
+MINICAP_RECONNECT_INTERVAL = 0.5
+MINICAP_RECONNECT_MAX_INTERVAL = 10
+# 统计fps的帧数，超过 MINICAP_FPS_STALE 秒没有新帧时fps为0
+MINICAP_FPS_WINDOW = 30
+MINICAP_FPS_STALE = 2
+# 帧格式：raw为修改版minicap的RGBA帧，jpeg为原版minicap的JPEG帧，auto根据第一帧判断
+MINICAP_FORMAT_AUTO = "auto"
+MINICAP_FORMATS = ("raw", "jpeg")
+# 判断帧格式时读取的字节数：JPEG长度前缀(4) + SOI(2)
+MINICAP_FORMAT_PROBE_SIZE = 6
+JPEG_SOI = b"\xff\xd8"
+# 复用解码缓冲区时的缓冲区个数，返回的图像在之后 MINICAP_DECODE_BUFFERS-1 次截图内有效
+MINICAP_DECODE_BUFFERS = 3
 
 
 # DroidCast
@@ -27,6 +47,10 @@ DROIDCAST_PORT = 53516
 DROIDCAST_APK_PACKAGE_NAME = "com.rayworks.droidcast"
 DROIDCAST_PM_PATH_SHELL = "pm path {}".format(DROIDCAST_APK_PACKAGE_NAME)
 DROIDCAST_START_CMD = "exec app_process / {}.Main".format(DROIDCAST_APK_PACKAGE_NAME)
+# 自动选择传输格式时的候选格式和每种格式的测试次数
+DROIDCAST_FORMAT_AUTO = "auto"
+DROIDCAST_FORMATS = ("raw", "jpeg", "png")
+DROIDCAST_FORMAT_PROBE_TIMES = 3
 
 DROIDCAST_APK_VERSION = "1.4.1"
 DROIDCAST_APK_NAME_PREFIX = "DroidCast_"
@@ -34,3 +58,16 @@ DROIDCAST_APK_PATH = "{}/bin/{}{}.apk".format(
     WORK_DIR, DROIDCAST_APK_NAME_PREFIX, DROIDCAST_APK_VERSION)
 DROIDCAST_APK_ANDROID_PATH = "/data/local/tmp/{}{}.apk".format(
     DROIDCAST_APK_NAME_PREFIX, DROIDCAST_APK_VERSION)
+
+# 录制存档
+ARCHIVE_META_FILE = "meta.json"
+ARCHIVE_FRAMES_FILE = "frames.raw"
+# 每帧的时间戳(float64, time.time())，与帧一一对应
+ARCHIVE_INDEX_FILE = "index.bin"
+
+# 共享内存帧总线
+SHARED_MEMORY_MAGIC = 0x4D494E4946570001
+# 帧数据起始地址对齐
+SHARED_MEMORY_ALIGN = 64
+# 订阅者等待新帧的轮询间隔(秒)
+SHARED_MEMORY_POLL_INTERVAL = 0.001
@@ -1,38 +1,128 @@
+import statistics
 import subprocess
+import time
 
 import cv2
 import requests
-import numpy as np
-from adbutils import adb
 from loguru import logger
 
-from minifw.common.exception import ADBDeviceUnFound
+from minifw.common import METRICS, DeviceSession, ImageSize
+from minifw.cv.decode import check_scale, decode_image
 from minifw.screencap.config import DROIDCAST_APK_ANDROID_PATH, DROIDCAST_APK_PATH, DROIDCAST_APK_VERSION, ADB_EXECUTOR, \
     DROIDCAST_PORT, \
-    DROIDCAST_APK_PACKAGE_NAME, DROIDCAST_PM_PATH_SHELL, DROIDCAST_START_CMD
+    DROIDCAST_APK_PACKAGE_NAME, DROIDCAST_PM_PATH_SHELL, DROIDCAST_START_CMD, DROIDCAST_FORMAT_AUTO, DROIDCAST_FORMATS, \
+    DROIDCAST_FORMAT_PROBE_TIMES, DEFAULT_HOST
 from minifw.screencap.screencap import ScreenCap
 
 
 class DroidCast(ScreenCap):
-    def __init__(self, serial, display_id: int = None) -> None:
+    def __init__(self, serial, display_id: int = None, image_format: str = "raw", scale: int = 1,
+                 gray: bool = False, capture_scale: float = 1.0, quality: int = None, host: str = DEFAULT_HOST,
+                 port: int = None) -> None:
         """
         __init__ DroidCast截图方法
 
+        指定port时直接请求host:port上已运行的DroidCast(例如FakeDroidCastServer)，不使用adb，
+        不安装、不启动也不重启服务，屏幕尺寸取一次png截图的尺寸
+
         Args:
             serial (str): 设备id
             display_id (int): 显示器id use `adb shell dumpsys SurfaceFlinger --display-id` to get
+            image_format (str, optional): 传输格式raw/jpeg/png，auto为启动时测试并选择端到端耗时最短的格式. Defaults to "raw".
+            scale (int, optional): 解码时缩小倍数1/2/4/8，jpeg在解码阶段缩小. Defaults to 1.
+            gray (bool, optional): 直接解码为灰度图. Defaults to False.
+            capture_scale (float, optional): 设备端截图缩放比例(0~1]，通过width/height参数请求缩小的画面，匹配结果自动换算回设备坐标. Defaults to 1.0.
+            quality (int, optional): jpeg帧品质1~100，通过quality参数请求，为None时使用DroidCast的默认品质. Defaults to None.
+            host (str, optional): DroidCast地址. Defaults to "127.0.0.1".
+            port (int, optional): 已运行的DroidCast端口，指定时serial可以为None. Defaults to None.
         """
-        if serial not in [device.serial for device in adb.device_list()]:
-            raise ADBDeviceUnFound("设备不存在，请检查是否链接设备成功")
-        self.__adb = adb.device(serial)
+        if image_format != DROIDCAST_FORMAT_AUTO and image_format not in DROIDCAST_FORMATS:
+            raise ValueError(f"image_format must be one of {DROIDCAST_FORMATS} or {DROIDCAST_FORMAT_AUTO}")
+        check_scale(scale)
+        if not 0 < capture_scale <= 1:
+            raise ValueError("capture_scale must be in (0, 1]")
+        if quality is not None and not 1 <= quality <= 100:
+            raise ValueError("quality must be between 1 and 100")
+        self.capture_scale = capture_scale
+        self.quality = quality
+        self.scale = scale
+        self.gray = gray
         self.__class_path = DROIDCAST_APK_ANDROID_PATH
         self.__display_id = display_id
         self.__droidcast_session = requests.Session()
-        self.__droidcast_format = 'raw'
-        self.__install()
-        self.__start()
-        self.width = self.__adb.window_size().width
-        self.height = self.__adb.window_size().height
+        self.__droidcast_format = DROIDCAST_FORMATS[0] if image_format == DROIDCAST_FORMAT_AUTO else image_format
+        self.__droidcast_popen = None
+        self.__host = host
+        self.__attached = port is not None
+        if self.__attached:
+            self.__session = None
+            self.__adb = None
+            self.__droidcast_port = port
+            self.__screen_size = self.__probe_size()
+        else:
+            self.__session = DeviceSession.get(serial)
+            self.__adb = self.__session.device
+            self.__install()
+            self.__start()
+        if image_format == DROIDCAST_FORMAT_AUTO:
+            self.select_format()
+
+    @property
+    def width(self) -> int:
+        width = self.__screen_size.width if self.__attached else self.__session.width
+        return int(width * self.capture_scale)
+
+    @property
+    def height(self) -> int:
+        height = self.__screen_size.height if self.__attached else self.__session.height
+        return int(height * self.capture_scale)
+
+    def __probe_size(self) -> ImageSize:
+        """请求一次原尺寸png截图，读取屏幕尺寸"""
+        url = f"http://{self.__host}:{self.__droidcast_port}/screenshot?format=png"
+        content = self.__droidcast_session.get(url, timeout=3).content
+        height, width = decode_image(content, "png").shape[:2]
+        return ImageSize(width, height)
+
+    @property
+    def frame_scale(self) -> float:
+        return self.capture_scale / self.scale
+
+    @property
+    def image_format(self) -> str:
+        return self.__droidcast_format
+
+    @image_format.setter
+    def image_format(self, image_format: str):
+        if image_format not in DROIDCAST_FORMATS:
+            raise ValueError(f"image_format must be one of {DROIDCAST_FORMATS}")
+        self.__droidcast_format = image_format
+
+    def select_format(self, formats: tuple[str, ...] = DROIDCAST_FORMATS) -> str:
+        """
+        select_format 测试各传输格式截图加解码的耗时，选择最快的格式
+
+        链路变化(例如USB切换到无线)后可以重新调用
+
+        Args:
+            formats (tuple[str, ...], optional): 候选格式. Defaults to ("raw", "jpeg", "png").
+
+        Returns:
+            str: 选中的格式
+        """
+        costs = {}
+        for image_format in formats:
+            self.image_format = image_format
+            samples = []
+            for _ in range(DROIDCAST_FORMAT_PROBE_TIMES):
+                start_time = time.perf_counter()
+                self.screencap()
+                samples.append(time.perf_counter() - start_time)
+            costs[image_format] = statistics.median(samples)
+        self.image_format = min(costs, key=costs.get)
+        logger.info(f"DroidCast format: {self.image_format}; "
+                    + ", ".join(f"{key}={value * 1000:.1f}ms" for key, value in costs.items()))
+        return self.image_format
 
     def __install(self):
         if DROIDCAST_APK_PACKAGE_NAME not in self.__adb.list_packages():
@@ -59,7 +149,16 @@ class DroidCast(ScreenCap):
 
     def __forward_port(self):
         self.__droidcast_port = self.__adb.forward_port(DROIDCAST_PORT)
-        self.__droidcast_url = f"http://localhost:{self.__droidcast_port}/screenshot?format={self.__droidcast_format}"
+
+    @property
+    def url(self) -> str:
+        url = f"http://{self.__host}:{self.__droidcast_port}/screenshot?format={self.__droidcast_format}"
+        if self.capture_scale != 1:
+            # 屏幕旋转后尺寸随session更新
+            url += f"&width={self.width}&height={self.height}"
+        if self.quality is not None and self.__droidcast_format == "jpeg":
+            url += f"&quality={self.quality}"
+        return url
 
     def __start(self):
         self.__start_droidcast()
@@ -68,13 +167,15 @@ class DroidCast(ScreenCap):
         logger.info("DroidCast启动完成")
 
     def __stop(self):
-        if self.__droidcast_popen.poll() is None:
+        if self.__droidcast_popen is not None and self.__droidcast_popen.poll() is None:
             self.__droidcast_popen.kill()  # 关闭管道
 
     def screencap_raw(self) -> bytes:
         try:
-            return self.__droidcast_session.get(self.__droidcast_url, timeout=3).content
+            return self.__droidcast_session.get(self.url, timeout=3).content
         except requests.exceptions.ConnectionError:
+            if self.__attached:
+                raise
             self.__stop()
             self.__start()
             return self.screencap_raw()
@@ -83,12 +184,12 @@ class DroidCast(ScreenCap):
         self.__stop()
 
     def __str__(self) -> str:
-        return "DroidCast-url:{}".format(self.__droidcast_url)
+        return "DroidCast-url:{}".format(self.url)
 
     def screencap(self) -> cv2.Mat:
         raw = self.screencap_raw()
-        arr = np.frombuffer(raw[:self.width * self.height * 4], np.uint8).reshape((self.height, self.width, 4))
-        return cv2.cvtColor(arr, cv2.COLOR_RGBA2BGR)
+        with METRICS.timer("decode", backend="DroidCast", format=self.__droidcast_format):
+            return decode_image(raw, self.__droidcast_format, self.width, self.height, self.scale, self.gray)
 
 if __name__ == '__main__':
     import cv2
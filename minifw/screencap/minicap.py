@@ -1,125 +1,249 @@
 import json
 import socket
+import struct
 import subprocess
 import threading
+import time
+from collections import deque
+from typing import Callable
 
 import cv2
-import numpy as np
-from adbutils import adb
 from loguru import logger
 
-from minifw.common.exception import ADBDeviceUnFound
+from minifw.common import METRICS, DeviceSession, deploy, probe_socket, wait_until
+from minifw.cv.decode import FORMAT_JPEG, FORMAT_RAW, JpegDecoder, check_scale, decode_image
 from minifw.screencap.config import MINICAP_PATH, MINICAPSO_PATH, ADB_EXECUTOR, MNC_HOME, MNC_SO_HOME, MINICAP_COMMAND, \
-    MINICAP_START_TIMEOUT, DEFAULT_HOST
+    MINICAP_START_TIMEOUT, DEFAULT_HOST, MINICAP_FRAME_TIMEOUT, MINICAP_STALL_FACTOR, MINICAP_STALL_MIN_TIMEOUT, \
+    MINICAP_RECONNECT_INTERVAL, MINICAP_RECONNECT_MAX_INTERVAL, MINICAP_FPS_WINDOW, MINICAP_FPS_STALE, \
+    MINICAP_FORMAT_AUTO, MINICAP_FORMATS, MINICAP_DECODE_BUFFERS, MINICAP_FORMAT_PROBE_SIZE, JPEG_SOI
 from minifw.screencap.screencap import ScreenCap
 
 
+def detect_frame_format(head: bytes, raw_length: int) -> str:
+    """
+    detect_frame_format 根据banner后的前6个字节判断帧格式
+
+    JPEG帧以长度前缀和SOI(FFD8)开头；RGBA帧的前4字节是首个像素，alpha通常为255，作为长度时远大于整帧
+
+    Args:
+        head (bytes): banner之后的前6个字节
+        raw_length (int): RGBA帧的长度
+
+    Returns:
+        str: raw或jpeg
+    """
+    size, = struct.unpack_from("<I", head)
+    return FORMAT_JPEG if head[4:6] == JPEG_SOI and size <= raw_length else FORMAT_RAW
+
+
 class MiniCapStream:
-    def __init__(self, host, port) -> None:
+    def __init__(self, host, port, restart: Callable[[], int] = None, stall_timeout: float = None,
+                 image_format: str = MINICAP_FORMAT_AUTO) -> None:
+        """
+        __init__ minicap数据流
+
+        后台线程负责连接和读取，连接断开或超过stall_timeout没有收到新帧时自动重连，
+        重连前调用restart重启minicap服务，重连间隔按指数退避
+
+        Args:
+            host (str): minicap地址
+            port (int): minicap端口
+            restart (Callable[[], int], optional): 重启minicap服务并返回新端口，为None时直接重连原端口. Defaults to None.
+            stall_timeout (float, optional): 超过该时间(秒)没有新帧视为卡死，为None时不检测. Defaults to None.
+            image_format (str, optional): 帧格式，raw为修改版minicap输出的定长RGBA帧，jpeg为原版minicap带长度前缀的JPEG帧，
+                auto根据第一帧判断. Defaults to "auto".
+        """
+        if image_format != MINICAP_FORMAT_AUTO and image_format not in MINICAP_FORMATS:
+            raise ValueError(f"image_format must be one of {MINICAP_FORMATS} or {MINICAP_FORMAT_AUTO}")
         self.sock = None
         self.host = host
         self.port = port
+        self.restart = restart
+        self.stall_timeout = stall_timeout
+        self.image_format = image_format
+        # 实际的帧格式，auto时在读取第一帧后确定
+        self.frame_format = None if image_format == MINICAP_FORMAT_AUTO else image_format
         self.data = None
+        # 当前连接是否已收到帧，连接断开后置为False，旧帧不再返回
+        self.__live = False
+        self.banner = {}
+        self.__raw_length = 0
+        # 累计帧数和重连次数
+        self.frames = 0
+        self.reconnects = 0
+        self.__frame_times: deque[float] = deque(maxlen=MINICAP_FPS_WINDOW)
         self.stop_event = threading.Event()
-        self.thread = threading.Thread(target=self.read_stream, daemon=True)
+        self.thread = threading.Thread(target=self.__supervise, daemon=True)
         self.data_available = threading.Condition()
 
     def start(self):
-        try:
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.sock.connect((self.host, self.port))
-        except ConnectionRefusedError:
-            logger.error(
-                f"Be sure to run `adb forward tcp:{self.port} localabstract:minicap`")
-            return
-
         self.thread.start()
 
-    def read_stream(self):
-        banner = {
-            'version': 0,
-            'length': 0,
-            'pid': 0,
-            'realWidth': 0,
-            'realHeight': 0,
-            'virtualWidth': 0,
-            'virtualHeight': 0,
-            'orientation': 0,
-            'quirks': 0
-        }
-
-        read_banner_bytes = 0
-        banner_length = 2
-        read_frame_bytes = 0
-        frame_body_length = 0
-        frame_body = bytearray()
-        max_buf_size = 4096
+    def __connect(self):
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.stall_timeout)
 
+    def __supervise(self):
+        interval = MINICAP_RECONNECT_INTERVAL
         while not self.stop_event.is_set():
-            chunk = self.sock.recv(max_buf_size)
-            if not chunk:
+            frames = self.frames
+            stalled = False
+            try:
+                self.__connect()
+                self.read_stream()
+                reason = "stream closed"
+            except socket.timeout:
+                stalled = True
+                reason = f"no frame in {self.stall_timeout}s"
+            except OSError as e:
+                reason = str(e)
+            finally:
+                self.__close_socket()
+                self.__invalidate()
+            if self.stop_event.is_set():
+                break
+            self.reconnects += 1
+            METRICS.inc("minicap_reconnects")
+            if stalled and self.frames > frames:
+                # 画面静止时minicap不发送新帧，先直接重连，连接后minicap会立即发送当前帧
+                logger.debug(f"minicap stream idle ({reason}), reconnect")
+                interval = MINICAP_RECONNECT_INTERVAL
+                continue
+            logger.warning(f"minicap stream lost ({reason}), restart in {interval:.1f}s")
+            if self.stop_event.wait(interval):
                 break
+            interval = min(interval * 2, MINICAP_RECONNECT_MAX_INTERVAL)
+            if self.restart is not None:
+                try:
+                    self.port = self.restart()
+                except Exception as e:
+                    logger.error(f"minicap restart failed: {e}")
+
+    def __recv_exactly(self, size: int) -> bytearray:
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        received = 0
+        while received < size:
+            count = self.sock.recv_into(view[received:])
+            if count == 0:
+                raise EOFError
+            received += count
+        return buffer
+
+    def __read_banner(self):
+        # 版本(1) 长度(1) pid(4) 真实宽高(4*2) 虚拟宽高(4*2) 方向(1) quirks(1)
+        version, banner_length = self.__recv_exactly(2)
+        banner = bytes(self.__recv_exactly(banner_length - 2))
+        pid, real_width, real_height, virtual_width, virtual_height = struct.unpack_from("<5I", banner)
+        self.banner = {
+            'version': version,
+            'length': banner_length,
+            'pid': pid,
+            'realWidth': real_width,
+            'realHeight': real_height,
+            'virtualWidth': virtual_width,
+            'virtualHeight': virtual_height,
+            'orientation': banner[20] * 90,
+            'quirks': banner[21],
+        }
+        logger.info(f"banner {self.banner}", )
+        self.__raw_length = virtual_width * virtual_height * 4
+
+    def __read_frame(self) -> bytearray:
+        if self.frame_format == FORMAT_JPEG:
+            # 长度(4) JPEG数据
+            size, = struct.unpack("<I", self.__recv_exactly(4))
+            return self.__recv_exactly(size)
+        return self.__recv_exactly(self.__raw_length)
+
+    def __read_first_frame(self) -> bytearray:
+        if self.image_format != MINICAP_FORMAT_AUTO:
+            return self.__read_frame()
+        head = self.__recv_exactly(MINICAP_FORMAT_PROBE_SIZE)
+        self.frame_format = detect_frame_format(head, self.__raw_length)
+        if self.frame_format == FORMAT_JPEG:
+            size, = struct.unpack_from("<I", head)
+            return head[4:] + self.__recv_exactly(size - 2)
+        return head + self.__recv_exactly(self.__raw_length - len(head))
+
+    def __publish(self, frame: bytearray):
+        self.frames += 1
+        self.__frame_times.append(time.monotonic())
+        with self.data_available:
+            self.data = frame
+            self.__live = True
+            self.data_available.notify_all()  # 通知等待的线程
+
+    def __invalidate(self):
+        """连接断开，保存的帧可能已经过时"""
+        with self.data_available:
+            self.__live = False
+
+    def read_stream(self):
+        """从self.sock读取banner和帧，直到连接关闭或停止"""
+        try:
+            self.__read_banner()
+            self.__publish(self.__read_first_frame())
+            while not self.stop_event.is_set():
+                self.__publish(self.__read_frame())
+        except EOFError:
+            pass
+
+    def read_frame(self) -> bytes:
+        """
+        read_frame 单独连接一次，读取当前帧后断开，不需要启动后台线程
 
-            # logger.info(f"chunk(length={len(chunk)})", )
-            cursor = 0
-            while cursor < len(chunk):
-                if read_banner_bytes < banner_length:
-                    if read_banner_bytes == 0:
-                        banner['version'] = chunk[cursor]
-                    elif read_banner_bytes == 1:
-                        banner['length'] = banner_length = chunk[cursor]
-                    elif 2 <= read_banner_bytes <= 5:
-                        banner['pid'] += (chunk[cursor] <<
-                                          ((read_banner_bytes - 2) * 8)) & 0xFFFFFFFF
-                    elif 6 <= read_banner_bytes <= 9:
-                        banner['realWidth'] += (chunk[cursor] <<
-                                                ((read_banner_bytes - 6) * 8)) & 0xFFFFFFFF
-                    elif 10 <= read_banner_bytes <= 13:
-                        banner['realHeight'] += (chunk[cursor] <<
-                                                 ((read_banner_bytes - 10) * 8)) & 0xFFFFFFFF
-                    elif 14 <= read_banner_bytes <= 17:
-                        banner['virtualWidth'] += (chunk[cursor] <<
-                                                   ((read_banner_bytes - 14) * 8)) & 0xFFFFFFFF
-                    elif 18 <= read_banner_bytes <= 21:
-                        banner['virtualHeight'] += (chunk[cursor] <<
-                                                    ((read_banner_bytes - 18) * 8)) & 0xFFFFFFFF
-                    elif read_banner_bytes == 22:
-                        banner['orientation'] = chunk[cursor] * 90
-                    elif read_banner_bytes == 23:
-                        banner['quirks'] = chunk[cursor]
-
-                    cursor += 1
-                    read_banner_bytes += 1
-
-                    if read_banner_bytes == banner_length:
-                        logger.info(f"banner {banner}", )
-                else:
-                    max_buf_size = frame_body_length
-                    if len(chunk) - cursor >= frame_body_length:
-                        frame_body.extend(chunk[cursor:cursor + frame_body_length])
-                        with self.data_available:
-                            self.data = frame_body
-                            self.data_available.notify_all()  # 通知等待的线程
-                        cursor += frame_body_length
-                        read_frame_bytes = 0
-                        frame_body_length = banner['virtualWidth'] * banner['virtualHeight'] * 4
-                        frame_body = bytearray()
-                    else:
-                        frame_body.extend(chunk[cursor:])
-                        frame_body_length -= len(chunk) - cursor
-                        read_frame_bytes += len(chunk) - cursor
-                        cursor = len(chunk)
+        minicap只在有客户端连接时截图编码，服务常驻时每次截图只需一次端口连接，不再需要每帧启动adb shell
+
+        Returns:
+            bytes: 帧数据，格式见frame_format
+        """
+        try:
+            self.__connect()
+            self.__read_banner()
+            frame = bytes(self.__read_first_frame())
+        except EOFError:
+            raise ConnectionError("minicap closed before sending a frame")
+        finally:
+            self.__close_socket()
+        self.frames += 1
+        return frame
+
+    @property
+    def fps(self) -> float:
+        """最近若干帧的平均帧率"""
+        frame_times = list(self.__frame_times)
+        if len(frame_times) < 2 or time.monotonic() - frame_times[-1] > MINICAP_FPS_STALE:
+            return 0.0
+        return (len(frame_times) - 1) / (frame_times[-1] - frame_times[0])
+
+    def __close_socket(self):
+        sock, self.sock = self.sock, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
 
     def stop(self):
         logger.info("Stopping the stream")
         self.stop_event.set()
-        self.sock.close()
-        self.thread.join()
+        self.__close_socket()
+        if self.thread.is_alive():
+            self.thread.join()
 
-    def next_image(self):
+    def next_image(self, timeout: float = None):
+        """
+        next_image 获取最新帧
+
+        连接断开后不返回断开前的旧帧，等待重连后的新帧，超时仍没有新帧时抛出TimeoutError
+
+        Args:
+            timeout (float, optional): 没有可用帧时的最长等待时间(秒)，为None时一直等待. Defaults to None.
+        """
         with self.data_available:
-            while self.data is None or len(self.data) == 0:
-                self.data_available.wait()  # 等待数据可用
+            if not self.data_available.wait_for(lambda: self.__live and self.data, timeout):
+                raise TimeoutError("minicap frame timeout")
             return self.data
 
 
@@ -136,52 +260,94 @@ class MiniCap(ScreenCap):
             skip_frame=True,
             use_stream=True,
             host=DEFAULT_HOST,
+            scale=1,
+            gray=False,
+            capture_scale=1.0,
+            image_format=MINICAP_FORMAT_AUTO,
+            reuse_buffer=False,
+            port=None,
     ):
         """
         __init__ minicap截图方式
 
+        屏幕方向变化时自动按新方向重启minicap。方向检测默认不开启，需要时调用
+        DeviceSession.get(serial).start_watch() 后台定时检查，或在旋转后手动调用 refresh()。
+        指定port时直接连接host:port上已运行的minicap(例如FakeMiniCapServer)，不使用adb，
+        画面尺寸从banner读取，不安装、不启动也不重启服务
+
         Args:
             serial (str): 设备id
             rate (int, optional): 截图帧率. Defaults to 自动获取.
-            quality (int, optional): 截图品质1~100之间. Defaults to 100.
+            quality (int, optional): jpeg帧品质1~100之间. Defaults to 100.
             skip_frame(bool,optional): 当无法快速获得截图时，跳过这个帧
-            use_stream (bool, optional): 是否使用stream的方式. Defaults to True.
+            use_stream (bool, optional): 是否使用stream的方式，stream在后台持续接收帧，否则每次截图单独连接一次常驻的minicap服务. Defaults to True.
             host (str, "127.0.0.1"): 链接minicap地址
+            scale (int, optional): 解码时缩小倍数1/2/4/8，jpeg在解码阶段缩小. Defaults to 1.
+            gray (bool, optional): 直接解码为灰度图. Defaults to False.
+            capture_scale (float, optional): 设备端截图缩放比例(0~1]，minicap直接输出缩小的画面，匹配结果自动换算回设备坐标. Defaults to 1.0.
+            image_format (str, optional): 帧格式raw/jpeg，auto根据minicap输出的第一帧判断. Defaults to "auto".
+            reuse_buffer (bool, optional): jpeg帧解码到循环使用的缓冲区，返回的图像在之后2次截图内有效. Defaults to False.
+            port (int, optional): 已运行的minicap端口，指定时serial可以为None. Defaults to None.
         """
-        if serial not in [device.serial for device in adb.device_list()]:
-            raise ADBDeviceUnFound("设备不存在，请检查是否链接设备成功")
-        self.__adb = adb.device(serial)
+        self.__minicap_popen = None
+        check_scale(scale)
+        if not 0 < capture_scale <= 1:
+            raise ValueError("capture_scale must be in (0, 1]")
+        self.capture_scale = capture_scale
+        self.scale = scale
+        self.gray = gray
+        self.__image_format = image_format
+        self.__jpeg_decoder = JpegDecoder(scale, gray, MINICAP_DECODE_BUFFERS if reuse_buffer else 0)
+        self.__minicap_stream: MiniCapStream | None = None
         self.__skip_frame = skip_frame
         self.__use_stream = use_stream
         self.__quality = quality
         self.__rate = rate
         self.__host = host
+        self.__attached = port is not None
+        if self.__attached:
+            self.__session = None
+            self.__adb = None
+            self.__port = port
+            self.__attach_minicap()
+            return
+        self.__session = DeviceSession.get(serial)
+        self.__adb = self.__session.device
         self.__get_device_info()
 
         self.__minicap_kill()
         self.__minicap_install()
         self.__get_device_input_info()
-        if self.__use_stream:
-            self.__start_minicap_by_stream()
+        self.__start_minicap_by_stream()
+        # 屏幕旋转后重建投影，需要调用 DeviceSession.start_watch 或 refresh 检测变化
+        self.__session.add_listener(self.__update_display)
 
     def screencap_raw(self) -> bytes:
         if self.__use_stream:
-            return self.__minicap_stream.next_image()
+            return self.__minicap_stream.next_image(MINICAP_FRAME_TIMEOUT)
         else:
             return self.__minicap_frame()
 
     def __minicap_frame(self):
-        adb_command = MINICAP_COMMAND + []
-        adb_command.extend(
-            ["-P", f"{self.__vm_size}@{self.__vm_size}/{self.__rotation}"])
-        adb_command.extend(["-Q", str(self.__quality)])
-        adb_command.extend(["-s"])
-        raw_data = self.__adb.shell(adb_command, encoding=None)
-        jpg_data = raw_data.split(b"for JPG encoder\n")[-1]
-        return jpg_data
+        try:
+            return self.__minicap_stream.read_frame()
+        except OSError as e:
+            logger.warning(f"minicap read failed ({e}), restart")
+            self.__minicap_stream.port = self.restart_server()
+            return self.__minicap_stream.read_frame()
 
     def __minicap_kill(self):
-        self.__adb.shell(['pkill', '-9', 'minicap'])
+        if self.__adb is not None:
+            self.__adb.shell(['pkill', '-9', 'minicap'])
+
+    def __attach_minicap(self):
+        """连接已运行的minicap，单独读取一帧获取banner中的画面尺寸"""
+        self.__read_minicap_stream()
+        self.__minicap_stream.read_frame()
+        self.width = self.__minicap_stream.banner['virtualWidth']
+        self.height = self.__minicap_stream.banner['virtualHeight']
+        if self.__use_stream:
+            self.__minicap_stream.start()
 
     def __get_device_input_info(self):
         try:
@@ -197,18 +363,39 @@ class MiniCap(ScreenCap):
             else:
                 raise MiniCapUnSupportError("minicap does not support")
             info = json.loads(extracted_json)
-            self.__vm_size = self.__adb.shell("wm size").split(" ")[-1]
-            self.__rotation = info.get("rotation")
+            self.__update_projection(info.get("rotation"))
             self.__rate = info.get(
                 "fps") if self.__rate is None else self.__rate
         except Exception as e:
             raise MiniCapUnSupportError("minicap does not support")
 
     def __get_device_info(self):
-        self.__abi = self.__adb.getprop("ro.product.cpu.abi")
-        self.__sdk = self.__adb.getprop("ro.build.version.sdk")
-        self.width = self.__adb.window_size().width
-        self.height = self.__adb.window_size().height
+        self.__abi = self.__session.abi
+        self.__sdk = self.__session.sdk
+        self.__update_size()
+
+    def __update_size(self):
+        self.width = int(self.__session.width * self.capture_scale)
+        self.height = int(self.__session.height * self.capture_scale)
+
+    def __update_projection(self, rotation: int):
+        """minicap -P 参数：真实尺寸@输出尺寸/方向(角度)，尺寸按自然方向，旋转后minicap输出旋转后的画面"""
+        self.__vm_size = self.__session.wm_size
+        vm_width, vm_height = map(int, self.__vm_size.split("x"))
+        self.__virtual_size = f"{int(vm_width * self.capture_scale)}x{int(vm_height * self.capture_scale)}"
+        self.__rotation = rotation
+
+    def __update_display(self, session: DeviceSession):
+        """屏幕方向或尺寸变化后按新的投影参数重启minicap"""
+        if self.__use_stream:
+            # 先停止服务使数据流断开，旧方向的帧不再返回，数据流重连时按新参数重启服务
+            self.stop_server()
+            self.__minicap_kill()
+        self.__update_size()
+        self.__update_projection(session.rotation * 90)
+        logger.info(f"minicap projection changed: {self.__vm_size}@{self.__virtual_size}/{self.__rotation}")
+        if not self.__use_stream:
+            self.__minicap_stream.port = self.restart_server()
 
     def __minicap_install(self):
         """安装minicap"""
@@ -216,11 +403,10 @@ class MiniCap(ScreenCap):
             self.__abi = "x86"
         if int(self.__sdk) > 34:
             raise MiniCapUnSupportError("minicap does not support Android 12+")
-        self.__adb.sync.push(f"{MINICAP_PATH}/{self.__abi}/minicap", MNC_HOME)
-        self.__adb.sync.push(
-            f"{MINICAPSO_PATH}/android-{self.__sdk}/{self.__abi}/minicap.so", MNC_SO_HOME
-        )
-        self.__adb.shell(["chmod +x", MNC_HOME])
+        deploy(self.__adb, [
+            (f"{MINICAP_PATH}/{self.__abi}/minicap", MNC_HOME),
+            (f"{MINICAPSO_PATH}/android-{self.__sdk}/{self.__abi}/minicap.so", MNC_SO_HOME),
+        ])
 
     def __start_minicap(self):
         adb_command = [ADB_EXECUTOR]
@@ -229,7 +415,7 @@ class MiniCap(ScreenCap):
         adb_command.extend(["shell"])
         adb_command.extend(MINICAP_COMMAND)
         adb_command.extend(
-            ["-P", f"{self.__vm_size}@{self.__vm_size}/{self.__rotation}"])
+            ["-P", f"{self.__vm_size}@{self.__virtual_size}/{self.__rotation}"])
         adb_command.extend(["-Q", str(self.__quality)])
         adb_command.extend(["-r", str(self.__rate)])
         if self.__skip_frame:
@@ -238,39 +424,96 @@ class MiniCap(ScreenCap):
         self.__minicap_popen = subprocess.Popen(
             adb_command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
         )
-        logger.info("minicap connection takes a long time, please be patient.")
-        for i in range(MINICAP_START_TIMEOUT):
-            logger.info("minicap starting by {}s".format(
-                MINICAP_START_TIMEOUT - i))
-            time.sleep(1)
         return True
 
+    def __minicap_ready(self) -> bytes | None:
+        if self.__minicap_popen.poll() is not None:
+            raise MiniCapUnSupportError("minicap exited unexpectedly")
+        # 版本(1) 长度(1)
+        return probe_socket(self.__host, self.__port, 2)
+
+    def __wait_minicap_ready(self):
+        """轮询转发端口直到minicap输出banner"""
+        start_time = time.monotonic()
+        if not wait_until(self.__minicap_ready, MINICAP_START_TIMEOUT):
+            raise TimeoutError(f"minicap not ready after {MINICAP_START_TIMEOUT}s")
+        logger.info(f"minicap ready in {(time.monotonic() - start_time) * 1000:.0f}ms")
+
     def __forward_minicap(self):
         self.__port = self.__adb.forward_port("localabstract:minicap")
 
     def __read_minicap_stream(self):
-        self.__minicap_stream = MiniCapStream(
-            self.__host, self.__port)
-        self.__minicap_stream.start()
+        # 超过期望帧间隔的若干倍仍没有新帧视为卡死
+        stall_timeout = max(MINICAP_STALL_FACTOR / self.__rate, MINICAP_STALL_MIN_TIMEOUT) \
+            if self.__rate else MINICAP_STALL_MIN_TIMEOUT
+        self.__minicap_stream = MiniCapStream(self.__host, self.__port,
+                                              restart=None if self.__attached else self.restart_server,
+                                              stall_timeout=stall_timeout, image_format=self.__image_format)
+        if self.__use_stream and not self.__attached:
+            self.__minicap_stream.start()
+
+    @property
+    def stream(self) -> MiniCapStream | None:
+        """minicap数据流，可读取fps、frames、reconnects"""
+        return self.__minicap_stream if self.__use_stream else None
+
+    def restart_server(self) -> int:
+        """重启minicap服务并重新转发端口，返回新端口"""
+        self.stop_server()
+        self.__minicap_kill()
+        return self.start_server()
 
-    def __start_minicap_by_stream(self):
+    @property
+    def port(self) -> int:
+        """minicap转发到本地的端口"""
+        return self.__port
+
+    def start_server(self) -> int:
+        """
+        start_server 启动minicap服务并转发端口，不建立连接，服务已在运行或连接的是指定端口时直接返回端口
+
+        Returns:
+            int: 本地转发端口
+        """
+        if self.__attached:
+            return self.__port
+        if self.__minicap_popen is not None and self.__minicap_popen.poll() is None:
+            return self.__port
         self.__start_minicap()
         self.__forward_minicap()
+        self.__wait_minicap_ready()
+        return self.__port
+
+    def stop_server(self):
+        """停止minicap服务"""
+        if self.__minicap_popen is not None and self.__minicap_popen.poll() is None:  # 清理管道
+            self.__minicap_popen.kill()
+
+    def __start_minicap_by_stream(self):
+        self.start_server()
         self.__read_minicap_stream()
 
     def __stop_minicap_by_stream(self):
-        if self.__use_stream:
+        if self.__use_stream and self.__minicap_stream is not None:
             self.__minicap_stream.stop()  # 停止stream
-            if self.__minicap_popen.poll() is None:  # 清理管道
-                self.__minicap_popen.kill()
+        self.stop_server()
 
     def __del__(self):
         self.__stop_minicap_by_stream()
 
+    @property
+    def frame_scale(self) -> float:
+        return self.capture_scale / self.scale
+
     def screencap(self) -> cv2.Mat:
-        raw = self.screencap_raw()
-        arr = np.frombuffer(raw[:self.width * self.height * 4], np.uint8).reshape((self.height, self.width, 4))
-        return cv2.cvtColor(arr, cv2.COLOR_RGBA2BGR)
+        return self.decode(self.screencap_raw(), self.__minicap_stream.frame_format)
+
+    def decode(self, raw: bytes, image_format: str) -> cv2.Mat:
+        """按帧格式解码minicap帧，应用scale和gray设置"""
+        with METRICS.timer("decode", backend="MiniCap", format=image_format):
+            if image_format == FORMAT_JPEG:
+                return self.__jpeg_decoder.decode(raw)
+            return decode_image(raw, FORMAT_RAW, self.width, self.height, self.scale, self.gray)
 
 if __name__ == '__main__':
 
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import cv2
+from loguru import logger
+
+from minifw.screencap.screencap import ScreenCap
+
+# 截图失败后重试前的等待时间(秒)
+PREFETCH_RETRY_DELAY = 0.5
+
+
+class PrefetchScreenCap(ScreenCap):
+    def __init__(self, screencap_method: ScreenCap, interval: int = 0, timeout: float = 10) -> None:
+        """
+        __init__ 后台连续截图
+
+        在独立线程中循环调用截图后端，只保留最新的一帧，screencap直接返回最新帧而不等待截图。
+        适合单次截图耗时较长的ADBCap、DroidCast；MiniCap等流式后端本身就能立即返回，建议设置interval
+
+        Args:
+            screencap_method (ScreenCap): 实际的截图后端
+            interval (int, optional): 两次截图之间的间隔(毫秒). Defaults to 0.
+            timeout (float, optional): 等待首帧或新帧的超时时间(秒). Defaults to 10.
+        """
+        self.screencap_method = screencap_method
+        self.interval = interval / 1000
+        self.timeout = timeout
+        # (seq, frame) 单槽缓存，写入时整体替换引用，读取无需加锁
+        self.__slot: tuple[int, cv2.Mat] | None = None
+        self.__new_frame = threading.Condition()
+        self.__stop_event = threading.Event()
+        self.__thread: threading.Thread | None = None
+        self.start()
+
+    def start(self):
+        if self.__thread is not None and self.__thread.is_alive():
+            return
+        self.__stop_event.clear()
+        self.__thread = threading.Thread(target=self.__capture_loop, daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        self.__stop_event.set()
+        if self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join()
+        self.__thread = None
+
+    def __capture_loop(self):
+        seq = 0
+        while not self.__stop_event.is_set():
+            try:
+                frame = self.screencap_method.screencap()
+            except Exception as e:
+                logger.warning(f"prefetch screencap failed: {e}")
+                self.__stop_event.wait(PREFETCH_RETRY_DELAY)
+                continue
+            seq += 1
+            self.__slot = (seq, frame)
+            with self.__new_frame:
+                self.__new_frame.notify_all()
+            if self.interval:
+                self.__stop_event.wait(self.interval)
+
+    def get_frame(self, after_seq: int = 0) -> tuple[int, cv2.Mat]:
+        """
+        get_frame 获取最新帧
+
+        Args:
+            after_seq (int, optional): 只返回序号大于after_seq的帧，用于等待操作之后的新画面. Defaults to 0.
+
+        Returns:
+            tuple[int, cv2.Mat]: (帧序号, 图像)
+        """
+        slot = self.__slot
+        if slot is not None and slot[0] > after_seq:
+            return slot
+        with self.__new_frame:
+            if not self.__new_frame.wait_for(
+                    lambda: self.__slot is not None and self.__slot[0] > after_seq, self.timeout):
+                raise TimeoutError("prefetch screencap timeout")
+            return self.__slot
+
+    @property
+    def frame_scale(self) -> float:
+        return self.screencap_method.frame_scale
+
+    def screencap_raw(self) -> bytes:
+        return self.screencap().tobytes()
+
+    def screencap(self) -> cv2.Mat:
+        return self.get_frame()[1]
@@ -0,0 +1,187 @@
+import json
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from minifw.screencap.config import ARCHIVE_FRAMES_FILE, ARCHIVE_INDEX_FILE, ARCHIVE_META_FILE
+from minifw.screencap.screencap import ScreenCap
+
+
+def channel_format(shape: tuple[int, ...]) -> str:
+    """根据帧的shape判断通道格式: GRAY/BGR/BGRA"""
+    if len(shape) == 2 or shape[2] == 1:
+        return "GRAY"
+    return "BGRA" if shape[2] == 4 else "BGR"
+
+
+class FrameArchive:
+    def __init__(self, path: str) -> None:
+        """
+        __init__ 帧存档
+
+        存档为一个目录：meta.json记录帧尺寸、通道格式和截图缩放比例，frames.raw为连续存放的定长帧，index.bin为每帧的时间戳。
+        帧数以两个文件中较短的为准，录制中途中断也能读取已写入的帧
+
+        Args:
+            path (str): 存档目录
+        """
+        self.path = path
+        with open(os.path.join(path, ARCHIVE_META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.shape: tuple[int, ...] = tuple(meta["shape"])
+        # 旧存档没有记录时按shape判断，缩放比例为1
+        self.format: str = meta.get("format") or channel_format(self.shape)
+        self.frame_scale: float = meta.get("frame_scale", 1.0)
+        self.frame_size = int(np.prod(self.shape))
+        frames_path = os.path.join(path, ARCHIVE_FRAMES_FILE)
+        index_path = os.path.join(path, ARCHIVE_INDEX_FILE)
+        timestamps = np.fromfile(index_path, dtype=np.float64) if os.path.exists(index_path) else np.empty(0)
+        count = min(os.path.getsize(frames_path) // self.frame_size, len(timestamps))
+        self.timestamps = timestamps[:count]
+        # 只读映射，取帧为视图，不复制不解码
+        self.frames = np.memmap(frames_path, dtype=np.uint8, mode="r", shape=(count, *self.shape)) \
+            if count else np.empty((0, *self.shape), dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, index: int) -> cv2.Mat:
+        return self.frames[index]
+
+    @staticmethod
+    def create(path: str, shape: tuple[int, ...], frame_scale: float = 1.0):
+        os.makedirs(path, exist_ok=True)
+        meta = {"shape": list(shape), "dtype": "uint8", "format": channel_format(shape), "frame_scale": frame_scale}
+        with open(os.path.join(path, ARCHIVE_META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        # 新建存档时清空旧数据
+        for name in (ARCHIVE_FRAMES_FILE, ARCHIVE_INDEX_FILE):
+            open(os.path.join(path, name), "wb").close()
+
+
+class RecordScreenCap(ScreenCap):
+    def __init__(self, screencap_method: ScreenCap, path: str) -> None:
+        """
+        __init__ 录制截图
+
+        透明包装任意截图后端，每次screencap都把帧追加到存档，返回值与原后端一致
+
+        Args:
+            screencap_method (ScreenCap): 实际的截图后端
+            path (str): 存档目录，已存在的存档会被覆盖
+        """
+        self.screencap_method = screencap_method
+        self.path = path
+        self.shape: tuple[int, ...] | None = None
+        self.count = 0
+        self.__frames_file = None
+        self.__index_file = None
+        self.__lock = threading.Lock()
+
+    def __record(self, frame: cv2.Mat):
+        with self.__lock:
+            if self.__frames_file is None:
+                self.shape = frame.shape
+                FrameArchive.create(self.path, frame.shape, self.screencap_method.frame_scale)
+                self.__frames_file = open(os.path.join(self.path, ARCHIVE_FRAMES_FILE), "ab")
+                self.__index_file = open(os.path.join(self.path, ARCHIVE_INDEX_FILE), "ab")
+            elif frame.shape != self.shape:
+                raise ValueError(f"frame shape changed from {self.shape} to {frame.shape}")
+            # 先写帧再写时间戳，读取时以较短者为准
+            self.__frames_file.write(np.ascontiguousarray(frame, dtype=np.uint8).data)
+            self.__index_file.write(np.float64(time.time()).tobytes())
+            self.count += 1
+
+    @property
+    def frame_scale(self) -> float:
+        return self.screencap_method.frame_scale
+
+    def screencap_raw(self) -> bytes:
+        return self.screencap().tobytes()
+
+    def screencap(self) -> cv2.Mat:
+        frame = self.screencap_method.screencap()
+        self.__record(frame)
+        return frame
+
+    def flush(self):
+        with self.__lock:
+            if self.__frames_file is not None:
+                self.__frames_file.flush()
+                self.__index_file.flush()
+
+    def close(self):
+        with self.__lock:
+            if self.__frames_file is not None:
+                self.__frames_file.close()
+                self.__index_file.close()
+                self.__frames_file = self.__index_file = None
+
+    def __del__(self):
+        self.close()
+
+
+class ReplayScreenCap(ScreenCap):
+    def __init__(self, path: str, realtime: bool = False, loop: bool = False) -> None:
+        """
+        __init__ 回放截图
+
+        按顺序返回存档中的帧，帧为np.memmap的只读视图，需要修改时请先copy。
+        通道格式(gray)和frame_scale与录制时的后端一致
+
+        Args:
+            path (str): 存档目录
+            realtime (bool, optional): 按录制时的时间间隔回放，为False时全速回放. Defaults to False.
+            loop (bool, optional): 回放结束后从头开始，为False时抛出EOFError. Defaults to False.
+        """
+        self.archive = FrameArchive(path)
+        if not len(self.archive):
+            raise ValueError(f"archive {path} is empty")
+        self.realtime = realtime
+        self.loop = loop
+        self.position = 0
+        self.height, self.width = self.archive.shape[:2]
+        self.gray = self.archive.format == "GRAY"
+        self.__start: tuple[float, float] | None = None
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.archive)
+
+    @property
+    def frame_scale(self) -> float:
+        return self.archive.frame_scale
+
+    def seek(self, position: int):
+        with self.__lock:
+            self.position = position
+            self.__start = None
+
+    def __next_index(self) -> int:
+        with self.__lock:
+            if self.position >= len(self.archive):
+                if not self.loop:
+                    raise EOFError("回放结束")
+                self.position = 0
+                self.__start = None
+            index = self.position
+            self.position += 1
+            if self.realtime:
+                if self.__start is None:
+                    self.__start = (time.monotonic(), self.archive.timestamps[index])
+                start_time, start_timestamp = self.__start
+                delay = self.archive.timestamps[index] - start_timestamp - (time.monotonic() - start_time)
+            else:
+                delay = 0
+        if delay > 0:
+            time.sleep(delay)
+        return index
+
+    def screencap_raw(self) -> bytes:
+        return self.screencap().tobytes()
+
+    def screencap(self) -> cv2.Mat:
+        return self.archive[self.__next_index()]
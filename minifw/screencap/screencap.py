@@ -11,6 +11,11 @@ class ScreenCap(ABC):
     def screencap(self) -> cv2.Mat:
         """截图opencv格式(未进行编码的图像)"""
 
+    @property
+    def frame_scale(self) -> float:
+        """截图像素与设备坐标的比例，截图被缩小时小于1"""
+        return 1.0
+
     def save_screencap(self, filename="screencap.png"):
         """
         save_screencap 保存截图
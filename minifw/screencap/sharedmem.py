@@ -0,0 +1,246 @@
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from minifw.screencap.config import SHARED_MEMORY_ALIGN, SHARED_MEMORY_MAGIC, SHARED_MEMORY_POLL_INTERVAL
+from minifw.screencap.screencap import ScreenCap
+
+# 头部字段(int64)
+_MAGIC, _HEIGHT, _WIDTH, _CHANNELS, _SLOTS, _LATEST = range(6)
+_HEADER_FIELDS = 8
+
+
+def _layout(slots: int) -> tuple[int, int]:
+    """返回 (槽序号数组偏移, 帧数据偏移)"""
+    seqs_offset = _HEADER_FIELDS * 8
+    data_offset = seqs_offset + slots * 8
+    data_offset += -data_offset % SHARED_MEMORY_ALIGN
+    return seqs_offset, data_offset
+
+
+class _FrameRing:
+    """共享内存中的帧环形缓冲区，publisher和subscriber共用同一布局"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, shape: tuple[int, int, int], slots: int) -> None:
+        self.shm = shm
+        self.shape = shape
+        self.slots = slots
+        seqs_offset, data_offset = _layout(slots)
+        self.header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        # 槽序号：写入中为奇数，写完为偶数(帧序号*2)
+        self.seqs = np.ndarray((slots,), dtype=np.int64, buffer=shm.buf, offset=seqs_offset)
+        self.frames = np.ndarray((slots, *shape), dtype=np.uint8, buffer=shm.buf, offset=data_offset)
+
+    @staticmethod
+    def size(shape: tuple[int, int, int], slots: int) -> int:
+        return _layout(slots)[1] + slots * int(np.prod(shape))
+
+    def release(self):
+        self.header = self.seqs = self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # 调用方仍持有帧视图，映射在视图释放后由gc回收
+            logger.warning(f"shared memory {self.shm.name} still has exported frames")
+
+
+class SharedMemoryPublisher(ScreenCap):
+    def __init__(self, screencap_method: ScreenCap, name: str, slots: int = 4) -> None:
+        """
+        __init__ 共享内存帧发布者
+
+        包装任意截图后端，每次screencap都把帧写入共享内存环形缓冲区，其他进程通过SharedMemorySubscriber读取。
+        共享内存在第一次截图时按帧尺寸创建
+
+        Args:
+            screencap_method (ScreenCap): 实际的截图后端
+            name (str): 共享内存名称，subscriber使用相同名称连接
+            slots (int, optional): 环形缓冲区槽数，subscriber持有的帧视图在之后slots-1次发布内有效. Defaults to 4.
+        """
+        if slots < 2:
+            raise ValueError("slots must be at least 2")
+        self.screencap_method = screencap_method
+        self.name = name
+        self.slots = slots
+        self.seq = 0
+        self.__ring: _FrameRing | None = None
+        self.__lock = threading.Lock()
+        self.__stop_event = threading.Event()
+
+    def __create(self, shape: tuple[int, int, int]):
+        shm = shared_memory.SharedMemory(self.name, create=True, size=_FrameRing.size(shape, self.slots))
+        ring = _FrameRing(shm, shape, self.slots)
+        ring.seqs[:] = 0
+        ring.header[:] = 0
+        ring.header[_HEIGHT], ring.header[_WIDTH], ring.header[_CHANNELS] = shape
+        ring.header[_SLOTS] = self.slots
+        # 最后写入magic，subscriber据此判断头部已就绪
+        ring.header[_MAGIC] = SHARED_MEMORY_MAGIC
+        self.__ring = ring
+        logger.info(f"shared memory {self.name} created: {shape} x {self.slots}")
+
+    def publish(self, frame: cv2.Mat) -> int:
+        """
+        publish 写入一帧
+
+        Args:
+            frame (cv2.Mat): 图像
+
+        Returns:
+            int: 帧序号
+        """
+        if frame.ndim == 2:
+            frame = frame[:, :, None]
+        with self.__lock:
+            if self.__ring is None:
+                self.__create(frame.shape)
+            elif frame.shape != self.__ring.shape:
+                raise ValueError(f"frame shape changed from {self.__ring.shape} to {frame.shape}")
+            ring = self.__ring
+            seq = self.seq + 1
+            slot = seq % self.slots
+            ring.seqs[slot] = seq * 2 - 1
+            ring.frames[slot] = frame
+            ring.seqs[slot] = seq * 2
+            ring.header[_LATEST] = seq
+            self.seq = seq
+            return seq
+
+    @property
+    def frame_scale(self) -> float:
+        return self.screencap_method.frame_scale
+
+    def screencap_raw(self) -> bytes:
+        return self.screencap().tobytes()
+
+    def screencap(self) -> cv2.Mat:
+        frame = self.screencap_method.screencap()
+        self.publish(frame)
+        return frame
+
+    def serve_forever(self, interval: int = 0):
+        """
+        serve_forever 循环截图并发布，直到调用stop，用于单独的截图进程
+
+        Args:
+            interval (int, optional): 两次截图之间的间隔(毫秒). Defaults to 0.
+        """
+        self.__stop_event.clear()
+        while not self.__stop_event.is_set():
+            self.screencap()
+            if interval:
+                self.__stop_event.wait(interval / 1000)
+
+    def stop(self):
+        self.__stop_event.set()
+
+    def close(self):
+        """释放并删除共享内存"""
+        with self.__lock:
+            if self.__ring is None:
+                return
+            shm = self.__ring.shm
+            self.__ring.release()
+            shm.unlink()
+            self.__ring = None
+
+    def __del__(self):
+        self.close()
+
+
+class SharedMemorySubscriber(ScreenCap):
+    def __init__(self, name: str, copy: bool = False, timeout: float = 10) -> None:
+        """
+        __init__ 共享内存帧订阅者
+
+        读取SharedMemoryPublisher发布的最新帧。默认返回共享内存中的视图，不复制数据，
+        视图在publisher之后发布slots-1帧内有效，需要长期持有时请设置copy或自行复制
+
+        Args:
+            name (str): 共享内存名称
+            copy (bool, optional): 是否返回帧的副本. Defaults to False.
+            timeout (float, optional): 等待publisher创建共享内存和等待新帧的超时时间(秒). Defaults to 10.
+        """
+        self.name = name
+        self.copy = copy
+        self.timeout = timeout
+        self.__ring: _FrameRing | None = None
+
+    def __attach(self, deadline: float):
+        while True:
+            try:
+                shm = self.__open()
+                header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+                if header[_MAGIC] == SHARED_MEMORY_MAGIC:
+                    shape = (int(header[_HEIGHT]), int(header[_WIDTH]), int(header[_CHANNELS]))
+                    slots = int(header[_SLOTS])
+                    del header
+                    self.__ring = _FrameRing(shm, shape, slots)
+                    return
+                del header
+                shm.close()
+            except FileNotFoundError:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"shared memory {self.name} not available")
+            time.sleep(SHARED_MEMORY_POLL_INTERVAL)
+
+    def __open(self) -> shared_memory.SharedMemory:
+        shm = shared_memory.SharedMemory(self.name)
+        # 订阅者不拥有共享内存，避免进程退出时resource_tracker将其删除
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+    @property
+    def latest_seq(self) -> int:
+        """最新帧序号，未连接时为0"""
+        return 0 if self.__ring is None else int(self.__ring.header[_LATEST])
+
+    def get_frame(self, after_seq: int = 0) -> tuple[int, cv2.Mat]:
+        """
+        get_frame 获取最新帧
+
+        Args:
+            after_seq (int, optional): 只返回序号大于after_seq的帧. Defaults to 0.
+
+        Returns:
+            tuple[int, cv2.Mat]: (帧序号, 图像)
+        """
+        deadline = time.monotonic() + self.timeout
+        if self.__ring is None:
+            self.__attach(deadline)
+        ring = self.__ring
+        while True:
+            seq = int(ring.header[_LATEST])
+            if seq > after_seq:
+                slot = seq % ring.slots
+                # 槽序号与帧序号一致说明写入已完成且未被覆盖
+                if ring.seqs[slot] == seq * 2:
+                    frame = ring.frames[slot]
+                    if not self.copy:
+                        return seq, frame
+                    frame = frame.copy()
+                    if ring.seqs[slot] == seq * 2:
+                        return seq, frame
+                # 槽正在写入或已被覆盖，发布者在写入中途退出时槽会一直处于写入状态，同样需要检查超时
+            if time.monotonic() > deadline:
+                raise TimeoutError("shared memory frame timeout")
+            time.sleep(SHARED_MEMORY_POLL_INTERVAL)
+
+    def screencap_raw(self) -> bytes:
+        return self.screencap().tobytes()
+
+    def screencap(self) -> cv2.Mat:
+        return self.get_frame()[1]
+
+    def close(self):
+        if self.__ring is not None:
+            self.__ring.release()
+            self.__ring = None
+
+    def __del__(self):
+        self.close()
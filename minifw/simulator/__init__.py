@@ -0,0 +1,6 @@
+from minifw.simulator.device import FakeDevice
+from minifw.simulator.droidcast import FakeDroidCastServer
+from minifw.simulator.frames import FrameSource
+from minifw.simulator.minicap import FakeMiniCapServer
+from minifw.simulator.server import FakeServer
+from minifw.simulator.touch import FakeTouchServer
@@ -0,0 +1,43 @@
+import argparse
+import os
+import time
+
+from minifw.screencap.config import ARCHIVE_META_FILE
+from minifw.simulator.config import DEFAULT_FPS, DEFAULT_HOST
+from minifw.simulator.device import FakeDevice
+from minifw.simulator.frames import FrameSource
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m minifw.simulator", description="minifw 模拟设备")
+    parser.add_argument("frames", help="录制帧所在目录(png/jpg)或录制存档")
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS, help="回放帧率")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="监听地址")
+    parser.add_argument("--drop-every", type=float, default=0, help="每隔多少秒断开所有连接，用于测试重连")
+    args = parser.parse_args()
+
+    if os.path.exists(os.path.join(args.frames, ARCHIVE_META_FILE)):
+        source = FrameSource.from_archive(args.frames, args.fps)
+    else:
+        source = FrameSource.from_directory(args.frames, args.fps)
+    with FakeDevice(source, host=args.host) as device:
+        print(f"minicap   {args.host}:{device.minicap.port}")
+        print(f"minitouch {args.host}:{device.minitouch.port}")
+        print(f"maatouch  {args.host}:{device.maatouch.port}")
+        print(f"droidcast {device.droidcast.url}")
+        last_drop = time.monotonic()
+        try:
+            while True:
+                time.sleep(1)
+                if args.drop_every and time.monotonic() - last_drop >= args.drop_every:
+                    device.drop_connections()
+                    last_drop = time.monotonic()
+                print(f"frames sent: {device.minicap.frames_sent}; "
+                      f"touch commits: {device.minitouch.commits + device.maatouch.commits}; "
+                      f"droidcast requests: {device.droidcast.requests}")
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_FPS = 30
+# accept轮询停止标志的间隔(秒)
+ACCEPT_TIMEOUT = 0.2
+
+# minicap banner
+MINICAP_VERSION = 1
+MINICAP_BANNER_LENGTH = 24
+FAKE_PID = 10086
+MINICAP_JPEG_QUALITY = 80
+# fps为0(不限速)时两帧之间的最小间隔(秒)，避免发送循环占满CPU
+MINICAP_MIN_FRAME_INTERVAL = 0.001
+
+# minitouch
+MINITOUCH_VERSION = 1
+MINITOUCH_MAX_CONTACTS = 10
+MINITOUCH_MAX_PRESSURE = 0
+# 保留最近的触摸命令条数
+TOUCH_HISTORY_SIZE = 10000
@@ -0,0 +1,49 @@
+import cv2
+
+from minifw.simulator.config import DEFAULT_FPS, DEFAULT_HOST
+from minifw.simulator.droidcast import FakeDroidCastServer
+from minifw.simulator.frames import FrameSource
+from minifw.simulator.minicap import FakeMiniCapServer
+from minifw.simulator.touch import FakeTouchServer
+
+
+class FakeDevice:
+    def __init__(self, frames: list[cv2.Mat] | FrameSource, fps: float = DEFAULT_FPS, host: str = DEFAULT_HOST) -> None:
+        """
+        __init__ 模拟设备
+
+        同时提供minicap、minitouch、maatouch、DroidCast四个服务，共享同一画面来源。
+        MiniCapStream、CommandBuilder.publish、requests等客户端可以直接连接对应端口，无需adb。
+        MiniCap、MiniTouch、DroidCast可以通过port参数连接，例如 MiniCap(None, port=device.minicap.port)
+
+        Args:
+            frames (list[cv2.Mat] | FrameSource): 回放的帧
+            fps (float, optional): 回放帧率. Defaults to 30.
+            host (str, optional): 监听地址. Defaults to "127.0.0.1".
+        """
+        self.source = frames if isinstance(frames, FrameSource) else FrameSource(frames, fps)
+        self.host = host
+        self.minicap = FakeMiniCapServer(self.source, host)
+        self.minitouch = FakeTouchServer(self.source.width, self.source.height, host=host)
+        self.maatouch = FakeTouchServer(self.source.width, self.source.height, maatouch=True, host=host)
+        self.droidcast = FakeDroidCastServer(self.source, host)
+
+    def start(self):
+        for server in (self.minicap, self.minitouch, self.maatouch, self.droidcast):
+            server.start()
+
+    def stop(self):
+        for server in (self.minicap, self.minitouch, self.maatouch, self.droidcast):
+            server.stop()
+
+    def drop_connections(self):
+        """断开所有socket连接，模拟服务崩溃或adb转发中断"""
+        for server in (self.minicap, self.minitouch, self.maatouch):
+            server.drop_connections()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
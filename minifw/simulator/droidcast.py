@@ -0,0 +1,109 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+from loguru import logger
+
+from minifw.simulator.config import DEFAULT_HOST
+from minifw.simulator.frames import FrameSource
+
+
+class _DroidCastHandler(BaseHTTPRequestHandler):
+    server: "_DroidCastHTTPServer"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/screenshot":
+            self.send_error(404)
+            return
+        query = parse_qs(url.query)
+        image_format = query.get("format", ["png"])[0]
+        source = self.server.source
+        index = source.index()
+        frame = source.frame(index)
+        resized = "width" in query and "height" in query
+        if resized:
+            frame = cv2.resize(frame, (int(query["width"][0]), int(query["height"][0])), interpolation=cv2.INTER_AREA)
+        if image_format == "raw":
+            data = cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA).tobytes() if resized else source.rgba(index)
+            body, content_type = data, "application/octet-stream"
+        elif image_format in ("png", "jpeg", "jpg"):
+            params = [cv2.IMWRITE_JPEG_QUALITY, int(query["quality"][0])] if "quality" in query else []
+            ok, encoded = cv2.imencode(".png" if image_format == "png" else ".jpg", frame, params)
+            body, content_type = encoded.tobytes(), f"image/{'png' if image_format == 'png' else 'jpeg'}"
+        else:
+            self.send_error(400, f"unsupported format {image_format}")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.requests += 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _DroidCastHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, source: FrameSource):
+        super().__init__(address, _DroidCastHandler)
+        self.source = source
+        self.requests = 0
+
+
+class FakeDroidCastServer:
+    def __init__(self, source: FrameSource, host: str = DEFAULT_HOST, port: int = 0) -> None:
+        """
+        __init__ 模拟DroidCast服务
+
+        提供 /screenshot?format=raw|png|jpeg&width=&height=&quality= 接口，raw格式为RGBA数据
+
+        Args:
+            source (FrameSource): 画面来源
+            host (str, optional): 监听地址. Defaults to "127.0.0.1".
+            port (int, optional): 监听端口，为0时自动分配. Defaults to 0.
+        """
+        self.source = source
+        self.host = host
+        self.port = port
+        self.__server: _DroidCastHTTPServer | None = None
+        self.__thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/screenshot?format=raw"
+
+    @property
+    def requests(self) -> int:
+        """累计处理的截图请求数"""
+        return self.__server.requests if self.__server is not None else 0
+
+    def start(self) -> int:
+        if self.__server is not None:
+            return self.port
+        self.__server = _DroidCastHTTPServer((self.host, self.port), self.source)
+        self.port = self.__server.server_address[1]
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+        logger.info(f"FakeDroidCastServer listening on {self.host}:{self.port}")
+        return self.port
+
+    def stop(self):
+        if self.__server is None:
+            return
+        self.__server.shutdown()
+        self.__server.server_close()
+        self.__thread.join()
+        self.__server = None
+        self.__thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
@@ -0,0 +1,63 @@
+import glob
+import os
+import time
+
+import cv2
+
+
+class FrameSource:
+    def __init__(self, frames: list[cv2.Mat], fps: float = 30) -> None:
+        """
+        __init__ 模拟设备的画面来源
+
+        按fps循环回放给定的帧，所有模拟服务共享同一时间轴，同一时刻取到的是同一帧
+
+        Args:
+            frames (list[cv2.Mat]): BGR帧列表，尺寸必须一致
+            fps (float, optional): 回放帧率，为0时每次取帧都前进一帧. Defaults to 30.
+        """
+        if not frames:
+            raise ValueError("frames must not be empty")
+        if any(frame.shape != frames[0].shape for frame in frames):
+            raise ValueError("all frames must have the same shape")
+        self.frames = frames
+        self.fps = fps
+        self.height, self.width = frames[0].shape[:2]
+        self.__rgba: dict[int, bytes] = {}
+        self.__start_time = time.monotonic()
+        self.__counter = 0
+
+    @classmethod
+    def from_directory(cls, directory: str, fps: float = 30) -> "FrameSource":
+        """从目录读取录制帧(png/jpg)，按文件名排序"""
+        paths = sorted(glob.glob(os.path.join(directory, "*.png")) + glob.glob(os.path.join(directory, "*.jpg")))
+        if not paths:
+            raise FileNotFoundError(f"no frames found in {directory}")
+        return cls([cv2.imread(path, cv2.IMREAD_COLOR) for path in paths], fps)
+
+    @classmethod
+    def from_archive(cls, path: str, fps: float = 30) -> "FrameSource":
+        """从RecordScreenCap录制的存档读取帧，帧为内存映射视图，灰度存档转换为BGR"""
+        from minifw.screencap.record import FrameArchive
+        archive = FrameArchive(path)
+        if archive.format == "GRAY":
+            return cls([cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR) for frame in archive.frames], fps)
+        return cls(list(archive.frames), fps)
+
+    def index(self) -> int:
+        """当前应当显示的帧序号"""
+        if self.fps:
+            return int((time.monotonic() - self.__start_time) * self.fps) % len(self.frames)
+        self.__counter += 1
+        return (self.__counter - 1) % len(self.frames)
+
+    def frame(self, index: int = None) -> cv2.Mat:
+        return self.frames[self.index() if index is None else index]
+
+    def rgba(self, index: int = None) -> bytes:
+        """RGBA格式的帧数据，与minicap、DroidCast raw格式一致"""
+        index = self.index() if index is None else index
+        data = self.__rgba.get(index)
+        if data is None:
+            data = self.__rgba[index] = cv2.cvtColor(self.frames[index], cv2.COLOR_BGR2RGBA).tobytes()
+        return data
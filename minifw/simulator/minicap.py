@@ -0,0 +1,63 @@
+import socket
+import struct
+import threading
+
+import cv2
+
+from minifw.simulator.config import DEFAULT_HOST, FAKE_PID, MINICAP_BANNER_LENGTH, MINICAP_JPEG_QUALITY, \
+    MINICAP_MIN_FRAME_INTERVAL, MINICAP_VERSION
+from minifw.simulator.frames import FrameSource
+from minifw.simulator.server import FakeServer
+
+
+class FakeMiniCapServer(FakeServer):
+    def __init__(self, source: FrameSource, host: str = DEFAULT_HOST, port: int = 0, orientation: int = 0,
+                 image_format: str = "raw", quality: int = MINICAP_JPEG_QUALITY) -> None:
+        """
+        __init__ 模拟minicap服务
+
+        连接后先发送24字节banner，然后按FrameSource的帧率持续发送帧，与MiniCapStream解析的格式一致。
+        fps为0时不限速，但每帧之间至少间隔1毫秒
+
+        Args:
+            source (FrameSource): 画面来源
+            host (str, optional): 监听地址. Defaults to "127.0.0.1".
+            port (int, optional): 监听端口，为0时自动分配. Defaults to 0.
+            orientation (int, optional): banner中的屏幕方向(0~3). Defaults to 0.
+            image_format (str, optional): raw发送定长RGBA帧(修改版minicap)，jpeg发送带长度前缀的JPEG帧(原版minicap). Defaults to "raw".
+            quality (int, optional): jpeg帧品质. Defaults to 80.
+        """
+        if image_format not in ("raw", "jpeg"):
+            raise ValueError("image_format must be raw or jpeg")
+        super().__init__(host, port)
+        self.source = source
+        self.orientation = orientation
+        self.image_format = image_format
+        self.quality = quality
+        self.__jpeg: dict[int, bytes] = {}
+        # 累计发送帧数
+        self.frames_sent = 0
+
+    def banner(self) -> bytes:
+        width, height = self.source.width, self.source.height
+        # 版本(1) 长度(1) pid(4) 真实宽高(4*2) 虚拟宽高(4*2) 方向(1) quirks(1)
+        return struct.pack("<BBIIIIIBB", MINICAP_VERSION, MINICAP_BANNER_LENGTH, FAKE_PID,
+                           width, height, width, height, self.orientation, 0)
+
+    def frame(self) -> bytes:
+        if self.image_format == "raw":
+            return self.source.rgba()
+        index = self.source.index()
+        data = self.__jpeg.get(index)
+        if data is None:
+            ok, encoded = cv2.imencode(".jpg", self.source.frame(index), [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            data = self.__jpeg[index] = struct.pack("<I", len(encoded)) + encoded.tobytes()
+        return data
+
+    def handle(self, client: socket.socket, stop_event: threading.Event):
+        client.sendall(self.banner())
+        interval = 1 / self.source.fps if self.source.fps else MINICAP_MIN_FRAME_INTERVAL
+        while not stop_event.is_set():
+            client.sendall(self.frame())
+            self.frames_sent += 1
+            stop_event.wait(interval)
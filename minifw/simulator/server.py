@@ -0,0 +1,103 @@
+import socket
+import threading
+from abc import ABC, abstractmethod
+
+from loguru import logger
+
+from minifw.simulator.config import ACCEPT_TIMEOUT, DEFAULT_HOST
+
+
+class FakeServer(ABC):
+    def __init__(self, host: str = DEFAULT_HOST, port: int = 0) -> None:
+        """
+        __init__ 模拟服务基类
+
+        每个连接一个线程处理，drop_connections可以主动断开所有连接，用于测试客户端重连
+
+        Args:
+            host (str, optional): 监听地址. Defaults to "127.0.0.1".
+            port (int, optional): 监听端口，为0时自动分配. Defaults to 0.
+        """
+        self.host = host
+        self.port = port
+        # 累计连接次数
+        self.connections = 0
+        self.__server: socket.socket | None = None
+        self.__clients: set[socket.socket] = set()
+        self.__lock = threading.Lock()
+        self.__stop_event = threading.Event()
+        self.__thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self.__thread is not None and not self.__stop_event.is_set()
+
+    def start(self) -> int:
+        """开始监听，返回端口"""
+        if self.running:
+            return self.port
+        self.__stop_event.clear()
+        self.__server = socket.create_server((self.host, self.port))
+        # 关闭监听socket不会唤醒阻塞的accept，使用超时轮询停止标志
+        self.__server.settimeout(ACCEPT_TIMEOUT)
+        self.port = self.__server.getsockname()[1]
+        self.__thread = threading.Thread(target=self.__accept_loop, daemon=True)
+        self.__thread.start()
+        logger.info(f"{type(self).__name__} listening on {self.host}:{self.port}")
+        return self.port
+
+    def stop(self):
+        self.__stop_event.set()
+        if self.__server is not None:
+            self.__server.close()
+        self.drop_connections()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def drop_connections(self):
+        """断开所有已建立的连接，服务继续监听"""
+        with self.__lock:
+            clients, self.__clients = self.__clients, set()
+        for client in clients:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            client.close()
+
+    def __accept_loop(self):
+        while not self.__stop_event.is_set():
+            try:
+                client, _ = self.__server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            client.settimeout(None)
+            with self.__lock:
+                self.__clients.add(client)
+                self.connections += 1
+            threading.Thread(target=self.__serve, args=(client,), daemon=True).start()
+
+    def __serve(self, client: socket.socket):
+        try:
+            self.handle(client, self.__stop_event)
+        except OSError:
+            # 客户端断开或被drop_connections关闭
+            pass
+        finally:
+            with self.__lock:
+                self.__clients.discard(client)
+            client.close()
+
+    @abstractmethod
+    def handle(self, client: socket.socket, stop_event: threading.Event):
+        """处理单个连接，返回后连接关闭"""
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
@@ -0,0 +1,66 @@
+import socket
+import threading
+import time
+from collections import deque
+
+from minifw.simulator.config import DEFAULT_HOST, FAKE_PID, MINITOUCH_MAX_CONTACTS, MINITOUCH_MAX_PRESSURE, \
+    MINITOUCH_VERSION, TOUCH_HISTORY_SIZE
+from minifw.simulator.server import FakeServer
+
+
+class FakeTouchServer(FakeServer):
+    def __init__(self, width: int, height: int, maatouch: bool = False, host: str = DEFAULT_HOST,
+                 port: int = 0) -> None:
+        """
+        __init__ 模拟minitouch/maatouch服务
+
+        连接后发送握手信息，之后逐行解析 d/m/u/w/c 命令并记录，w命令只记录不等待
+
+        Args:
+            width (int): 触摸最大x
+            height (int): 触摸最大y
+            maatouch (bool, optional): 为True时使用maatouch握手(不发送版本行). Defaults to False.
+            host (str, optional): 监听地址. Defaults to "127.0.0.1".
+            port (int, optional): 监听端口，为0时自动分配. Defaults to 0.
+        """
+        super().__init__(host, port)
+        self.width = width
+        self.height = height
+        self.maatouch = maatouch
+        # (接收时间, 命令, 参数) 最近的命令
+        self.commands: deque[tuple[float, str, tuple[int, ...]]] = deque(maxlen=TOUCH_HISTORY_SIZE)
+        # 累计收到的commit数
+        self.commits = 0
+        self.__commit_event = threading.Condition()
+
+    def handshake(self) -> bytes:
+        lines = [] if self.maatouch else [f"v {MINITOUCH_VERSION}"]
+        lines.append(f"^ {MINITOUCH_MAX_CONTACTS} {self.width} {self.height} {MINITOUCH_MAX_PRESSURE}")
+        lines.append(f"$ {FAKE_PID}")
+        return ("\n".join(lines) + "\n").encode()
+
+    def handle(self, client: socket.socket, stop_event: threading.Event):
+        client.sendall(self.handshake())
+        with client.makefile("r", encoding="utf-8") as reader:
+            for line in reader:
+                if stop_event.is_set():
+                    break
+                parts = line.split()
+                if not parts:
+                    continue
+                command, args = parts[0], tuple(int(float(arg)) for arg in parts[1:])
+                self.commands.append((time.perf_counter(), command, args))
+                if command == "c":
+                    with self.__commit_event:
+                        self.commits += 1
+                        self.__commit_event.notify_all()
+
+    def wait_commits(self, count: int, timeout: float = None) -> bool:
+        """等待累计commit数达到count，用于测量命令到达延迟"""
+        with self.__commit_event:
+            return self.__commit_event.wait_for(lambda: self.commits >= count, timeout)
+
+    def reset(self):
+        self.commands.clear()
+        with self.__commit_event:
+            self.commits = 0
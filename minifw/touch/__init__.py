@@ -1,4 +1,5 @@
 from minifw.touch.adbtouch import ADBTouch
+from minifw.touch.asynctouch import AsyncTouch, AsyncCommandTouch
 from minifw.touch.maatouch import MaaTouch
 from minifw.touch.minitouch import MiniTouch
 from minifw.touch.mumu import MuMuTouch
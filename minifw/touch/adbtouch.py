@@ -1,27 +1,132 @@
-from adbutils import adb
+import re
 
-from minifw.common.exception import ADBDeviceUnFound
+from loguru import logger
+
+from minifw.common import DeviceSession
+from minifw.touch.config import SENDEVENT_TRACKING_ID
 from minifw.touch.touch import Touch
 
+# linux input event codes
+EV_SYN = 0
+EV_KEY = 1
+EV_ABS = 3
+SYN_REPORT = 0
+BTN_TOUCH = 330
+ABS_MT_POSITION_X = 0x35
+ABS_MT_POSITION_Y = 0x36
+ABS_MT_TRACKING_ID = 0x39
+
 
 class ADBTouch(Touch):
-    def __init__(self, serial) -> None:
+    def __init__(self, serial, use_sendevent: bool = False) -> None:
         """
         __init__ ADB 操作方式
 
+        所有命令写入同一个常驻shell会话，不再为每次点击新建adb连接
+
         Args:
             serial (str): 设备id
+            use_sendevent (bool, optional): 是否使用sendevent直接写入触摸事件，可避免每次启动input进程.
+                设备没有可用的触摸输入设备时自动回退到input. Defaults to False.
         """
-        if serial not in [device.serial for device in adb.device_list()]:
-            raise ADBDeviceUnFound("设备不存在，请检查是否链接设备成功")
-        self.__adb = adb.device(serial)
+        self.__session = DeviceSession.get(serial)
+        self.__shell = self.__session.shell
+        self.__event_device = None
+        if use_sendevent:
+            self.__get_event_device_info()
+
+    def __get_event_device_info(self):
+        """通过getevent -p查找支持多点触控的输入设备"""
+        devices = {}
+        current = None
+        for line in self.__shell.execute("getevent -p").splitlines():
+            matched = re.match(r"add device \d+: (\S+)", line)
+            if matched:
+                current = matched.group(1)
+                devices[current] = {}
+                continue
+            matched = re.search(r"\b(0035|0036)\b.*max (\d+)", line)
+            if current is not None and matched:
+                devices[current][int(matched.group(1), 16)] = int(matched.group(2))
+        for path, axes in devices.items():
+            if ABS_MT_POSITION_X in axes and ABS_MT_POSITION_Y in axes:
+                self.__event_device = path
+                self.__max_x = axes[ABS_MT_POSITION_X]
+                self.__max_y = axes[ABS_MT_POSITION_Y]
+                break
+        if self.__event_device is None:
+            logger.warning("未找到触摸输入设备，使用input方式")
+            return
+        self.__update_display(self.__session)
+        self.__session.add_listener(self.__update_display)
+        logger.info(f"sendevent device: {self.__event_device}; max_x: {self.__max_x}; max_y: {self.__max_y}")
+
+    def __update_display(self, session: DeviceSession):
+        self.__orientation = session.rotation
+        self.__width = session.width
+        self.__height = session.height
+
+    def __convert(self, x, y):
+        """屏幕坐标转换为触摸设备坐标"""
+        width, height = self.__width, self.__height
+        if self.__orientation == 1:
+            x, y = height - y, x
+            width, height = height, width
+        elif self.__orientation == 2:
+            x, y = width - x, height - y
+        elif self.__orientation == 3:
+            x, y = y, width - x
+            width, height = height, width
+        return int(x * self.__max_x / width), int(y * self.__max_y / height)
+
+    def __event(self, event_type, code, value):
+        return f"sendevent {self.__event_device} {event_type} {code} {value}"
+
+    def __down(self, x, y):
+        x, y = self.__convert(x, y)
+        return [
+            self.__event(EV_ABS, ABS_MT_TRACKING_ID, SENDEVENT_TRACKING_ID),
+            self.__event(EV_ABS, ABS_MT_POSITION_X, x),
+            self.__event(EV_ABS, ABS_MT_POSITION_Y, y),
+            self.__event(EV_KEY, BTN_TOUCH, 1),
+            self.__event(EV_SYN, SYN_REPORT, 0),
+        ]
+
+    def __move(self, x, y):
+        x, y = self.__convert(x, y)
+        return [
+            self.__event(EV_ABS, ABS_MT_POSITION_X, x),
+            self.__event(EV_ABS, ABS_MT_POSITION_Y, y),
+            self.__event(EV_SYN, SYN_REPORT, 0),
+        ]
+
+    def __up(self):
+        return [
+            self.__event(EV_ABS, ABS_MT_TRACKING_ID, -1),
+            self.__event(EV_KEY, BTN_TOUCH, 0),
+            self.__event(EV_SYN, SYN_REPORT, 0),
+        ]
 
     def click(self, x: int, y: int, duration: int = 100):
-        adb_command = ["input", "touchscreen", "swipe"]
-        adb_command.extend([str(x), str(y), str(x), str(y), str(duration)])
-        self.__adb.shell(adb_command)
+        if self.__event_device is None:
+            self.__shell.execute(f"input touchscreen swipe {x} {y} {x} {y} {duration}", duration / 1000)
+            return
+        commands = self.__down(x, y)
+        commands.append(f"sleep {duration / 1000}")
+        commands.extend(self.__up())
+        self.__shell.execute("; ".join(commands), duration / 1000)
 
     def swipe(self, points: list, duration: int = 300):
-        start_x, start_y = points[0]
-        end_x, end_y = points[-1]
-        self.__adb.swipe(start_x, start_y, end_x, end_y, duration/1000)
\ No newline at end of file
+        if self.__event_device is None:
+            start_x, start_y = points[0]
+            end_x, end_y = points[-1]
+            self.__shell.execute(f"input touchscreen swipe {start_x} {start_y} {end_x} {end_y} {duration}",
+                                 duration / 1000)
+            return
+        interval = duration / max(len(points) - 1, 1) / 1000
+        commands = self.__down(*points[0])
+        for x, y in points[1:]:
+            commands.append(f"sleep {interval}")
+            commands.extend(self.__move(x, y))
+        commands.extend(self.__up())
+        self.__shell.execute("; ".join(commands), duration / 1000)
@@ -0,0 +1,101 @@
+import asyncio
+from abc import ABC, abstractmethod
+
+from minifw.touch.maatouch import MaaTouch
+from minifw.touch.minitouch import MiniTouch
+from minifw.touch.utils import CommandBuilder
+
+
+class AsyncTouch(ABC):
+
+    @abstractmethod
+    async def click(self, x: int, y: int, duration: int = 100):
+        """
+        click 点击
+
+        Args:
+            x (int): 横坐标
+            y (int): 纵坐标
+            duration (int, optional): 持续时间. Defaults to 100.
+        """
+
+    @abstractmethod
+    async def swipe(self, points: list, duration: int = 300):
+        """
+        swipe 滑动
+
+        Args:
+            points (list): [(x,y),(x,y),(x,y)] 坐标列表
+            duration (int): 持续时间. Defaults to 300.
+        """
+
+
+class AsyncCommandTouch(AsyncTouch):
+    def __init__(self, touch: MiniTouch | MaaTouch) -> None:
+        """
+        __init__ minitouch/maatouch协议的异步操作方式
+
+        接管同步后端已完成握手的socket，命令通过asyncio stream发送，等待期间不阻塞事件循环。
+        接管后不要再使用同步后端的click/swipe
+
+        Args:
+            touch (MiniTouch | MaaTouch): 已启动的同步后端
+        """
+        self.touch = touch
+        self.__writer: asyncio.StreamWriter | None = None
+
+    async def connect(self):
+        if self.__writer is None:
+            _, self.__writer = await asyncio.open_connection(sock=self.touch.sock)
+
+    async def __tap(self, points, pressure=100, duration=None):
+        await self.connect()
+        points = [list(map(int, self.touch.convert(x, y))) for x, y in points]
+
+        _builder = CommandBuilder()
+        for point_id, (x, y) in enumerate(points):
+            _builder.down(point_id, x, y, pressure)
+        _builder.commit()
+
+        # apply duration
+        if duration:
+            _builder.wait(duration)
+            _builder.commit()
+
+        for point_id in range(len(points)):
+            _builder.up(point_id)
+
+        await _builder.publish_async(self.__writer)
+
+    async def __swipe(self, points, pressure=100, duration=None):
+        await self.connect()
+        points = [list(map(int, self.touch.convert(x, y))) for x, y in points]
+
+        _builder = CommandBuilder()
+        point_id = 0
+
+        # tap the first point
+        x, y = points.pop(0)
+        _builder.down(point_id, x, y, pressure)
+        await _builder.publish_async(self.__writer)
+
+        # start swiping
+        for x, y in points:
+            _builder.move(point_id, x, y, pressure)
+
+            # add delay between points
+            if duration:
+                _builder.wait(duration)
+            _builder.commit()
+
+        await _builder.publish_async(self.__writer)
+
+        # release
+        _builder.up(point_id)
+        await _builder.publish_async(self.__writer)
+
+    async def click(self, x: int, y: int, duration: int = 100):
+        await self.__tap([(x, y)], duration=duration)
+
+    async def swipe(self, points: list, duration: int = 300):
+        await self.__swipe(points, duration=duration / max(len(points) - 1, 1))
@@ -27,4 +27,8 @@ MAATOUCH_FILEPATH_LOCAL = "{}/bin/maatouch".format(WORK_DIR)
 MINITOUCH_PATH = "{}/bin/minitouch/libs".format(WORK_DIR)
 MINITOUCH_REMOTE_PATH = "/data/local/tmp/minitouch"
 MINITOUCH_REMOTE_ADDR = "localabstract:minitouch"
-MINITOUCH_SERVER_START_DELAY = 1
\ No newline at end of file
+# 等待minitouch握手的超时时间(秒)
+MINITOUCH_SERVER_START_TIMEOUT = 10
+
+# ADBTouch
+SENDEVENT_TRACKING_ID = 0
@@ -1,9 +1,8 @@
 import socket
 
-from adbutils import adb
 from loguru import logger
 
-from minifw.common.exception import ADBDeviceUnFound
+from minifw.common import DeviceSession, deploy
 from minifw.touch import config
 from minifw.touch.touch import Touch
 from minifw.touch.utils import CommandBuilder, str2byte
@@ -21,11 +20,9 @@ class MaaTouch(Touch):
     _maatouch_stream_storage = None
 
     def __init__(self, serial):
-        if serial not in [device.serial for device in adb.device_list()]:
-            raise ADBDeviceUnFound("设备不存在，请检查是否链接设备成功")
-        self.__adb = adb.device(serial)
+        self.__adb = DeviceSession.get(serial).device
         logger.debug("MaaTouch install")
-        self.__adb.push(config.MAATOUCH_FILEPATH_LOCAL, config.MAATOUCH_FILEPATH_REMOTE)
+        deploy(self.__adb, [(config.MAATOUCH_FILEPATH_LOCAL, config.MAATOUCH_FILEPATH_REMOTE)], executable=False)
         logger.info("MaaTouch init")
 
         # CLASSPATH=/data/local/tmp/maatouch app_process / com.shxyke.MaaTouch.App
@@ -138,6 +135,15 @@ class MaaTouch(Touch):
             _builder.up(point_id)
             _builder.publish(self)
 
+    @property
+    def sock(self) -> socket.socket:
+        """已完成握手的maatouch连接"""
+        return self._maatouch_stream
+
+    def convert(self, x, y):
+        """MaaTouch自行处理屏幕方向，无需转换"""
+        return x, y
+
     def click(self, x: int, y: int, duration: int = 100):
         return self.__tap([(x, y)], duration=duration)
 
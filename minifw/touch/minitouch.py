@@ -2,11 +2,10 @@ import socket
 import subprocess
 import time
 
-from adbutils import adb
 from loguru import logger
 
-from minifw.common.exception import ADBDeviceUnFound
-from minifw.touch.config import ADB_EXECUTOR, MINITOUCH_SERVER_START_DELAY, MINITOUCH_REMOTE_ADDR, DEFAULT_HOST, \
+from minifw.common import DeviceSession, deploy, wait_until
+from minifw.touch.config import ADB_EXECUTOR, MINITOUCH_SERVER_START_TIMEOUT, MINITOUCH_REMOTE_ADDR, DEFAULT_HOST, \
     DEFAULT_BUFFER_SIZE, MINITOUCH_PATH, MINITOUCH_REMOTE_PATH
 from minifw.touch.touch import Touch
 from minifw.touch.utils import CommandBuilder
@@ -18,19 +17,33 @@ class MiniTouchUnSupportError(Exception):
 
 
 class MiniTouch(Touch):
-    def __init__(self, serial):
+    def __init__(self, serial, host=DEFAULT_HOST, port=None):
         """
         __init__ minitouch点击方式
 
+        指定port时直接连接host:port上已运行的minitouch(例如FakeTouchServer)，不使用adb，
+        不安装也不启动服务，屏幕方向固定为0，尺寸取握手信息中的max_x/max_y
+
         Args:
-            serial (str): 设备id
+            serial (str): 设备id，指定port时可以为None
+            host (str, optional): minitouch地址. Defaults to "127.0.0.1".
+            port (int, optional): 已运行的minitouch端口. Defaults to None.
         """
         self.minitouch_process = None  # minitouch服务进程
-        self.minitouch_port = None  # Socket端口记录
+        self.minitouch_port = port  # Socket端口记录
         self.pid = None  # minitouch服务pid记录
-        if serial not in [device.serial for device in adb.device_list()]:
-            raise ADBDeviceUnFound("设备不存在，请检查是否链接设备成功")
-        self.__adb = adb.device(serial)  # adb设备
+        self.client = None
+        self.__host = host
+        self.__attached = port is not None
+        if self.__attached:
+            self.__session = None
+            self.__adb = None
+            self.__orientation = 0
+            self.start()
+            self.__width, self.__height = int(self.max_x), int(self.max_y)
+            return
+        self.__session = DeviceSession.get(serial)
+        self.__adb = self.__session.device  # adb设备
 
         self.__get_device_info()  # 获取设备信息
         self.__minitouch_install()  # 安装minitouch
@@ -40,6 +53,8 @@ class MiniTouch(Touch):
 
     def __start_minitouch_server(self):
         """启动安卓设备Minitouch Server"""
+        if self.__attached:
+            return
         command_list = [
             ADB_EXECUTOR,
             "-s",
@@ -53,21 +68,38 @@ class MiniTouch(Touch):
             self.minitouch_process = subprocess.Popen(
                 command_list, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
             )
-        time.sleep(MINITOUCH_SERVER_START_DELAY)  # 等待Minitouch启动完成
         self.minitouch_port = self.__adb.forward_port(MINITOUCH_REMOTE_ADDR)  # 转发端口
-        # TODO 检查minitouch是否可用
+
+    def __try_connect(self):
+        """尝试连接并读取握手信息，minitouch未启动时adb会直接关闭连接，返回None"""
+        if self.minitouch_process is not None and self.minitouch_process.poll() is not None:
+            raise MiniTouchUnSupportError("minitouch exited unexpectedly")
+        try:
+            client = socket.create_connection((self.__host, self.minitouch_port), timeout=MINITOUCH_SERVER_START_TIMEOUT)
+        except OSError:
+            return None
+        try:
+            socket_out = client.makefile()
+            # v <version>
+            # protocol version, usually it is 1. needn't use this
+            if socket_out.readline():
+                client.settimeout(None)
+                return client, socket_out
+        except OSError:
+            pass
+        client.close()
+        return None
 
     def __connect_minitouch_by_socket(self):
-        """使用TCP连接minitouch"""
-        # build connection
-        client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        client.connect((DEFAULT_HOST, self.minitouch_port))  # 连接转发的端口
+        """使用TCP连接minitouch，轮询直到握手成功"""
+        start_time = time.monotonic()
+        connection = wait_until(self.__try_connect, MINITOUCH_SERVER_START_TIMEOUT)
+        if not connection:
+            raise MiniTouchUnSupportError(f"minitouch not ready after {MINITOUCH_SERVER_START_TIMEOUT}s")
+        client, socket_out = connection
         self.client = client
+        logger.info(f"minitouch ready in {(time.monotonic() - start_time) * 1000:.0f}ms")
         # get minitouch server info
-        socket_out = client.makefile()
-        # v <version>
-        # protocol version, usually it is 1. needn't use this
-        socket_out.readline()
         # ^ <max-contacts> <max-x> <max-y> <max-pressure>
         _, self.max_contacts, self.max_x, self.max_y, self.max_pressure, *_ = (
             socket_out.readline().replace("\n", "").replace("\r", "").split(" ")
@@ -101,6 +133,8 @@ class MiniTouch(Touch):
         return self.client.recv(DEFAULT_BUFFER_SIZE)
 
     def __kill_minitouch_server(self):
+        if self.__attached:
+            return
         if self.minitouch_process and self.minitouch_process.poll() is None:
             self.minitouch_process.kill()
             self.minitouch_process = None
@@ -112,19 +146,21 @@ class MiniTouch(Touch):
 
     def __get_device_info(self):
         """获取设备信息"""
-        self.__abi = self.__adb.getprop("ro.product.cpu.abi")  # 获取设备架构
-        self.__sdk = self.__adb.getprop("ro.build.version.sdk")  # 获取设备sdk
-        self.__orientation = self.__adb.rotation()  # 屏幕方向获取
-        self.__window_size = self.__adb.window_size()
+        self.__abi = self.__session.abi  # 获取设备架构
+        self.__sdk = self.__session.sdk  # 获取设备sdk
+        self.__update_display(self.__session)
+        # 屏幕旋转后更新坐标转换参数
+        self.__session.add_listener(self.__update_display)
+
+    def __update_display(self, session: DeviceSession):
+        self.__orientation = session.rotation  # 屏幕方向获取
+        self.__window_size = session.window_size
         self.__width = self.__window_size.width
         self.__height = self.__window_size.height
         logger.debug(f"\n屏幕方向:{self.__orientation}\n屏幕宽度:{self.__width}\n屏幕高度:{self.__height}")
 
     def __minitouch_install(self):
-        self.__adb.sync.push(
-            f"{MINITOUCH_PATH}/{self.__abi}/minitouch", MINITOUCH_REMOTE_PATH
-        )
-        self.__adb.shell(f"chmod +x {MINITOUCH_REMOTE_PATH}")
+        deploy(self.__adb, [(f"{MINITOUCH_PATH}/{self.__abi}/minitouch", MINITOUCH_REMOTE_PATH)])
 
     def start(self):
         """启动minitouch服务"""
@@ -150,7 +186,7 @@ class MiniTouch(Touch):
         :param no_up: if true, do not append 'up' at the end
         :return:
         """
-        points = [self.__convert(point[0], point[1]) for point in points]
+        points = [self.convert(point[0], point[1]) for point in points]
         points = [list(map(int, each_point)) for each_point in points]
 
         _builder = CommandBuilder()
@@ -182,7 +218,7 @@ class MiniTouch(Touch):
         :param no_up: will not 'up' at the end
         :return:
         """
-        points = [self.__convert(point[0], point[1]) for point in points]
+        points = [self.convert(point[0], point[1]) for point in points]
         points = [list(map(int, each_point)) for each_point in points]
 
         _builder = CommandBuilder()
@@ -211,7 +247,13 @@ class MiniTouch(Touch):
             _builder.up(point_id)
             _builder.publish(self)
 
-    def __convert(self, x, y):
+    @property
+    def sock(self) -> socket.socket:
+        """已完成握手的minitouch连接"""
+        return self.client
+
+    def convert(self, x, y):
+        """屏幕坐标转换为minitouch坐标"""
         if self.__orientation == 0:
             pass
         elif self.__orientation == 1:
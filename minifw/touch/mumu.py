@@ -1,7 +1,6 @@
-import ctypes
 import time
 
-from minifw.common import MuMuApi, MUMU_API_DLL_PATH
+from minifw.common import MuMuHost
 from minifw.common.config import MUMU_INSTALL_PATH
 from minifw.touch.touch import Touch
 
@@ -17,7 +16,7 @@ class MuMuTouch(Touch):
         """
         __init__ MumuApi 操作
 
-        基于/shell/sdk/external_renderer_ipc.dll实现操作mumu模拟器
+        基于/shell/sdk/external_renderer_ipc.dll实现操作mumu模拟器，同一模拟器的dll和实例连接通过MuMuHost共享
 
         Args:
             instance_index (int): 模拟器实例的编号
@@ -28,28 +27,12 @@ class MuMuTouch(Touch):
         self.display_id = display_id
         self.instance_index = instance_index
         self.emulator_install_path = emulator_install_path
-        self.dll_path = emulator_install_path + \
-                        MUMU_API_DLL_PATH if dll_path is None else dll_path
-        self.nemu = MuMuApi(self.dll_path)
+        self.host = MuMuHost.get(emulator_install_path, dll_path)
+        self.dll_path = self.host.dll_path
+        self.nemu = self.host.nemu
         # 连接模拟器
-        self.handle = self.nemu.connect(
-            self.emulator_install_path, self.instance_index)
-        self.__get_display_info()
-
-    def __get_display_info(self):
-        self.width = ctypes.c_int(0)
-        self.height = ctypes.c_int(0)
-        result = self.nemu.capture_display(
-            self.handle,
-            self.display_id,
-            0,
-            ctypes.byref(self.width),
-            ctypes.byref(self.height),
-            None,
-        )
-        if result != 0:
-            print("Failed to get the display size.")
-            return None
+        self.handle = self.host.handle(self.instance_index)
+        self.width, self.height = self.host.display_size(self.instance_index, self.display_id)
 
     def click(self, x: int, y: int, duration: int = 100):
         x, y = self.xy_change(x, y)
@@ -66,12 +49,9 @@ class MuMuTouch(Touch):
 
     def xy_change(self, x, y):
         x, y = int(x), int(y)
-        x, y = self.height.value - y, x
+        x, y = self.height - y, x
         return x, y
 
-    def __del__(self):
-        self.nemu.disconnect(self.handle)
-
 
 if __name__ == '__main__':
     touch = MuMuTouch(0, r'C:\Program Files\Netease\MuMu Player 12')
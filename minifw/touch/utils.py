@@ -1,5 +1,7 @@
+import asyncio
 import time
 
+from minifw.common import METRICS
 from minifw.touch import config
 
 
@@ -57,10 +59,20 @@ class CommandBuilder(object):
         self.commit()
         final_content = self._content
         # logger.info("send operation: {}".format(final_content.replace("\n", "\\n")))
-        connection.send(final_content)
+        with METRICS.timer("touch_send", backend=type(connection).__name__):
+            connection.send(final_content)
         time.sleep(self._delay / 1000 + config.DEFAULT_DELAY)
         self.reset()
 
+    async def publish_async(self, writer: asyncio.StreamWriter):
+        """apply current commands (_content) through an asyncio stream, without blocking the event loop"""
+        self.commit()
+        with METRICS.timer("touch_send", backend="async"):
+            writer.write(str2byte(self._content))
+            await writer.drain()
+        await asyncio.sleep(self._delay / 1000 + config.DEFAULT_DELAY)
+        self.reset()
+
     def reset(self):
         """clear current commands (_content)"""
         self._content = ""
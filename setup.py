@@ -22,6 +22,7 @@ setup(
         'minifw.touch': ['bin/**/*'],
         'minifw.screencap': ['bin/**/*'],
         'minifw.common': ['bin/**/*'],
+        'minifw.benchmark': ['baseline.json'],
         # 如果bin文件不在包内，也可以直接指定路径
         # '': ['bin/*'],
     },